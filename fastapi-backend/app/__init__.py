@@ -1,15 +1,29 @@
 """
 FastAPI Backend Package for Student Enrollment System
+
+Names are imported lazily on first access, so importing a submodule such as
+``app.config`` does not pull in SQLAlchemy models and every schema.
 """
-from .database import Base, engine, get_db
-from .models import Student, Course, Enrollment
-from .schemas import (
-    StudentCreate, StudentRead, StudentUpdate, StudentWithEnrollments,
-    CourseCreate, CourseRead, CourseUpdate, CourseWithStudents,
-    EnrollmentCreate, EnrollmentRead, EnrollmentUpdate,
-    EnrollmentWithStudent, EnrollmentWithCourse,
-    SuccessResponse, ErrorResponse
-)
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    # Database
+    "Base": ".database", "engine": ".database", "get_db": ".database",
+    
+    # Models
+    "Student": ".models", "Course": ".models", "Enrollment": ".models",
+    
+    # Schemas
+    "StudentCreate": ".schemas", "StudentRead": ".schemas", "StudentUpdate": ".schemas",
+    "StudentWithEnrollments": ".schemas",
+    "CourseCreate": ".schemas", "CourseRead": ".schemas", "CourseUpdate": ".schemas",
+    "CourseWithStudents": ".schemas",
+    "EnrollmentCreate": ".schemas", "EnrollmentRead": ".schemas", "EnrollmentUpdate": ".schemas",
+    "EnrollmentWithStudent": ".schemas", "EnrollmentWithCourse": ".schemas",
+    "StudentEnrollmentPage": ".schemas",
+    "SuccessResponse": ".schemas", "ErrorResponse": ".schemas",
+}
 
 __all__ = [
     # Database
@@ -23,5 +37,13 @@ __all__ = [
     "CourseCreate", "CourseRead", "CourseUpdate", "CourseWithStudents",
     "EnrollmentCreate", "EnrollmentRead", "EnrollmentUpdate",
     "EnrollmentWithStudent", "EnrollmentWithCourse",
+    "StudentEnrollmentPage",
     "SuccessResponse", "ErrorResponse"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
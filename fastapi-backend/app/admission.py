@@ -0,0 +1,255 @@
+"""
+Admission control and load shedding
+
+Without limits, an overloaded worker accepts every request and parks it in
+the threadpool queue until clients and load balancers time out, so nothing
+completes in time. ``AdmissionMiddleware`` bounds the work in progress
+instead:
+
+* at most ``max_concurrency`` requests run at once, and at most
+  ``route_concurrency`` of them on one route (``GET /students/{student_id}``);
+  ``route_limits`` overrides the limit of individual routes;
+* requests beyond that wait in a FIFO queue of ``queue_size`` entries for
+  up to ``max_wait`` seconds. A request is admitted as soon as its own route
+  has room, even if requests for a saturated route are ahead of it;
+* when the queue is full or the wait runs out, the request is answered
+  503 with ``Retry-After`` immediately, before any work is done;
+* with ``rate`` set, each client gets a token bucket of ``burst`` requests
+  refilled at ``rate`` per second, and gets 429 with ``Retry-After`` when
+  it is empty. Clients are identified by ``client_header`` when present,
+  else by their address;
+* ``priority`` routes (``/health``, ``/stats``, ...) bypass the limits, the
+  queue and the rate limit. Keeping ``max_concurrency`` below the
+  threadpool's 40 threads leaves threads free for them under load.
+
+Entries in ``route_limits`` and ``priority`` are either a path template
+(``/stats``) or a method and path template (``POST /enrollments``).
+"""
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, Optional
+
+from starlette.routing import Match
+
+from .metrics import ADMISSION_QUEUED, ADMISSION_REJECTED, ADMISSION_WAIT
+
+__all__ = ["AdmissionController", "AdmissionMiddleware", "TokenBuckets", "route_path"]
+
+# Most clients whose buckets are kept; the least recently seen are dropped
+MAX_CLIENTS = 10000
+
+
+class AdmissionController:
+    """Concurrency limits per route and overall, with a bounded FIFO wait queue"""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        route_concurrency: int,
+        route_limits: Dict[str, int] = None,
+        queue_size: int = 200,
+        max_wait: float = 2.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.route_concurrency = route_concurrency
+        self.route_limits = dict(route_limits or {})
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.active = 0
+        self._route_active: Dict[str, int] = {}
+        self._waiters = deque()  # (route, future), oldest first
+        self._lock = threading.Lock()
+
+    def _limit(self, route: str) -> int:
+        limit = self.route_limits.get(route)
+        if limit is None:
+            limit = self.route_limits.get(route.partition(" ")[2], self.route_concurrency)
+        return limit
+
+    def _has_room(self, route: str) -> bool:
+        return self.active < self.max_concurrency and self._route_active.get(route, 0) < self._limit(route)
+
+    def _take(self, route: str) -> None:
+        self.active += 1
+        self._route_active[route] = self._route_active.get(route, 0) + 1
+
+    async def acquire(self, route: str) -> Optional[str]:
+        """Wait for a slot; returns None once admitted, or why the request was shed"""
+        with self._lock:
+            if self._has_room(route) and not any(waiting == route for waiting, _ in self._waiters):
+                self._take(route)
+                return None
+            if len(self._waiters) >= self.queue_size:
+                return "queue_full"
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append((route, future))
+            ADMISSION_QUEUED.inc()
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # The client went away; give back a slot granted meanwhile
+            if not self._withdraw(route, future):
+                self.release(route)
+            raise
+        finally:
+            ADMISSION_WAIT.observe(time.perf_counter() - start)
+        # Granted, possibly just as the wait ran out
+        return "timeout" if self._withdraw(route, future) else None
+
+    def _withdraw(self, route: str, future) -> bool:
+        """Leave the queue; False if the slot had been granted already"""
+        with self._lock:
+            try:
+                self._waiters.remove((route, future))
+            except ValueError:
+                # release() took a slot for it; the grant may not have run yet
+                return False
+            ADMISSION_QUEUED.dec()
+            return True
+
+    def release(self, route: str) -> None:
+        """Free a slot and admit the oldest waiters that now fit"""
+        with self._lock:
+            self.active -= 1
+            self._route_active[route] -= 1
+            if not self._route_active[route]:
+                del self._route_active[route]
+            for waiter in list(self._waiters):
+                if self.active >= self.max_concurrency:
+                    break
+                waiting_route, future = waiter
+                if self._route_active.get(waiting_route, 0) < self._limit(waiting_route):
+                    self._waiters.remove(waiter)
+                    ADMISSION_QUEUED.dec()
+                    self._take(waiting_route)
+                    future.get_loop().call_soon_threadsafe(_grant, future)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+
+def _grant(future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class TokenBuckets:
+    """Per-client token buckets of ``burst`` tokens refilled at ``rate`` per second"""
+
+    def __init__(self, rate: float, burst: int, max_clients: int = MAX_CLIENTS):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, client: str) -> float:
+        """Take a token; returns 0, or the seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [float(self.burst), now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.rate
+
+
+def route_path(routes: Iterable, scope) -> str:
+    """Path template of the route a request will reach, before routing runs"""
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match != Match.NONE:
+            return route.path
+    return "unmatched"
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying rate limits and admission control per route"""
+
+    def __init__(
+        self,
+        app,
+        routes: Iterable,
+        controller: AdmissionController,
+        buckets: TokenBuckets = None,
+        priority: Iterable[str] = (),
+        client_header: str = "",
+        retry_after: int = 1,
+    ):
+        self.app = app
+        self.routes = routes
+        self.controller = controller
+        self.buckets = buckets
+        self.priority = set(priority)
+        self.client_header = client_header.lower().encode()
+        self.retry_after = retry_after
+
+    def _route(self, scope) -> str:
+        """``METHOD /path/template`` of the route the request will reach"""
+        return f"{scope['method']} {route_path(self.routes, scope)}"
+
+    def _client(self, scope) -> str:
+        if self.client_header:
+            for name, value in scope["headers"]:
+                if name == self.client_header:
+                    return value.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route(scope)
+        if route in self.priority or route.partition(" ")[2] in self.priority:
+            await self.app(scope, receive, send)
+            return
+
+        if self.buckets is not None:
+            wait = self.buckets.take(self._client(scope))
+            if wait:
+                ADMISSION_REJECTED.labels(route, "rate_limited").inc()
+                await _reject(send, 429, "Rate limit exceeded", math.ceil(wait))
+                return
+
+        reason = await self.controller.acquire(route)
+        if reason is not None:
+            ADMISSION_REJECTED.labels(route, reason).inc()
+            await _reject(send, 503, "Server is busy, retry later", self.retry_after)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route)
+
+
+async def _reject(send, status: int, detail: str, retry_after: int) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
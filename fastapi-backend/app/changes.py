@@ -0,0 +1,68 @@
+"""
+Change log for incremental sync
+
+Consumers used to re-download whole lists to find out what changed. Every
+flush of a ``SessionLocal`` session that inserts, updates or deletes a
+student, course or enrollment now also inserts one ``changes`` row per
+changed object, on the same connection. The entries commit or roll back
+with the change itself, group commit savepoints included.
+
+``version`` is an AUTOINCREMENT key, so it only grows. SQLite has one
+writer at a time, and a transaction holds the write lock from its first
+write until it commits, so versions also become visible in order. Once a
+consumer has seen version n, no entry below n can still appear.
+``GET /changes?since=n`` returns the entries after n, oldest first.
+
+Entries only say what changed (``{"version", "entity", "id", "op"}``);
+consumers fetch the current row from ``/{entity}/{id}`` if they need it.
+Bulk statements (``query.delete()``, the Core inserts of
+``generate_data.py``) are not logged, and neither are sharded databases,
+where every shard would count its own versions.
+
+The listener is installed when this module is imported, which main.py does.
+"""
+from typing import Dict
+
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+__all__ = ["changes_page"]
+
+# Logged models; entries name them by table, like the API paths
+TRACKED = (models.Student, models.Course, models.Enrollment)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _log_changes(session: Session, flush_context) -> None:
+    """Insert a change entry for each object the flush wrote"""
+    entries = []
+    for op, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        changed = [
+            obj for obj in objects
+            if isinstance(obj, TRACKED) and (op != "update" or session.is_modified(obj, include_collections=False))
+        ]
+        changed.sort(key=lambda obj: (obj.__tablename__, obj.id))
+        entries.extend({"entity": obj.__tablename__, "entity_id": obj.id, "op": op} for obj in changed)
+    if entries:
+        session.connection().execute(insert(models.Change), entries)
+
+
+def changes_page(db: Session, since: int, limit: int) -> Dict:
+    """Entries after version ``since``, at most ``limit`` of them"""
+    changes = db.scalars(
+        select(models.Change)
+        .where(models.Change.version > since)
+        .order_by(models.Change.version)
+        .limit(limit)
+    ).all()
+    return {
+        "items": [
+            {"version": change.version, "entity": change.entity, "id": change.entity_id, "op": change.op}
+            for change in changes
+        ],
+        "next_since": changes[-1].version if changes else since,
+        "latest_version": db.scalar(select(func.max(models.Change.version))) or 0,
+    }
@@ -14,6 +14,17 @@ class Settings(BaseSettings):
     
     # Database Settings
     database_url: str = "sqlite:///./student_enrollment.db"
+    auto_migrate: bool = False  # apply migrations on startup instead of via app.init_db
+    sqlite_wal: bool = False  # WAL journal; required with several worker processes
+    shard_urls: list[str] = []  # students and enrollments split across these (see app/sharding.py)
+    
+    # Read/write split (see app/read_split.py): GET handlers use a separate
+    # read-only pool, on the same file or on a replica kept up to date externally
+    read_split: bool = True
+    read_pool_size: int = 20
+    read_max_overflow: int = 10
+    read_replica_url: Optional[str] = None  # e.g. sqlite:///./replica.db
+    read_your_writes_seconds: float = 5.0  # a client that wrote reads the primary this long
     
     # CORS Settings
     cors_origins: list[str] = ["http://localhost:5000", "http://localhost:5001", "http://127.0.0.1:5000", "http://127.0.0.1:5001"]
@@ -26,6 +37,74 @@ class Settings(BaseSettings):
     environment: str = "development"
     debug: bool = True
     
+    # Registration mode (see app/enrollment_queue.py): POST /enrollments is
+    # queued and written in batches by one writer per process
+    registration_mode: bool = False
+    registration_batch_size: int = 500  # most requests per transaction
+    registration_batch_wait_ms: float = 0.0  # linger for more; 0 takes only what is queued
+    registration_queue_size: int = 10000  # further requests get 503
+    registration_timeout_seconds: float = 30.0  # a request waiting longer gets 503
+    
+    # Group commit (see app/group_commit.py): concurrent writes share one
+    # transaction commit, each in its own savepoint
+    group_commit: bool = False
+    group_commit_window_ms: float = 2.0  # how long a batch stays open for more writes
+    group_commit_max_batch: int = 64  # most requests per commit
+    group_commit_timeout_seconds: float = 30.0  # a request waiting longer gets 503
+    
+    # Idempotency-Key header on POST/PUT (see app/idempotency.py)
+    idempotency_enabled: bool = True
+    idempotency_store: str = "memory"  # or the path of a SQLite file shared by all workers
+    idempotency_ttl_seconds: float = 86400.0  # how long a response is replayed
+    idempotency_max_keys: int = 10000
+    
+    # Admission control (see app/admission.py): requests beyond the limits
+    # wait in a bounded queue, then get 503 with Retry-After
+    admission_enabled: bool = True
+    admission_max_concurrency: int = 32  # keep below the threadpool's 40 threads
+    admission_route_concurrency: int = 16  # per route, e.g. "GET /students/{student_id}"
+    admission_route_limits: dict[str, int] = {}  # overrides, e.g. {"POST /enrollments": 4}
+    admission_queue_size: int = 200  # waiting requests before new ones are shed
+    admission_max_wait_ms: float = 2000.0
+    admission_retry_after: int = 1  # seconds
+    admission_priority_routes: list[str] = ["/health", "/ready", "/metrics", "/stats"]  # bypass all limits
+    
+    # Identical concurrent GETs on these routes share one response (see
+    # app/single_flight.py); an empty list disables coalescing
+    single_flight_routes: list[str] = ["/courses", "/courses/{course_id}", "/stats"]
+    
+    # Per-client token buckets; 0 disables rate limiting
+    rate_limit_per_second: float = 0.0
+    rate_limit_burst: int = 50
+    rate_limit_client_header: str = "X-Client-Id"  # falls back to the client address
+    
+    # Requests served in-process on startup, before /ready reports ready
+    warmup_paths: list[str] = ["/students?limit=1", "/courses?limit=1", "/enrollments?limit=1", "/stats"]
+    
+    # Query instrumentation: X-DB-* headers are only sent in debug mode
+    n_plus_one_threshold: int = 5  # 0 disables N+1 warnings
+    server_timing: bool = True  # Server-Timing header with db/serialize/total
+    
+    # Slow-statement log with query plans (see app/slow_queries.py)
+    slow_query_threshold_ms: float = 100.0  # 0 or less disables the log
+    slow_query_log: str = "./slow_queries.jsonl"
+    slow_query_explain: bool = True
+    
+    # Distributed tracing (see app/tracing.py); requests with a sampled
+    # traceparent header are always traced while tracing is enabled
+    tracing_enabled: bool = True
+    tracing_sample_rate: float = 0.0  # share of requests without a traceparent to trace
+    tracing_exporter: str = "file"  # console, file or module:Class
+    tracing_file: str = "./traces.jsonl"
+    
+    # Request profiling (see app/profiling.py); off unless explicitly enabled
+    profiling_enabled: bool = False
+    profiling_token: str = ""  # X-Profile-Token header or ?profile= value
+    profiling_sample_every: int = 0  # also profile every Nth request; 0 = never
+    profiling_dir: str = "./profiles"
+    profiling_keep: int = 200  # newest reports kept in profiling_dir
+    profiling_interval: float = 0.002  # seconds between stack samples
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
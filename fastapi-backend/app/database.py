@@ -1,35 +1,221 @@
 """
 Database configuration and setup for SQLAlchemy with SQLite
+
+The engine is not created at import time. The application's lifespan calls
+``init_engine`` on startup and ``dispose_engine`` on shutdown; scripts and
+tests that use the database without the app get an engine on first use
+through ``get_engine`` or ``get_db``.
+
+With ``SHARD_URLS`` set, ``engine`` holds the course catalog and
+``shard_engines`` the student shards, and ``get_db`` yields sessions that
+route each statement to the right database (see app/sharding.py).
+
+``init_read_engine`` adds a read-only engine, on the same file or on a
+replica, for the sessions of ``get_read_db`` (see app/read_split.py).
 """
-from sqlalchemy import create_engine
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-# Database URL from settings
-SQLALCHEMY_DATABASE_URL = settings.database_url
+# Current engine; None until init_engine() runs
+engine: Optional[Engine] = None
+# Student shards; empty unless sharding is configured
+shard_engines: List[Engine] = []
+_engine_lock = threading.Lock()
 
-# Create engine
-# connect_args={"check_same_thread": False} is needed only for SQLite
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+# Create SessionLocal class; bound to the engine by init_engine()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Read-only engine and its sessions; None until init_read_engine() runs
+read_engine: Optional[Engine] = None
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 # Create Base class for declarative models
 Base = declarative_base()
 
+
+def create_db_engine(database_url: str = None, read_only: bool = False) -> Engine:
+    """Create an engine with the app's instrumentation installed"""
+    from .metrics import instrument_pool
+    from .query_stats import install_query_stats
+
+    pool_options = {}
+    if read_only:
+        # Reads are most of the traffic and must not queue behind writes
+        pool_options = {"pool_size": settings.read_pool_size, "max_overflow": settings.read_max_overflow}
+
+    # connect_args={"check_same_thread": False} is needed only for SQLite
+    new_engine = create_engine(
+        database_url or settings.database_url,
+        connect_args={"check_same_thread": False},
+        **pool_options
+    )
+
+    if read_only:
+        event.listen(new_engine, "connect", _query_only)
+    elif settings.sqlite_wal and new_engine.dialect.name == "sqlite":
+        # Readers no longer block the writer (or each other) across processes
+        event.listen(new_engine, "connect", _enable_wal)
+    
+    # Count statements and DB time per request (see app/query_stats.py)
+    install_query_stats(new_engine)
+
+    # Spans for the SQL statements of traced requests
+    if settings.tracing_enabled:
+        from .tracing import install_tracing
+        install_tracing(new_engine)
+    
+    # Pool checkout counts and in-use connections for /metrics
+    instrument_pool(new_engine)
+
+    # Slow statements, with their query plans, to settings.slow_query_log
+    if settings.slow_query_threshold_ms > 0:
+        from .slow_queries import install_slow_query_log
+        install_slow_query_log(
+            new_engine,
+            settings.slow_query_threshold_ms,
+            settings.slow_query_log,
+            explain_plans=settings.slow_query_explain
+        )
+    return new_engine
+
+
+def _enable_wal(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    finally:
+        cursor.close()
+
+
+def _query_only(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
+def read_only_url(database_url) -> Optional[str]:
+    """
+    A SQLite URL as a read-only URI (``mode=ro``); None for in-memory
+    databases, which other connections cannot open
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return None
+    query = dict(url.query, mode="ro", uri="true")
+    return url.set(database=f"file:{url.database}", query=query).render_as_string(hide_password=False)
+
+
+def init_engine(database_url: str = None, shard_urls: List[str] = None) -> Engine:
+    """Create the engine (once) and bind SessionLocal to it"""
+    global engine
+    with _engine_lock:
+        if engine is None:
+            engine = create_db_engine(database_url)
+            SessionLocal.configure(bind=engine)
+            shard_urls = settings.shard_urls if shard_urls is None else shard_urls
+            if shard_urls:
+                from .sharding import CATALOG, ShardedSessionLocal
+                shard_engines[:] = [create_db_engine(url) for url in shard_urls]
+                ShardedSessionLocal.configure(shards={CATALOG: engine, **dict(enumerate(shard_engines))})
+    return engine
+
+
+def get_engine() -> Engine:
+    """The current engine, created on first use"""
+    return engine if engine is not None else init_engine()
+
+
+def init_read_engine(database_url: str = None) -> Optional[Engine]:
+    """
+    Create the read-only engine (once), on ``database_url`` or else the
+    primary database, and bind ReadSessionLocal to it. Returns None where
+    a second connection cannot share the database (in-memory SQLite).
+    """
+    global read_engine
+    primary = get_engine()
+    with _engine_lock:
+        if read_engine is None:
+            url = read_only_url(database_url or primary.url)
+            if url is not None:
+                read_engine = create_db_engine(url, read_only=True)
+                ReadSessionLocal.configure(bind=read_engine)
+    return read_engine
+
+
+def all_engines() -> List[Engine]:
+    """The engine followed by the shard engines, created on first use"""
+    return [get_engine()] + shard_engines
+
+
+def dispose_engine() -> None:
+    """Close pooled connections and forget the engine"""
+    global engine
+    with _engine_lock:
+        if engine is not None:
+            for each in [engine] + shard_engines:
+                each.dispose()
+            engine = None
+            shard_engines.clear()
+            SessionLocal.configure(bind=None)
+        _forget_read_engine(close=True)
+
+
+def _forget_read_engine(close: bool) -> None:
+    global read_engine
+    if read_engine is not None:
+        read_engine.dispose(close=close)
+        read_engine = None
+        ReadSessionLocal.configure(bind=None)
+
+
+def reset_after_fork() -> None:
+    """
+    Forget an engine inherited from a parent process.
+    
+    Pooled connections must not be shared across fork(); they are dropped
+    without being closed (the parent still owns them) and the child creates
+    its own engine on first use.
+    """
+    global engine
+    if engine is not None:
+        for each in [engine] + shard_engines:
+            each.dispose(close=False)
+        engine = None
+        shard_engines.clear()
+        SessionLocal.configure(bind=None)
+    _forget_read_engine(close=False)
+
+
 # Dependency to get database session
 def get_db():
     """
     Dependency function to get database session.
     Yields a database session and ensures it's closed after use.
     """
-    db = SessionLocal()
+    from .metrics import timed_checkout
+
+    if engine is None:
+        init_engine()
+    if shard_engines:
+        from .sharding import ShardedSessionLocal
+        db = ShardedSessionLocal()
+    else:
+        db = SessionLocal()
     try:
+        timed_checkout(db)
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# get_db as a context manager, for code that runs outside a dependency
+db_session = contextmanager(get_db)
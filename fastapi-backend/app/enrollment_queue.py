@@ -0,0 +1,239 @@
+"""
+Registration mode: enrollments written in batches by a single writer
+
+When registration opens, thousands of ``POST /enrollments`` can arrive within
+seconds, mostly for the same few courses. Written one by one, each request
+validates, takes SQLite's write lock and commits (an fsync) by itself, and
+the seat check races with the other writers.
+
+With ``REGISTRATION_MODE=true`` the endpoint puts the request on an
+in-process queue instead and awaits a future. One writer thread drains the
+queue: it takes everything waiting (up to ``registration_batch_size``,
+optionally lingering ``registration_batch_wait_ms`` for more), opens a
+single write transaction and
+
+* loads the students, courses, active seat counts and existing enrollments
+  of the whole batch with four queries,
+* applies the requests in arrival order against those values in memory, so
+  requests later in the batch see the seats taken by earlier ones,
+* commits once, then resolves each caller's future with its own outcome:
+  the new enrollment, or the 404/400 the direct path would have answered.
+
+If the batch fails to commit, its requests are retried one at a time so an
+unexpected error only reaches the request that caused it. A caller waits at
+most ``registration_timeout_seconds`` for its outcome and then gets 503; its
+request is dropped if the writer has not reached it yet.
+
+The queue is per process; with several gunicorn workers each has its own
+writer, and ``BEGIN IMMEDIATE`` keeps their batches from interleaving.
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import models, schemas
+from .metrics import REGISTRATION_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["EnrollmentQueue", "EnrollmentRejected", "EnrollmentTimeout", "QueueFull"]
+
+QueueFull = queue.Full
+
+# Put on the queue by stop(); the writer exits after the requests before it
+_STOP = object()
+
+
+class EnrollmentRejected(Exception):
+    """A request the direct path would have answered with an HTTP error"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class EnrollmentTimeout(Exception):
+    """The writer did not answer a request within the queue's timeout"""
+
+
+class _Request(NamedTuple):
+    student_id: int
+    course_id: int
+    future: Future
+
+
+class EnrollmentQueue:
+    """Queue of enrollment requests drained by one writer thread"""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        batch_size: int = 500,
+        batch_wait_ms: float = 0.0,
+        max_queued: int = 10000,
+        timeout: float = 30.0,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = max(batch_size, 1)
+        self.batch_wait = batch_wait_ms / 1000
+        self.timeout = timeout
+        self._requests = queue.Queue(max_queued)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the writer thread"""
+        self._thread = threading.Thread(target=self._run, name="enrollment-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """Write the requests already queued, then stop the writer"""
+        if self._thread is not None:
+            self._requests.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, student_id: int, course_id: int) -> Future:
+        """Queue a request; raises QueueFull when the queue is at capacity"""
+        if self._thread is None or not self._thread.is_alive():
+            raise RuntimeError("The enrollment writer is not running")
+        future = Future()
+        self._requests.put_nowait(_Request(student_id, course_id, future))
+        return future
+
+    async def enroll(self, student_id: int, course_id: int) -> schemas.EnrollmentRead:
+        """Queue a request and wait for its outcome; raises EnrollmentTimeout after ``timeout`` seconds"""
+        future = self.submit(student_id, course_id)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            logger.warning("Enrollment request was not written within %.1f s", self.timeout)
+            raise EnrollmentTimeout()
+
+    def _next_batch(self) -> List:
+        """Block for one request, then take what else arrives in the window"""
+        batch = [self._requests.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._requests.get(timeout=remaining))
+                else:
+                    batch.append(self._requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            stopping = batch[-1] is _STOP
+            if stopping:
+                batch.pop()
+            # Callers that gave up (cancelled futures) are dropped here
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if batch:
+                REGISTRATION_BATCH_SIZE.observe(len(batch))
+                self._write(batch)
+            if stopping:
+                return
+
+    def _write(self, batch: List[_Request]) -> None:
+        """Apply a batch and resolve its futures"""
+        try:
+            outcomes = self._apply(batch)
+        except Exception as e:
+            if len(batch) > 1:
+                logger.warning("Enrollment batch of %d failed (%s); retrying one by one", len(batch), e)
+                for request in batch:
+                    self._write([request])
+                return
+            if isinstance(e, IntegrityError):
+                logger.error(f"Error creating enrollment: {e}")
+                outcomes = [EnrollmentRejected(400, "Error creating enrollment")]
+            else:
+                logger.exception("Enrollment request failed")
+                outcomes = [e]
+
+        for request, outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                request.future.set_exception(outcome)
+            else:
+                request.future.set_result(outcome)
+
+    def _apply(self, batch: List[_Request]) -> list:
+        """Validate and write a batch in one transaction; one outcome per request"""
+        Enrollment = models.Enrollment
+        ACTIVE = models.EnrollmentStatus.ACTIVE
+        student_ids = {request.student_id for request in batch}
+        course_ids = {request.course_id for request in batch}
+        pairs = {(request.student_id, request.course_id) for request in batch}
+
+        with self.session_factory() as db:
+            _begin_write(db)
+            students = set(db.scalars(select(models.Student.id).where(models.Student.id.in_(student_ids))))
+            capacity = dict(db.execute(
+                select(models.Course.id, models.Course.max_students).where(models.Course.id.in_(course_ids))
+            ).all())
+            enrolled = dict(db.execute(
+                select(Enrollment.course_id, func.count())
+                .where(Enrollment.course_id.in_(capacity), Enrollment.status == ACTIVE)
+                .group_by(Enrollment.course_id)
+            ).all())
+            existing = {
+                (e.student_id, e.course_id): e
+                for e in db.scalars(select(Enrollment).where(tuple_(Enrollment.student_id, Enrollment.course_id).in_(pairs)))
+            }
+
+            # Same checks, in the same order, as the direct path in main.py
+            outcomes = []
+            for request in batch:
+                key = (request.student_id, request.course_id)
+                if request.student_id not in students:
+                    outcomes.append(EnrollmentRejected(404, "Student not found"))
+                elif request.course_id not in capacity:
+                    outcomes.append(EnrollmentRejected(404, "Course not found"))
+                elif enrolled.get(request.course_id, 0) >= capacity[request.course_id]:
+                    outcomes.append(EnrollmentRejected(400, "Course is full"))
+                elif key in existing and existing[key].status == ACTIVE:
+                    outcomes.append(EnrollmentRejected(400, "Student is already enrolled in this course"))
+                else:
+                    enrollment = existing.get(key)
+                    if enrollment is None:
+                        enrollment = Enrollment(student_id=request.student_id, course_id=request.course_id, status=ACTIVE)
+                        db.add(enrollment)
+                        existing[key] = enrollment
+                    else:
+                        # Reactivate the enrollment
+                        enrollment.status = ACTIVE
+                    enrolled[request.course_id] = enrolled.get(request.course_id, 0) + 1
+                    outcomes.append(enrollment)
+
+            db.flush()
+            ids = [outcome.id for outcome in outcomes if isinstance(outcome, Enrollment)]
+            db.commit()
+
+            # One query reloads the committed rows, enrollment_date included
+            written = {
+                e.id: schemas.EnrollmentRead.model_validate(e)
+                for e in db.scalars(select(Enrollment).where(Enrollment.id.in_(ids)))
+            } if ids else {}
+        logger.debug("Enrollment batch: %d requests, %d written", len(batch), len(written))
+        return [written[outcome.id] if isinstance(outcome, Enrollment) else outcome for outcome in outcomes]
+
+
+def _begin_write(db: Session) -> None:
+    """Take SQLite's write lock before reading, so the counts stay valid until commit"""
+    connection = db.connection()
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
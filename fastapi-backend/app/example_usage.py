@@ -2,7 +2,7 @@
 Example usage of the database models
 """
 from sqlalchemy.orm import Session
-from .database import SessionLocal, engine
+from .database import SessionLocal
 from .models import Student, Course, Enrollment
 from .init_db import init_db
 
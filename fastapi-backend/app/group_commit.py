@@ -0,0 +1,226 @@
+"""
+Group commit for the write endpoints
+
+Every create/update/delete handler commits its own transaction, so each
+mutation waits for its own fsync and holds SQLite's write lock by itself.
+With ``GROUP_COMMIT=true`` the handlers run on one writer thread instead,
+which shares a transaction between the requests that arrive within
+``group_commit_window_ms`` of each other (at most
+``group_commit_max_batch``):
+
+* each request runs in its own SAVEPOINT. The handler's ``db.commit()``
+  releases the savepoint, ``db.rollback()`` rolls back to it, and an error
+  such as an ``IntegrityError`` or an ``HTTPException`` only undoes that
+  request's changes;
+* after the window the transaction is committed once, then every waiting
+  request gets its own result or exception;
+* if the commit itself fails, or the write lock cannot be taken (another
+  process held it past the busy timeout), the batch's requests are run
+  again one per transaction, so the failure only reaches the requests it
+  concerns, and the writer carries on with the next batch;
+* a caller waits at most ``group_commit_timeout_seconds`` and then gets 503.
+
+Handlers opt in with ``@group_committed(ResponseModel)`` and
+``db: Session = Depends(get_write_db)``; their bodies stay unchanged. Without
+group commit the dependency is ``get_db`` and the decorator does nothing.
+The response model is built on the writer thread, while the handler's
+session can still load attributes such as ``Course.enrolled_count``.
+
+The handler runs in the caller's context, so its statements still count
+towards the request's query stats and trace.
+"""
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from functools import wraps
+from typing import Callable, List, NamedTuple, Optional
+
+from fastapi import HTTPException, Request
+from sqlalchemy.engine import Connection, Engine
+
+from .database import SessionLocal, get_db
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["GroupCommitter", "get_write_db", "group_committed"]
+
+# Put on the queue by stop(); the writer exits after the jobs before it
+_STOP = object()
+
+
+class _Job(NamedTuple):
+    work: Callable
+    response_model: Optional[type]
+    context: contextvars.Context
+    future: Future
+
+
+class GroupCommitter:
+    """Writer thread that commits concurrent write requests together"""
+
+    def __init__(self, engine: Engine, window_ms: float = 2.0, max_batch: int = 64, timeout: float = 30.0):
+        self.engine = engine
+        self.window = window_ms / 1000
+        self.max_batch = max(max_batch, 1)
+        self.timeout = timeout
+        self._jobs = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the writer thread"""
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """Commit the jobs already queued, then stop the writer"""
+        if self._thread is not None:
+            self._jobs.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, work: Callable, response_model: type = None) -> Future:
+        """Queue ``work(db)``; the future resolves once its transaction commits"""
+        if self._thread is None:
+            raise RuntimeError("The group commit writer is not running")
+        future = Future()
+        self._jobs.put(_Job(work, response_model, contextvars.copy_context(), future))
+        return future
+
+    def run(self, work: Callable, response_model: type = None):
+        """Run ``work(db)`` in the next group commit and wait for its outcome
+
+        Raises a 503 after ``timeout`` seconds. A job that has not started by
+        then is dropped; one that has may still be committed.
+        """
+        future = self.submit(work, response_model)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            raise self._timed_out(future)
+
+    async def run_async(self, work: Callable, response_model: type = None):
+        """``run`` for async endpoints"""
+        future = self.submit(work, response_model)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(future)
+
+    def _timed_out(self, future: Future) -> HTTPException:
+        future.cancel()
+        logger.warning("Group commit write did not finish within %.1f s", self.timeout)
+        return HTTPException(status_code=503, detail="Write timed out", headers={"Retry-After": "1"})
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            job = self._jobs.get()
+            if job is _STOP:
+                return
+            stopping = self._commit_batch(job)
+
+    def _commit_batch(self, first: _Job) -> bool:
+        """Run jobs until the window closes, commit, resolve; True once stopped"""
+        # Callers that gave up waiting (cancelled futures) are dropped
+        if not first.future.set_running_or_notify_cancel():
+            return False
+        batch, outcomes, stopping = [first], None, False
+        try:
+            with self.engine.connect() as connection:
+                with connection.begin():
+                    _begin_write(connection)
+                    deadline = time.monotonic() + self.window
+                    outcomes = [_execute(connection, first)]
+                    while len(batch) < self.max_batch:
+                        try:
+                            job = self._jobs.get(timeout=max(deadline - time.monotonic(), 0))
+                        except queue.Empty:
+                            break
+                        if job is _STOP:
+                            stopping = True
+                            break
+                        if job.future.set_running_or_notify_cancel():
+                            batch.append(job)
+                            outcomes.append(_execute(connection, job))
+        except Exception as e:
+            # Taking the write lock, or the commit, failed; the jobs taken so
+            # far are retried on their own, the writer keeps running
+            logger.warning("Group commit of %d requests failed (%s); retrying one by one", len(batch), e)
+            outcomes = None
+
+        if outcomes is None:
+            outcomes = [self._run_alone(job) for job in batch]
+        for job, (ok, value) in zip(batch, outcomes):
+            if ok:
+                job.future.set_result(value)
+            else:
+                job.future.set_exception(value)
+        return stopping
+
+    def _run_alone(self, job: _Job):
+        """Run one job in a transaction of its own"""
+        try:
+            with self.engine.connect() as connection:
+                with connection.begin():
+                    _begin_write(connection)
+                    ok, value = _execute(connection, job)
+        except Exception as e:
+            return False, e
+        return ok, value
+
+
+def _begin_write(connection: Connection) -> None:
+    """Take SQLite's write lock up front so the batch is not interleaved"""
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _execute(connection: Connection, job: _Job):
+    """Run a job in a savepoint; (True, result) or (False, exception)"""
+    db = SessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        result = job.context.run(job.work, db)
+        if job.response_model is not None and result is not None:
+            result = job.response_model.model_validate(result)
+        db.commit()
+        return True, result
+    except Exception as e:
+        db.rollback()
+        return False, e
+    finally:
+        db.close()
+
+
+def get_write_db(request: Request):
+    """
+    Session for a write endpoint, or the app's GroupCommitter when group
+    commit is enabled (``group_committed`` then supplies the session)
+    """
+    committer = request.app.state.group_committer
+    if committer is not None:
+        yield committer
+    else:
+        yield from get_db()
+
+
+def group_committed(response_model: type = None):
+    """Run the decorated endpoint on the group commit writer when enabled
+
+    The endpoint takes ``db: Session = Depends(get_write_db)``; its return
+    value is converted to ``response_model`` on the writer thread.
+    """
+    def decorate(endpoint):
+        @wraps(endpoint)
+        def wrapper(**kwargs):
+            committer = kwargs["db"]
+            if not isinstance(committer, GroupCommitter):
+                return endpoint(**kwargs)
+            return committer.run(lambda db: endpoint(**dict(kwargs, db=db)), response_model)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,332 @@
+"""
+Idempotency keys for POST and PUT requests
+
+Clients that retry after a timeout send the same ``Idempotency-Key`` header
+again. ``IdempotencyMiddleware`` stores the first response per key and
+replays it for the retries, without running the endpoint or touching the
+database. A replay carries ``Idempotent-Replayed: true``.
+
+* Keys are scoped to the method and path. Reusing a key with a different
+  body or query string gets 422.
+* Concurrent requests with the same key are coalesced. The first one runs
+  and the others wait for its response.
+* 2xx and 4xx responses are stored; they are the outcome of the request.
+  After a 5xx (or an exception) the key is released, so a retry runs again.
+* Requests without the header are passed through untouched.
+
+Two stores are provided, each bounded to ``max_keys`` entries that expire
+after ``ttl`` seconds:
+
+* ``MemoryIdempotencyStore``: a process-local LRU. It is enough for a single
+  worker.
+* ``SQLiteIdempotencyStore``: a separate SQLite file in WAL mode that every
+  worker on one host shares, so a retry that lands on another worker is
+  still replayed. A request in flight on another worker is waited for by
+  polling the store.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+__all__ = [
+    "IdempotencyMiddleware", "MemoryIdempotencyStore", "SQLiteIdempotencyStore", "StoredResponse", "create_store",
+]
+
+HEADER = b"idempotency-key"
+METHODS = {"POST", "PUT"}
+MAX_KEY_LENGTH = 255
+
+# Response headers replayed; per-request ones (Server-Timing, X-DB-*) are not
+REPLAYED_HEADERS = {b"content-type"}
+
+
+class StoredResponse(NamedTuple):
+    status: int
+    headers: list
+    body: bytes
+
+
+class Entry(NamedTuple):
+    """A key's request fingerprint and, once finished, its response"""
+    fingerprint: str
+    response: Optional[StoredResponse]
+
+
+class MemoryIdempotencyStore:
+    """Process-local LRU of keys with per-entry expiry"""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 10000, ttl: float = 86400.0, pending_ttl: float = 60.0):
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, fingerprint: str) -> Optional[Entry]:
+        """Claim a key for this request; returns the existing entry if taken"""
+        now = time.time()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[2] > now:
+                self._entries.move_to_end(key)
+                return Entry(item[0], item[1])
+            self._entries[key] = (fingerprint, None, now + self.pending_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        return None
+
+    def get(self, key: str) -> Optional[Entry]:
+        item = self._entries.get(key)
+        if item is None or item[2] <= time.time():
+            return None
+        return Entry(item[0], item[1])
+
+    def complete(self, key: str, fingerprint: str, response: StoredResponse) -> None:
+        with self._lock:
+            self._entries[key] = (fingerprint, response, time.time() + self.ttl)
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteIdempotencyStore:
+    """Keys in a SQLite file shared by the workers on one host"""
+
+    blocking = True
+
+    def __init__(self, path: str, max_keys: int = 10000, ttl: float = 86400.0, pending_ttl: float = 60.0):
+        self.path = path
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._reservations = 0
+        # The app may be created in gunicorn's master; its connection is not
+        # kept, since connections must not be used across fork()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS idempotency_keys ("
+                " key TEXT PRIMARY KEY,"
+                " fingerprint TEXT NOT NULL,"
+                " status INTEGER,"
+                " headers TEXT,"
+                " body BLOB,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys (expires_at)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode: every statement is its own short transaction
+        conn = sqlite3.connect(self.path, isolation_level=None, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the connection owned by the current thread (and process)"""
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def reserve(self, key: str, fingerprint: str) -> Optional[Entry]:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("DELETE FROM idempotency_keys WHERE key = ? AND expires_at <= ?", (key, now))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO idempotency_keys (key, fingerprint, expires_at) VALUES (?, ?, ?)",
+            (key, fingerprint, now + self.pending_ttl)
+        )
+        if cursor.rowcount == 1:
+            self._reservations += 1
+            if self._reservations % 100 == 0:
+                self.sweep()
+            return None
+        return self.get(key) or Entry(fingerprint, None)
+
+    def get(self, key: str) -> Optional[Entry]:
+        row = self._connection().execute(
+            "SELECT fingerprint, status, headers, body FROM idempotency_keys WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        fingerprint, status, headers, body = row
+        if status is None:
+            return Entry(fingerprint, None)
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(headers)]
+        return Entry(fingerprint, StoredResponse(status, headers, body))
+
+    def complete(self, key: str, fingerprint: str, response: StoredResponse) -> None:
+        headers = json.dumps([(name.decode("latin-1"), value.decode("latin-1")) for name, value in response.headers])
+        self._connection().execute(
+            "INSERT OR REPLACE INTO idempotency_keys (key, fingerprint, status, headers, body, expires_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (key, fingerprint, response.status, headers, response.body, time.time() + self.ttl)
+        )
+
+    def release(self, key: str) -> None:
+        self._connection().execute("DELETE FROM idempotency_keys WHERE key = ?", (key,))
+
+    def sweep(self) -> int:
+        """Remove expired keys and the oldest ones beyond max_keys"""
+        conn = self._connection()
+        removed = conn.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (time.time(),)).rowcount
+        removed += conn.execute(
+            "DELETE FROM idempotency_keys WHERE key IN ("
+            " SELECT key FROM idempotency_keys ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_keys,)
+        ).rowcount
+        return removed
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM idempotency_keys").fetchone()[0]
+
+
+def create_store(spec: str, max_keys: int, ttl: float):
+    """``memory`` or the path of a SQLite file"""
+    if spec == "memory":
+        return MemoryIdempotencyStore(max_keys, ttl)
+    return SQLiteIdempotencyStore(spec, max_keys, ttl)
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware that replays stored responses for repeated Idempotency-Keys"""
+
+    def __init__(self, app, store, wait_timeout: float = 30.0, poll_interval: float = 0.05):
+        self.app = app
+        self.store = store
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        # Requests running in this process, by key, for coalescing
+        self._inflight = {}
+
+    async def _store(self, method, *args):
+        if self.store.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in METHODS:
+            await self.app(scope, receive, send)
+            return
+        header = next((value for name, value in scope["headers"] if name == HEADER), None)
+        if header is None:
+            await self.app(scope, receive, send)
+            return
+        if not header or len(header) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, {"detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"})
+            return
+
+        body, receive = await _buffer_body(receive)
+        key = f"{scope['method']} {scope['path']} {header.decode('latin-1')}"
+        fingerprint = hashlib.sha256(scope["query_string"] + b"\0" + body).hexdigest()
+
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            inflight = self._inflight.get(key)
+            if inflight is not None and inflight.get_loop() is asyncio.get_running_loop():
+                await asyncio.shield(inflight)
+                continue
+            entry = await self._store(self.store.reserve, key, fingerprint)
+            if entry is None:
+                break
+            if entry.fingerprint != fingerprint:
+                await _send_json(send, 422, {"detail": "Idempotency-Key was already used with a different request"})
+                return
+            if entry.response is not None:
+                await _replay(send, entry.response)
+                return
+            # Running in another worker (or event loop)
+            if time.monotonic() >= deadline:
+                await _send_json(send, 409, {"detail": "A request with this Idempotency-Key is still in progress"})
+                return
+            await asyncio.sleep(self.poll_interval)
+
+        done = asyncio.get_running_loop().create_future()
+        self._inflight[key] = done
+        status, headers, chunks = 500, [], []
+
+        async def capture(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [(name, value) for name, value in message.get("headers", []) if name in REPLAYED_HEADERS]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            try:
+                if status < 500:
+                    await self._store(self.store.complete, key, fingerprint, StoredResponse(status, headers, b"".join(chunks)))
+                else:
+                    await self._store(self.store.release, key)
+            finally:
+                del self._inflight[key]
+                done.set_result(None)
+
+
+async def _buffer_body(receive):
+    """Read the whole request body; returns it and a receive that replays it"""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            return b"", receive
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    body = b"".join(chunks)
+    replayed = False
+
+    async def replay_receive():
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return body, replay_receive
+
+
+async def _replay(send, response: StoredResponse) -> None:
+    headers = list(response.headers) + [
+        (b"content-length", str(len(response.body)).encode()),
+        (b"idempotent-replayed", b"true"),
+    ]
+    await send({"type": "http.response.start", "status": response.status, "headers": headers})
+    await send({"type": "http.response.body", "body": response.body})
+
+
+async def _send_json(send, status: int, payload: dict) -> None:
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -1,30 +1,108 @@
 """
 Database initialization script
+
+The schema is managed by Alembic migrations in ``migrations/versions``.
+Applying them is an explicit step rather than a side effect of importing or
+starting the API:
+
+    python -m app.init_db
+
+The API only runs it on startup when ``AUTO_MIGRATE`` is set. Databases
+created by the old ``Base.metadata.create_all`` are recognised and stamped
+at the initial revision before the later migrations run.
+
+New migrations go next to the existing ones, e.g.
+``alembic revision --autogenerate -m "..."`` from the backend directory.
 """
-from .database import engine, Base
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from .database import Base, all_engines, get_engine
 from .models import Student, Course, Enrollment
 
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Revision whose schema matches what create_all used to build
+BASELINE_REVISION = "0001"
+
+
+def alembic_config() -> Config:
+    """Alembic configuration for the backend's migrations"""
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    return config
+
+
+def current_revision(engine: Engine = None):
+    """Revision the database is at, or None before the first migration"""
+    with (engine or get_engine()).connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def head_revision() -> str:
+    """Newest revision in migrations/versions"""
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def migrate(engine: Engine = None, revision: str = "head"):
+    """
+    Bring the database schema up to date
+    """
+    engine = engine or get_engine()
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        tables = set(inspect(connection).get_table_names())
+        if "alembic_version" not in tables and Student.__tablename__ in tables:
+            # Created by create_all before migrations existed
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, revision)
+
+
+def migrate_all(revision: str = "head"):
+    """
+    Migrate the database and, with SHARD_URLS, every shard
+    """
+    for engine in all_engines():
+        migrate(engine, revision)
+
+
+def journal_mode(engine: Engine = None) -> str:
+    """
+    The database's journal mode ("wal" once SQLITE_WAL has taken effect)
+    """
+    engine = engine or get_engine()
+    if engine.dialect.name != "sqlite":
+        return ""
+    with engine.connect() as connection:
+        return connection.execute(text("PRAGMA journal_mode")).scalar()
+
 
 def init_db():
     """
-    Initialize database by creating all tables
+    Initialize database by applying all migrations
     """
-    # Import all models to ensure they are registered with Base
-    # This is important for Base.metadata.create_all to work
-    
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created successfully!")
+    migrate_all()
+    print(f"Database schema is at revision {current_revision()}")
 
 
-def drop_db():
+def drop_db(engine: Engine = None):
     """
     Drop all database tables (use with caution!)
     """
+    engine = engine or get_engine()
     Base.metadata.drop_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
     print("Database tables dropped!")
 
 
 if __name__ == "__main__":
     # If run directly, initialize the database
-    init_db()
\ No newline at end of file
+    init_db()
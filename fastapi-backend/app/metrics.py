@@ -0,0 +1,158 @@
+"""
+Prometheus metrics for the backend
+
+``MetricsMiddleware`` records a request-duration histogram and an error
+counter per route template, plus a gauge of requests in flight.
+``instrument_pool`` adds connection pool checkout counts and the number of
+connections currently checked out, and ``timed_checkout`` records how long a
+request waited for its connection.
+
+With several worker processes, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty
+directory shared by the workers before they start; every worker then writes
+its samples to memory-mapped files there and ``render_metrics`` aggregates
+all of them, whichever worker serves the scrape.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+__all__ = ["CONTENT_TYPE_LATEST", "MetricsMiddleware", "instrument_pool", "render_metrics", "timed_checkout"]
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling HTTP requests",
+    ["method", "route"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+REQUEST_ERRORS = Counter(
+    "http_request_errors_total",
+    "HTTP requests answered with a 4xx or 5xx status",
+    ["method", "route", "status"],
+)
+DB_POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total",
+    "Connections checked out of the pool",
+)
+DB_POOL_CONNECTIONS = Counter(
+    "db_pool_connections_created_total",
+    "New DBAPI connections opened by the pool",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time a request waited to check a connection out of the pool",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+)
+REGISTRATION_BATCH_SIZE = Histogram(
+    "registration_batch_size",
+    "Enrollment requests written per transaction in registration mode",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+ADMISSION_QUEUED = Gauge(
+    "admission_queued_requests",
+    "Requests waiting for admission",
+    multiprocess_mode="livesum",
+)
+ADMISSION_WAIT = Histogram(
+    "admission_wait_seconds",
+    "Time queued requests waited for admission",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Requests shed by admission control or rate limiting",
+    ["route", "reason"],
+)
+SINGLE_FLIGHT_REQUESTS = Counter(
+    "single_flight_requests_total",
+    "Coalesced GET requests by role: leaders ran, followers shared a leader's response",
+    ["route", "role"],
+)
+
+# Paths that are not recorded, so scrapes do not skew the request metrics
+EXCLUDED_PATHS = {"/metrics"}
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, errors and in-flight requests
+
+    Routes are labelled with their path template (``/students/{student_id}``)
+    so label cardinality stays bounded; requests that match no route are
+    grouped under ``unmatched``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_DURATION.labels(scope["method"], route).observe(elapsed)
+            if status_code >= 400:
+                REQUEST_ERRORS.labels(scope["method"], route, str(status_code)).inc()
+
+
+def instrument_pool(engine: Engine) -> None:
+    """Count checkouts and track checked-out connections of ``engine``'s pool"""
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        DB_POOL_CONNECTIONS.inc()
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.inc()
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+
+def timed_checkout(db: Session) -> None:
+    """Check out the session's connection now and record the wait"""
+    start = time.perf_counter()
+    db.connection()
+    DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+
+def render_metrics() -> bytes:
+    """Metrics in the Prometheus text format, aggregated across workers"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
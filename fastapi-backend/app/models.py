@@ -1,12 +1,57 @@
 """
 SQLAlchemy models for the student enrollment system
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, Text
+import enum
+
+from sqlalchemy import (
+    CheckConstraint, Column, Integer, SmallInteger, String, DateTime, ForeignKey, UniqueConstraint, Text, Index
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from sqlalchemy.types import TypeDecorator
 from .database import Base
 
 
+class EnrollmentStatus(str, enum.Enum):
+    """Enrollment status as used by the API; stored as a small integer code"""
+    ACTIVE = "active"
+    DROPPED = "dropped"
+    COMPLETED = "completed"
+
+    def __str__(self):
+        return self.value
+
+
+# Storage codes; never renumber, the database holds these values
+ENROLLMENT_STATUS_CODES = {
+    EnrollmentStatus.ACTIVE: 1,
+    EnrollmentStatus.DROPPED: 2,
+    EnrollmentStatus.COMPLETED: 3,
+}
+_ENROLLMENT_STATUSES = {code: status for status, code in ENROLLMENT_STATUS_CODES.items()}
+
+
+class EnrollmentStatusType(TypeDecorator):
+    """``EnrollmentStatus`` (or its string value) stored as a SMALLINT code
+
+    Comparisons such as ``Enrollment.status == "active"`` keep working: the
+    string is converted to its code when the statement is executed.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return ENROLLMENT_STATUS_CODES[EnrollmentStatus(value)]
+
+    def process_literal_param(self, value, dialect):
+        return str(self.process_bind_param(value, dialect))
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else _ENROLLMENT_STATUSES[value]
+
+
 class Student(Base):
     """Student model"""
     __tablename__ = "students"
@@ -38,7 +83,7 @@ class Course(Base):
     @property
     def enrolled_count(self):
         """Get the number of enrolled students"""
-        return len([e for e in self.enrollments if e.status == "active"])
+        return len([e for e in self.enrollments if e.status == EnrollmentStatus.ACTIVE])
     
     @property
     def available_seats(self):
@@ -54,13 +99,33 @@ class Enrollment(Base):
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
     course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
     enrollment_date = Column(DateTime(timezone=True), server_default=func.now())
-    status = Column(String(20), nullable=False, default="active")  # active, dropped, completed
+    status = Column(EnrollmentStatusType, nullable=False, default=EnrollmentStatus.ACTIVE)
     
     # Relationships
     student = relationship("Student", back_populates="enrollments")
     course = relationship("Course", back_populates="enrollments")
     
-    # Ensure a student can only be enrolled once in a course
+    # Ensure a student can only be enrolled once in a course; the indexes
+    # serve the enrollment lists, seat counts and /stats (migration 0002)
     __table_args__ = (
         UniqueConstraint('student_id', 'course_id', name='_student_course_uc'),
-    )
\ No newline at end of file
+        CheckConstraint(
+            f"status IN ({', '.join(str(code) for code in ENROLLMENT_STATUS_CODES.values())})",
+            name='ck_enrollments_status'
+        ),
+        Index('ix_enrollments_course_status', 'course_id', 'status'),
+        Index('ix_enrollments_student_status', 'student_id', 'status'),
+        Index('ix_enrollments_status_course', 'status', 'course_id'),
+    )
+
+class Change(Base):
+    """Change log entry: one insert, update or delete of a student, course or enrollment"""
+    __tablename__ = "changes"
+    
+    # AUTOINCREMENT: versions are never reused, even after rows are deleted
+    version = Column(Integer, primary_key=True)
+    entity = Column(String(20), nullable=False)  # table name of the changed row
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(6), nullable=False)  # insert, update or delete
+    
+    __table_args__ = {"sqlite_autoincrement": True}
@@ -0,0 +1,159 @@
+"""
+On-demand request profiling
+
+When ``PROFILING_ENABLED`` is set, a request is profiled if it carries the
+configured token, either as an ``X-Profile-Token`` header or a ``profile``
+query parameter, and additionally every ``PROFILING_SAMPLE_EVERY``-th
+request when that is non-zero.
+
+A profiled request is watched by a sampling profiler: a background thread
+records the stacks of the threads working on the request (the event loop
+and the threadpool thread running the endpoint) every
+``PROFILING_INTERVAL`` seconds. The report is written to ``PROFILING_DIR``
+in folded-stack format (one ``frame;frame;frame count`` line per distinct
+stack), which flamegraph.pl and speedscope read directly. The file name is
+returned in the ``X-Profile-Report`` header; only the newest
+``PROFILING_KEEP`` reports are kept.
+
+``StackSampler``, ``_fold`` and ``write_report`` have a twin in
+flask-frontend/profiling.py. The two apps are installed and deployed
+separately and share no package, so a fix to one belongs in both.
+"""
+import hmac
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+from urllib.parse import parse_qs
+
+from starlette.datastructures import MutableHeaders
+
+
+class StackSampler:
+    """Sample the stacks of selected threads into folded-stack counts"""
+
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        self.threads = set()
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def add_thread(self, ident: int) -> None:
+        self.threads.add(ident)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in tuple(self.threads):
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.counts[_fold(frame)] += 1
+
+    def folded(self) -> str:
+        """Report in folded-stack format, heaviest stacks first"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+def _fold(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        name = getattr(code, "co_qualname", code.co_name)
+        names.append(f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def write_report(directory: str, name: str, report: str, keep: int) -> str:
+    """Store a report and delete the oldest ones beyond ``keep``"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write(report)
+
+    reports = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".folded")),
+        key=lambda entry: entry.stat().st_mtime_ns,
+    )
+    for entry in reports[:max(len(reports) - keep, 0)]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+    return path
+
+
+_current_sampler: ContextVar[Optional[StackSampler]] = ContextVar("stack_sampler", default=None)
+
+
+def register_profiled_thread() -> None:
+    """Include the calling thread in the current request's profile, if any"""
+    sampler = _current_sampler.get()
+    if sampler is not None:
+        sampler.add_thread(threading.get_ident())
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests on demand or 1-in-N"""
+
+    def __init__(self, app, token: str = "", sample_every: int = 0, directory: str = "./profiles",
+                 keep: int = 200, interval: float = 0.002):
+        self.app = app
+        self.token = token
+        self.sample_every = sample_every
+        self.directory = directory
+        self.keep = keep
+        self.interval = interval
+        self._requests = itertools.count(1)
+        self._reports = itertools.count(1)
+
+    def _requested(self, scope) -> bool:
+        if not self.token:
+            return False
+        # compare_digest only takes ASCII str, so any header or query value
+        # is compared as bytes
+        supplied = dict(scope["headers"]).get(b"x-profile-token", b"")
+        if not supplied and b"profile=" in scope.get("query_string", b""):
+            supplied = parse_qs(scope["query_string"].decode("latin-1")).get("profile", [""])[0].encode("utf-8")
+        return bool(supplied) and hmac.compare_digest(supplied, self.token.encode("utf-8"))
+
+    def _sampled(self) -> bool:
+        return bool(self.sample_every) and next(self._requests) % self.sample_every == 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (self._requested(scope) or self._sampled()):
+            await self.app(scope, receive, send)
+            return
+
+        path = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        name = (f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self._reports)}"
+                f"-{scope['method']}-{path}.folded")
+
+        async def send_with_report(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Profile-Report"] = name
+            await send(message)
+
+        sampler = StackSampler(self.interval)
+        sampler.add_thread(threading.get_ident())
+        token = _current_sampler.set(sampler)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_report)
+        finally:
+            sampler.stop()
+            _current_sampler.reset(token)
+            write_report(self.directory, name, sampler.folded(), self.keep)
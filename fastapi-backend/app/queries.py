@@ -0,0 +1,302 @@
+"""
+Purpose-built SQL queries for hot read paths
+
+The ORM relationships on the models are convenient but expensive on list
+pages: ``Course.enrolled_count`` loads every enrollment of a course, and
+nested schemas trigger one lazy load per row. The functions here compute the
+same data with a fixed number of statements and return plain dicts that
+validate directly against the response schemas.
+
+With sharding (see app/sharding.py) courses and enrollments live in
+different files and cannot be joined in SQL. The same functions then read
+the student's enrollments from its shard, the courses from the catalog and
+the seat counts from every shard, and join them in Python.
+"""
+import base64
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .sharding import StudentShardedSession
+
+
+def active_counts_subquery():
+    """Subquery of (course_id, enrolled_count) for active enrollments"""
+    return (
+        select(
+            models.Enrollment.course_id,
+            func.count().label("enrolled_count"),
+        )
+        .where(models.Enrollment.status == models.EnrollmentStatus.ACTIVE)
+        .group_by(models.Enrollment.course_id)
+        .subquery()
+    )
+
+
+def active_counts(db: Session, course_ids: Optional[Iterable[int]] = None) -> Dict[int, int]:
+    """Active enrollments per course, summed over the shards when sharded"""
+    query = (
+        select(models.Enrollment.course_id, func.count())
+        .where(models.Enrollment.status == models.EnrollmentStatus.ACTIVE)
+        .group_by(models.Enrollment.course_id)
+    )
+    if course_ids is not None:
+        query = query.where(models.Enrollment.course_id.in_(course_ids))
+    counts: Dict[int, int] = {}
+    for course_id, enrolled_count in db.execute(query):
+        counts[course_id] = counts.get(course_id, 0) + enrolled_count
+    return counts
+
+
+def course_to_dict(course: models.Course, enrolled_count: Optional[int]) -> Dict:
+    """Serialize a course with a precomputed enrolled count"""
+    enrolled_count = enrolled_count or 0
+    return {
+        "id": course.id,
+        "course_code": course.course_code,
+        "name": course.name,
+        "description": course.description,
+        "credits": course.credits,
+        "max_students": course.max_students,
+        "enrolled_count": enrolled_count,
+        "available_seats": course.max_students - enrolled_count,
+    }
+
+
+def student_enrollments_with_courses(
+    db: Session,
+    student_id: int,
+    status: Optional[models.EnrollmentStatus] = None
+) -> List[Dict]:
+    """Enrollments of a student joined with their courses and seat counts"""
+    if isinstance(db, StudentShardedSession):
+        return _sharded_student_enrollments(db, student_id, status)
+    counts = active_counts_subquery()
+    query = (
+        select(models.Enrollment, models.Course, counts.c.enrolled_count)
+        .join(models.Course, models.Course.id == models.Enrollment.course_id)
+        .outerjoin(counts, counts.c.course_id == models.Course.id)
+        .where(models.Enrollment.student_id == student_id)
+        .order_by(models.Enrollment.id)
+    )
+    if status:
+        query = query.where(models.Enrollment.status == status)
+
+    return [
+        enrollment_to_dict(enrollment, course, enrolled_count)
+        for enrollment, course, enrolled_count in db.execute(query)
+    ]
+
+
+def _sharded_student_enrollments(
+    db: Session,
+    student_id: int,
+    status: Optional[models.EnrollmentStatus]
+) -> List[Dict]:
+    query = (
+        select(models.Enrollment)
+        .where(models.Enrollment.student_id == student_id)
+        .order_by(models.Enrollment.id)
+    )
+    if status:
+        query = query.where(models.Enrollment.status == status)
+    enrollments = db.scalars(query).all()
+
+    course_ids = {enrollment.course_id for enrollment in enrollments}
+    courses = {
+        course.id: course
+        for course in db.scalars(select(models.Course).where(models.Course.id.in_(course_ids)))
+    }
+    counts = active_counts(db, course_ids)
+    return [
+        enrollment_to_dict(enrollment, courses[enrollment.course_id], counts.get(enrollment.course_id))
+        for enrollment in enrollments
+    ]
+
+
+def enrollment_to_dict(enrollment: models.Enrollment, course: models.Course, enrolled_count: Optional[int]) -> Dict:
+    """Serialize an enrollment with its course"""
+    return {
+        "id": enrollment.id,
+        "student_id": enrollment.student_id,
+        "course_id": enrollment.course_id,
+        "enrollment_date": enrollment.enrollment_date,
+        "status": enrollment.status,
+        "course": course_to_dict(course, enrolled_count),
+    }
+
+
+def eligible_courses_query(student_id: int):
+    """Courses a student is not actively enrolled in that still have seats
+
+    Returns a select of ``(Course, enrolled_count)``. The student's own active
+    enrollments are excluded with a NOT EXISTS anti-join and seat counts come
+    from one grouped subquery, so the whole check is a single statement.
+    """
+    counts = active_counts_subquery()
+    enrolled_count = func.coalesce(counts.c.enrolled_count, 0)
+    already_enrolled = (
+        select(models.Enrollment.id)
+        .where(
+            models.Enrollment.course_id == models.Course.id,
+            models.Enrollment.student_id == student_id,
+            models.Enrollment.status == models.EnrollmentStatus.ACTIVE,
+        )
+        .exists()
+    )
+    return (
+        select(models.Course, enrolled_count.label("enrolled_count"))
+        .outerjoin(counts, counts.c.course_id == models.Course.id)
+        .where(~already_enrolled)
+        .where(enrolled_count < models.Course.max_students)
+    )
+
+
+def encode_cursor(sort_value, row_id: int) -> str:
+    """Opaque keyset cursor for the last row of a page"""
+    return base64.urlsafe_b64encode(json.dumps([sort_value, row_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str, value_type: type = None) -> Tuple:
+    """Inverse of ``encode_cursor``; raises ValueError on malformed input
+
+    With ``value_type`` the sort value must be of that type, so a crafted
+    cursor cannot bind a list or an object where a column value belongs.
+    """
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not _is_a(row_id, int) or (value_type is not None and not _is_a(sort_value, value_type)):
+        raise ValueError("Invalid cursor")
+    return sort_value, row_id
+
+
+def _is_a(value, value_type: type) -> bool:
+    # JSON true/false decode to bool, which is an int subclass
+    return isinstance(value, value_type) and not isinstance(value, bool)
+
+
+# Sort keys accepted by eligible_courses_page, with the type of their values
+ELIGIBLE_SORT_KEYS = ("course_code", "name", "credits", "available_seats")
+ELIGIBLE_SORT_TYPES = {"course_code": str, "name": str, "credits": int, "available_seats": int}
+
+
+def eligible_courses_page(
+    db: Session,
+    student_id: int,
+    limit: int,
+    search: Optional[str] = None,
+    sort: str = "course_code",
+    descending: bool = False,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """One keyset-paginated page of eligible courses
+
+    Rows are ordered by ``sort`` with the course id as a tie-breaker, and
+    ``cursor`` resumes after the last row of the previous page, so deep pages
+    cost the same as the first one. Returns ``(items, next_cursor)``;
+    ``next_cursor`` is None on the last page.
+    """
+    if isinstance(db, StudentShardedSession):
+        return _sharded_eligible_courses_page(db, student_id, limit, search, sort, descending, cursor)
+    query = eligible_courses_query(student_id)
+    enrolled_count = query.selected_columns.enrolled_count
+
+    sort_columns = {
+        # ELIGIBLE_SORT_KEYS mapped to their SQL expressions
+        "course_code": models.Course.course_code,
+        "name": models.Course.name,
+        "credits": models.Course.credits,
+        "available_seats": models.Course.max_students - enrolled_count,
+    }
+    sort_column = sort_columns[sort]
+
+    if search:
+        query = query.where(course_search(search))
+
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, ELIGIBLE_SORT_TYPES[sort])
+        if descending:
+            after = or_(sort_column < last_value,
+                        and_(sort_column == last_value, models.Course.id < last_id))
+        else:
+            after = or_(sort_column > last_value,
+                        and_(sort_column == last_value, models.Course.id > last_id))
+        query = query.where(after)
+
+    if descending:
+        query = query.order_by(sort_column.desc(), models.Course.id.desc())
+    else:
+        query = query.order_by(sort_column, models.Course.id)
+
+    # Fetch one extra row to learn whether another page exists
+    rows = db.execute(query.limit(limit + 1)).all()
+    items = [course_to_dict(course, count) for course, count in rows[:limit]]
+
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(last[sort], last["id"])
+    return items, next_cursor
+
+
+def _sharded_eligible_courses_page(
+    db: Session,
+    student_id: int,
+    limit: int,
+    search: Optional[str],
+    sort: str,
+    descending: bool,
+    cursor: Optional[str]
+) -> Tuple[List[Dict], Optional[str]]:
+    """``eligible_courses_page`` over the catalog, filtered and sorted in memory
+
+    Seat counts come from every shard, so the catalog cannot be ordered by
+    available seats in SQL; it is small enough to page in Python.
+    """
+    counts = active_counts(db)
+    enrolled = set(db.scalars(
+        select(models.Enrollment.course_id).where(
+            models.Enrollment.student_id == student_id,
+            models.Enrollment.status == models.EnrollmentStatus.ACTIVE,
+        )
+    ))
+    query = select(models.Course)
+    if search:
+        query = query.where(course_search(search))
+    courses = [
+        course_to_dict(course, counts.get(course.id))
+        for course in db.scalars(query)
+        if course.id not in enrolled
+    ]
+
+    def key(course):
+        return course[sort], course["id"]
+
+    rows = sorted((course for course in courses if course["available_seats"] > 0), key=key, reverse=descending)
+    if cursor:
+        last = tuple(decode_cursor(cursor, ELIGIBLE_SORT_TYPES[sort]))
+        try:
+            rows = [row for row in rows if (key(row) < last if descending else key(row) > last)]
+        except TypeError as e:
+            raise ValueError("Invalid cursor") from e
+
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and items:
+        next_cursor = encode_cursor(items[-1][sort], items[-1]["id"])
+    return items, next_cursor
+
+
+def course_search(search: str):
+    """Condition matching courses by name, code or description"""
+    search_term = f"%{search}%"
+    return (
+        (models.Course.name.ilike(search_term)) |
+        (models.Course.course_code.ilike(search_term)) |
+        (models.Course.description.ilike(search_term))
+    )
@@ -0,0 +1,153 @@
+"""
+Per-request SQL statement counting and N+1 detection
+
+``install_query_stats`` hooks the engine's cursor events so that every
+statement is attributed to the request that issued it, and
+``QueryStatsMiddleware`` opens a fresh tally per request. At the end of a
+request the middleware can expose the statement count and DB time as
+response headers (debug mode) and logs any statement that was repeated often
+enough to suggest an N+1 pattern, e.g. a lazy relationship load per row.
+
+For tests, ``count_queries`` and ``assert_max_queries`` count statements
+issued while a block runs, regardless of which thread issued them.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Statements issued and time spent in the database for one request"""
+
+    __slots__ = ("count", "db_time", "statements", "scope")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.count = 0
+        self.db_time = 0.0
+        self.statements: Counter = Counter()
+        self.scope = scope
+
+    @property
+    def endpoint(self) -> Optional[str]:
+        """``METHOD /route/{template}`` of the request, once it is routed"""
+        if self.scope is None:
+            return None
+        route = self.scope.get("route")
+        return f"{self.scope.get('method')} {getattr(route, 'path', self.scope.get('path'))}"
+
+    def repeated(self, threshold: int):
+        """Statements executed at least ``threshold`` times"""
+        return [(sql, n) for sql, n in self.statements.items() if n >= threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Counters opened by count_queries(); they see statements from every thread
+_global_counters = []
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the request being handled, if any"""
+    return _current_stats.get()
+
+
+def install_query_stats(engine: Engine) -> None:
+    """Register the cursor event listeners on ``engine``"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.db_time += elapsed
+            stats.statements[statement] += 1
+        for counter in _global_counters:
+            counter.count += 1
+            counter.db_time += elapsed
+            counter.statements[statement] += 1
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware that tallies SQL statements per request
+
+    With ``expose_headers`` the response carries ``X-DB-Query-Count`` and
+    ``X-DB-Time-Ms``. Statements repeated ``n_plus_one_threshold`` or more
+    times within one request are logged as suspected N+1 queries.
+    """
+
+    def __init__(self, app, expose_headers: bool = False, n_plus_one_threshold: int = 5):
+        self.app = app
+        self.expose_headers = expose_headers
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+        token = _current_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start" and self.expose_headers:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-Ms"] = f"{stats.db_time * 1000:.2f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            if self.n_plus_one_threshold:
+                self._report_repeats(scope, stats)
+
+    def _report_repeats(self, scope, stats: QueryStats) -> None:
+        for statement, times in stats.repeated(self.n_plus_one_threshold):
+            logger.warning(
+                f"Suspected N+1: {stats.endpoint} ran the same statement "
+                f"{times} times: {' '.join(statement.split())[:200]}"
+            )
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """Count statements issued by any thread while the block runs"""
+    stats = QueryStats()
+    _global_counters.append(stats)
+    try:
+        yield stats
+    finally:
+        _global_counters.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """Fail if the block issues more than ``limit`` statements
+
+    Usage in tests::
+
+        with assert_max_queries(3):
+            client.get("/students/1/enrollment-page")
+    """
+    with count_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        details = "\n".join(
+            f"  {n}x {' '.join(sql.split())[:120]}" for sql, n in stats.statements.most_common()
+        )
+        raise AssertionError(f"Expected at most {limit} queries, got {stats.count}:\n{details}")
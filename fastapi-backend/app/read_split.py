@@ -0,0 +1,90 @@
+"""
+Read/write split
+
+Long reads (searches, large pages, ``/stats``) used to hold connections of
+the same pool that writes such as enrollments wait for. GET handlers take
+their session from ``get_read_db`` instead: a separate, larger pool of
+read-only connections, opened with ``mode=ro`` and ``PRAGMA query_only`` so
+nothing can write through them (see ``database.init_read_engine``).
+
+* Without ``READ_REPLICA_URL`` the read pool opens the primary database. A
+  read transaction sees everything committed before it started, so clients
+  always read their own writes. With several workers this needs WAL.
+* With ``READ_REPLICA_URL`` reads go to a replica file that another process
+  keeps up to date (``sqlite3 primary.db ".backup replica.db"``, a
+  replication tool, ...) and that may lag. ``ReadYourWritesMiddleware`` then
+  sets a ``last_write`` cookie on successful writes, and for
+  ``read_your_writes_seconds`` after that, the client reads the primary.
+  The Flask frontend stores the cookie per user and forwards it, so one
+  user's write does not move every user's reads to the primary.
+* With sharding, for in-memory databases, and until the lifespan handler
+  has created the read engine, ``get_read_db`` falls back to ``get_db``.
+"""
+import math
+import time
+
+from fastapi import Request
+
+from . import database
+from .database import get_db
+
+__all__ = ["LAST_WRITE_COOKIE", "ReadYourWritesMiddleware", "get_read_db"]
+
+LAST_WRITE_COOKIE = "last_write"
+
+# Methods that never write
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def wrote_recently(request: Request, window: float) -> bool:
+    """Whether the client's last_write cookie is less than ``window`` seconds old"""
+    try:
+        last_write = float(request.cookies.get(LAST_WRITE_COOKIE, 0))
+    except ValueError:
+        return False
+    return time.time() - last_write < window
+
+
+def get_read_db(request: Request):
+    """
+    Dependency for read-only endpoints: a session on the read engine, or on
+    the primary when there is none or the client has just written
+    """
+    from .metrics import timed_checkout
+
+    settings = request.app.state.settings
+    if database.read_engine is None or (
+        settings.read_replica_url and wrote_recently(request, settings.read_your_writes_seconds)
+    ):
+        yield from get_db()
+        return
+    db = database.ReadSessionLocal()
+    try:
+        timed_checkout(db)
+        yield db
+    finally:
+        db.close()
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware marking clients that just wrote with a last_write cookie"""
+
+    def __init__(self, app, window: float):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def mark(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = (
+                    f"{LAST_WRITE_COOKIE}={time.time():.3f}; Max-Age={math.ceil(self.window)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message = dict(message, headers=[*message.get("headers", []), (b"set-cookie", cookie.encode())])
+            await send(message)
+
+        await self.app(scope, receive, mark)
@@ -5,6 +5,8 @@ from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from datetime import datetime
 from typing import Optional, List
 
+from .models import EnrollmentStatus
+
 
 # Student Schemas
 class StudentBase(BaseModel):
@@ -91,7 +93,7 @@ class EnrollmentRead(EnrollmentBase):
     """Schema for reading enrollment data"""
     id: int
     enrollment_date: datetime
-    status: str = Field(..., description="Enrollment status (active, dropped, completed)")
+    status: EnrollmentStatus = Field(..., description="Enrollment status")
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -108,7 +110,36 @@ class EnrollmentWithCourse(EnrollmentRead):
 
 class EnrollmentUpdate(BaseModel):
     """Schema for updating enrollment status"""
-    status: str = Field(..., pattern="^(active|dropped|completed)$", description="New enrollment status")
+    status: EnrollmentStatus = Field(..., description="New enrollment status")
+
+
+# Composite Schemas
+class StudentEnrollmentPage(BaseModel):
+    """Everything the student enrollment page needs in one response"""
+    student: StudentRead
+    enrollments: List[EnrollmentWithCourse] = []
+    eligible_courses: List[CourseRead] = Field(
+        default=[], description="Courses the student can still enroll in"
+    )
+    eligible_next_cursor: Optional[str] = Field(
+        None, description="Cursor for /students/{id}/eligible-courses when the list was truncated"
+    )
+
+
+# Change Feed Schemas
+class ChangeRead(BaseModel):
+    """One insert, update or delete in the change feed"""
+    version: int
+    entity: str = Field(..., description="students, courses or enrollments")
+    id: int = Field(..., description="ID of the changed row")
+    op: str = Field(..., description="insert, update or delete")
+
+
+class ChangePage(BaseModel):
+    """Change feed entries after a version"""
+    items: List[ChangeRead]
+    next_since: int = Field(..., description="Pass as ?since= to fetch the next entries")
+    latest_version: int = Field(..., description="Newest version in the log")
 
 
 # Response Schemas
@@ -139,6 +170,13 @@ class PaginatedResponse(BaseModel, Generic[T]):
     model_config = ConfigDict(from_attributes=True)
 
 
+class KeysetPage(BaseModel, Generic[T]):
+    """Generic keyset (cursor) pagination response"""
+    items: List[T]
+    next_cursor: Optional[str] = Field(None, description="Pass as ?cursor= to fetch the next page")
+    per_page: int
+
+
 # Update forward references
 StudentWithEnrollments.model_rebuild()
 CourseWithStudents.model_rebuild()
\ No newline at end of file
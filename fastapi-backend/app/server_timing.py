@@ -0,0 +1,130 @@
+"""
+Server-Timing response header
+
+Every response carries ``Server-Timing: db;dur=.., serialize;dur=..,
+total;dur=..`` (milliseconds) so callers such as the Flask frontend can tell
+where backend time went:
+
+* ``db``: time spent executing SQL, from ``app.query_stats``
+* ``serialize``: from the endpoint returning until the response starts,
+  i.e. response-model validation and JSON rendering, minus any SQL run on
+  the way (lazy relationship loads)
+* ``total``: time in the application
+
+``TimedRoute`` marks the moment the endpoint function returns; use it as
+the router's ``route_class``.
+"""
+import inspect
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+
+from .profiling import register_profiled_thread
+from .query_stats import current_query_stats
+from .tracing import end_handler_span, start_handler_span
+
+
+class RequestTiming:
+    """Timestamps of one request's phases"""
+
+    __slots__ = ("start", "handler_end", "db_at_handler_end")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.handler_end: Optional[float] = None
+        self.db_at_handler_end = 0.0
+
+
+_current_timing: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def _db_time() -> float:
+    stats = current_query_stats()
+    return stats.db_time if stats is not None else 0.0
+
+
+def _mark_handler_end() -> None:
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.handler_end = time.perf_counter()
+        timing.db_at_handler_end = _db_time()
+
+
+def _timed_endpoint(endpoint):
+    """Wrap an endpoint so that its return is recorded for the current request"""
+    if inspect.iscoroutinefunction(endpoint):
+        @wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            span = start_handler_span(endpoint.__name__)
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark_handler_end()
+                end_handler_span(span)
+
+        return async_wrapper
+
+    @wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        # Sync endpoints run on a threadpool thread; profile it too
+        register_profiled_thread()
+        span = start_handler_span(endpoint.__name__)
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            _mark_handler_end()
+            end_handler_span(span)
+
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """API route that records when its endpoint function returns
+
+    Sync endpoints also add their threadpool thread to the request's profile
+    when ``app.profiling`` is watching the request, and traced requests get
+    a ``handler`` span (see ``app.tracing``).
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware that adds the Server-Timing header
+
+    Must run inside ``QueryStatsMiddleware`` so the request's SQL time is
+    available.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                db = _db_time()
+                entries = [f"db;dur={db * 1000:.2f}"]
+                if timing.handler_end is not None:
+                    serialize = (now - timing.handler_end) - (db - timing.db_at_handler_end)
+                    entries.append(f"serialize;dur={max(serialize, 0.0) * 1000:.2f}")
+                entries.append(f"total;dur={(now - timing.start) * 1000:.2f}")
+                MutableHeaders(scope=message).append("Server-Timing", ", ".join(entries))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timing.reset(token)
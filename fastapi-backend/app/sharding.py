@@ -0,0 +1,164 @@
+"""
+Horizontal sharding of students and enrollments across SQLite files
+
+A SQLite file takes one writer at a time. With ``SHARD_URLS`` set, students
+and their enrollments are spread across those databases, and only the course
+catalog stays in ``DATABASE_URL``:
+
+* A row's shard follows from its id: ``(id - 1) % N`` for N shards. A new
+  student goes to the shard picked by a hash of its student number and gets
+  the next id of that shard's series (1, N + 1, 2N + 1, ... on shard 0), so
+  ids stay unique across shards and a lookup by id reads one file. The id is
+  computed inside the INSERT, under the shard's write lock.
+* Enrollments live in their student's shard and take ids from the same
+  series, so ``/enrollments/{id}`` also reads one file.
+* ``get_db`` yields a ``StudentShardedSession``. Statements on courses go to
+  the catalog. Statements on students or enrollments go to the shard of the
+  student (or enrollment) id their WHERE clause compares with; otherwise
+  they run on every shard and the rows are concatenated.
+* ``paginate`` and ``count`` scatter-gather list endpoints: every shard
+  returns its first ``skip + limit`` rows by id, the pages are merged by id,
+  and the totals are summed.
+
+Each file only enforces its own unique constraints, so student numbers and
+emails are checked across shards by the endpoints but two concurrent
+creates on different shards can both pass. A write that spans shards, such
+as deleting a course with enrollments, commits each file in turn. Group
+commit and registration mode need a single database.
+"""
+import heapq
+import zlib
+from itertools import islice
+from operator import attrgetter
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import Query, object_session, sessionmaker
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+
+from . import models
+
+__all__ = ["CATALOG", "ShardedSessionLocal", "StudentShardedSession", "count", "paginate", "shard_of"]
+
+# Shard id of the course catalog (DATABASE_URL); student shards are 0..N-1
+CATALOG = "catalog"
+CATALOG_TABLES = {models.Course.__tablename__}
+
+# (table, column) pairs whose value, compared in a WHERE clause, picks the shard
+SHARD_KEYS = {("students", "id"), ("enrollments", "id"), ("enrollments", "student_id")}
+
+
+def shard_of(row_id: int, shards: int) -> int:
+    """Shard holding the student or enrollment with this id"""
+    return (row_id - 1) % shards
+
+
+class StudentShardedSession(ShardedSession):
+    """Session routing courses to the catalog and students and enrollments to their shards"""
+
+    def __init__(self, shards: Dict, **kwargs):
+        super().__init__(
+            shard_chooser=self._shard_for_instance,
+            identity_chooser=self._shards_for_identity,
+            execute_chooser=self._shards_for_execute,
+            shards=shards,
+            **kwargs
+        )
+        self.shard_ids = [shard for shard in shards if shard != CATALOG]
+
+    def get_bind(self, mapper=None, *, shard_id=None, **kw):
+        if mapper is None and shard_id is None:
+            # connection() without a statement, e.g. the timed pool checkout
+            shard_id = CATALOG
+        return super().get_bind(mapper, shard_id=shard_id, **kw)
+
+    def _shard_for_instance(self, mapper, instance, clause=None, **kw):
+        """Shard a new or changed object is written to"""
+        if instance is None or mapper.local_table.name in CATALOG_TABLES:
+            return CATALOG
+        if isinstance(instance, models.Enrollment):
+            return shard_of(instance.student_id, len(self.shard_ids))
+        if instance.id is not None:
+            return shard_of(instance.id, len(self.shard_ids))
+        return zlib.crc32(instance.student_id.encode()) % len(self.shard_ids)
+
+    def _shards_for_identity(self, mapper, primary_key, **kw):
+        if mapper.local_table.name in CATALOG_TABLES:
+            return [CATALOG]
+        return [shard_of(primary_key[0], len(self.shard_ids))]
+
+    def _shards_for_execute(self, orm_context):
+        return self.shards_for(orm_context.statement, orm_context.lazy_loaded_from)
+
+    def shards_for(self, statement, lazy_loaded_from=None) -> List:
+        """Shards a statement has to run on"""
+        tables = set()
+        visitors.traverse(statement, {}, {"table": lambda table: tables.add(table.name)})
+        if tables <= CATALOG_TABLES:
+            return [CATALOG]
+        for value in _shard_key_values(statement):
+            return [shard_of(value, len(self.shard_ids))]
+        # Relationships of a student or enrollment stay in its shard
+        if lazy_loaded_from is not None and lazy_loaded_from.identity_token in self.shard_ids:
+            return [lazy_loaded_from.identity_token]
+        return self.shard_ids
+
+
+def _shard_key_values(statement) -> Iterator[int]:
+    """Values compared with a shard key by the top-level WHERE conditions"""
+    where = getattr(statement, "whereclause", None)
+    if where is None:
+        return
+    if isinstance(where, BooleanClauseList) and where.operator is operators.and_:
+        conditions = where.clauses
+    else:
+        conditions = [where]
+    for condition in conditions:
+        if not (isinstance(condition, BinaryExpression) and condition.operator is operators.eq):
+            continue
+        column, value = condition.left, condition.right
+        table = getattr(column, "table", None)
+        if (
+            table is not None and (table.name, column.name) in SHARD_KEYS
+            and isinstance(value, BindParameter) and isinstance(value.effective_value, int)
+        ):
+            yield value.effective_value
+
+
+@event.listens_for(models.Student, "before_insert")
+@event.listens_for(models.Enrollment, "before_insert")
+def _next_sharded_id(mapper, connection, target):
+    """Give a new row the next id of its shard's series"""
+    session = object_session(target)
+    if not isinstance(session, StudentShardedSession) or target.id is not None:
+        return
+    shard, shards = inspect(target).identity_token, len(session.shard_ids)
+    # Evaluated by the INSERT itself, so concurrent writers cannot take the same id
+    target.id = select(
+        func.coalesce(func.max(mapper.local_table.c.id), shard + 1 - shards) + shards
+    ).scalar_subquery()
+
+
+# Bound to the catalog and shard engines by database.init_engine()
+ShardedSessionLocal = sessionmaker(class_=StudentShardedSession, autocommit=False, autoflush=False)
+
+
+def count(db, query: Query) -> int:
+    """``query.count()``, summed over the shards the query runs on"""
+    if not isinstance(db, StudentShardedSession):
+        return query.count()
+    return sum(query.set_shard(shard).count() for shard in db.shards_for(query.statement))
+
+
+def paginate(db, query: Query, skip: int, limit: int) -> Tuple[int, List]:
+    """Total and one offset page of a query; across shards the rows are merged by id"""
+    if not isinstance(db, StudentShardedSession):
+        return query.count(), query.offset(skip).limit(limit).all()
+    entity = query.column_descriptions[0]["entity"]
+    pages = [
+        query.set_shard(shard).order_by(entity.id).limit(skip + limit).all()
+        for shard in db.shards_for(query.statement)
+    ]
+    return count(db, query), list(islice(heapq.merge(*pages, key=attrgetter("id")), skip, skip + limit))
@@ -0,0 +1,118 @@
+"""
+Single-flight coalescing of identical concurrent GET requests
+
+When registration opens, hundreds of clients ask for the same course at the
+same moment, and each request would run the same queries and serialize the
+same JSON. ``SingleFlightMiddleware`` lets the first request for a given
+normalized path and query string (the leader) do the work. Identical
+requests that arrive while it runs (followers) wait for it and get the
+same status and body bytes. Nothing is kept once the leader has finished;
+this is not a cache, and a request that starts afterwards runs again.
+
+* Only the routes listed in ``routes`` (path templates such as
+  ``/courses/{course_id}``) are coalesced.
+* The query string is normalized by sorting its parameters, so
+  ``?a=1&b=2`` and ``?b=2&a=1`` share a flight. The ``Origin`` header is
+  part of the key because CORS response headers depend on it.
+* Followers get the leader's ``content-type``, ``vary`` and
+  ``access-control-*`` headers (CORSMiddleware runs inside this one) plus
+  ``X-Coalesced: true``, without its per-request headers such as
+  ``Server-Timing``.
+* A client with a fresh ``last_write`` cookie (see app/read_split.py) is
+  never coalesced: a leader that started before its write could hand it a
+  response without it.
+* If the leader fails before it finishes its response, each follower runs
+  its request itself.
+
+``single_flight_requests_total`` counts leaders and followers per route;
+the coalescing ratio is ``followers / (leaders + followers)``.
+"""
+import asyncio
+from typing import Iterable
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.requests import Request
+
+from .admission import route_path
+from .metrics import SINGLE_FLIGHT_REQUESTS
+from .read_split import wrote_recently
+
+__all__ = ["SingleFlightMiddleware", "flight_key"]
+
+# Response headers shared with followers; per-request ones are not
+SHARED_HEADERS = {b"content-type", b"vary"}
+SHARED_HEADER_PREFIX = b"access-control-"
+
+
+def flight_key(scope) -> str:
+    """Path, sorted query parameters and Origin of a request"""
+    query = urlencode(sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)))
+    origin = next((value for name, value in scope["headers"] if name == b"origin"), b"")
+    return f"{scope['path']}?{query} {origin.decode('latin-1')}"
+
+
+class SingleFlightMiddleware:
+    """ASGI middleware sharing one in-flight response between identical GETs"""
+
+    def __init__(self, app, routes: Iterable, coalesced: Iterable[str], read_your_writes_seconds: float = 0.0):
+        self.app = app
+        self.routes = routes
+        self.coalesced = set(coalesced)
+        self.read_your_writes_seconds = read_your_writes_seconds
+        # Flights in progress: key -> future of (status, headers, body) or None
+        self._flights = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        route = route_path(self.routes, scope)
+        if route not in self.coalesced or wrote_recently(Request(scope), self.read_your_writes_seconds):
+            await self.app(scope, receive, send)
+            return
+
+        key = flight_key(scope)
+        flight = self._flights.get(key)
+        if flight is not None and flight.get_loop() is asyncio.get_running_loop():
+            response = await asyncio.shield(flight)
+            if response is not None:
+                SINGLE_FLIGHT_REQUESTS.labels(route, "follower").inc()
+                await _send_shared(send, response)
+                return
+            # The leader failed; serve this request on its own
+            await self.app(scope, receive, send)
+            return
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        SINGLE_FLIGHT_REQUESTS.labels(route, "leader").inc()
+        status, headers, chunks, complete = 500, [], [], False
+
+        async def capture(message):
+            nonlocal status, headers, complete
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [
+                    (name, value) for name, value in message.get("headers", [])
+                    if name in SHARED_HEADERS or name.startswith(SHARED_HEADER_PREFIX)
+                ]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                complete = not message.get("more_body", False)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            del self._flights[key]
+            flight.set_result((status, headers, b"".join(chunks)) if complete else None)
+
+
+async def _send_shared(send, response) -> None:
+    status, headers, body = response
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": headers + [(b"content-length", str(len(body)).encode()), (b"x-coalesced", b"true")],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,163 @@
+"""
+Slow-statement log with query plans
+
+``install_slow_query_log`` times every statement on the engine. Statements
+slower than ``SLOW_QUERY_THRESHOLD_MS`` are appended as JSON lines to
+``SLOW_QUERY_LOG`` with:
+
+* the SQL and its bound parameters, redacted to their types
+* the duration and the endpoint that issued it (``GET /students/{student_id}``)
+* on SQLite, the ``EXPLAIN QUERY PLAN`` output, plus flags for full table
+  scans and temporary B-trees built for sorting or grouping
+
+``slow_query_report.py`` summarizes a log by normalized statement
+fingerprint.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .query_stats import current_query_stats
+
+logger = logging.getLogger(__name__)
+
+# Statement kinds worth explaining; plans of INSERTs say nothing useful
+_EXPLAINABLE = ("select", "update", "delete", "with")
+
+# Plan details that mean a whole table is read: "SCAN students", but not
+# "SCAN students USING COVERING INDEX ..."
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(?!CONSTANT ROW)(\w+)(?! USING (?:COVERING )?INDEX)(?:\s|$)")
+
+
+def redact(parameters) -> object:
+    """Replace bound values with their type so logs carry no user data"""
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [f"<{type(value).__name__}>" for value in parameters]
+    return f"<{type(parameters).__name__}>"
+
+
+def explain(dbapi_connection, statement: str, parameters) -> List[str]:
+    """EXPLAIN QUERY PLAN details for a statement on a SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def plan_flags(plan: List[str]) -> List[str]:
+    """Flag full table scans and temporary B-trees in a query plan"""
+    flags = []
+    for detail in plan:
+        match = _FULL_SCAN.match(detail)
+        if match:
+            flags.append(f"full_scan:{match.group(1)}")
+        elif detail.startswith("USE TEMP B-TREE"):
+            flags.append("temp_btree:" + detail[len("USE TEMP B-TREE FOR "):].lower())
+    return flags
+
+
+# One handler per log file. The primary, read and shard engines all log to
+# SLOW_QUERY_LOG; separate handlers would each rotate the file on their own.
+_handlers: Dict[str, logging.Handler] = {}
+_handlers_lock = threading.Lock()
+
+
+def _log_handler(path: str) -> logging.Handler:
+    """Size-rotated JSON-lines file, created on the first slow statement"""
+    path = os.path.abspath(path)
+    with _handlers_lock:
+        handler = _handlers.get(path)
+        if handler is None:
+            handler = RotatingFileHandler(path, maxBytes=10 * 1024 * 1024, backupCount=3, delay=True)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            _handlers[path] = handler
+        return handler
+
+
+def install_slow_query_log(engine: Engine, threshold_ms: float, path: str, explain_plans: bool = True) -> None:
+    """Log statements on ``engine`` slower than ``threshold_ms`` to ``path``"""
+    handler = _log_handler(path)
+    threshold = threshold_ms / 1000
+    explain_plans = explain_plans and engine.dialect.name == "sqlite"
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def log_slow(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["slow_query_start"].pop()
+        if elapsed < threshold:
+            return
+
+        stats = current_query_stats()
+        entry = {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "endpoint": stats.endpoint if stats is not None else None,
+            "statement": statement,
+            "parameters": f"<{len(parameters)} rows>" if executemany else redact(parameters),
+        }
+        if explain_plans and not executemany and statement.lstrip().lower().startswith(_EXPLAINABLE):
+            try:
+                entry["plan"] = explain(cursor.connection, statement, parameters)
+                entry["flags"] = plan_flags(entry["plan"])
+            except Exception as e:
+                entry["plan_error"] = str(e)
+
+        handler.handle(logging.makeLogRecord({"msg": json.dumps(entry), "levelno": logging.INFO}))
+        logger.warning(
+            f"Slow query ({entry['duration_ms']:.1f} ms) in {entry['endpoint']}: "
+            f"{' '.join(statement.split())[:120]}"
+            + (f" [{', '.join(entry['flags'])}]" if entry.get("flags") else "")
+        )
+
+
+# Summaries
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so that variants of the same query group together"""
+    normalized = _WHITESPACE.sub(" ", statement.strip()).lower()
+    normalized = _STRING.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    return _PLACEHOLDER_LIST.sub("(?+)", normalized)
+
+
+def summarize(entries) -> List[Dict]:
+    """Aggregate log entries by fingerprint"""
+    groups: Dict[str, Dict] = defaultdict(lambda: {
+        "count": 0, "total_ms": 0.0, "max_ms": 0.0, "endpoints": set(), "flags": set()
+    })
+    for entry in entries:
+        group = groups[fingerprint(entry["statement"])]
+        group["count"] += 1
+        group["total_ms"] += entry["duration_ms"]
+        group["max_ms"] = max(group["max_ms"], entry["duration_ms"])
+        if entry.get("endpoint"):
+            group["endpoints"].add(entry["endpoint"])
+        group["flags"].update(entry.get("flags", ()))
+    return [
+        dict(group, fingerprint=key, mean_ms=group["total_ms"] / group["count"],
+             endpoints=sorted(group["endpoints"]), flags=sorted(group["flags"]))
+        for key, group in groups.items()
+    ]
@@ -0,0 +1,299 @@
+"""
+W3C trace-context spans for requests, SQL statements and serialization
+
+``TracingMiddleware`` continues the trace of an incoming ``traceparent``
+header (as sent by the Flask frontend's ``APIClient``) or, with
+``tracing_sample_rate`` above 0, starts new traces for a sample of requests.
+A sampled request records:
+
+* ``GET /students/{student_id}``: the whole request (server span)
+* ``handler <endpoint>``: the endpoint function, from ``TimedRoute``
+* ``db``: one span per SQL statement, from the engine's cursor events
+* ``serialize``: from the endpoint returning until the response starts
+
+When the request ends its spans are handed to the exporter in one batch.
+``ConsoleSpanExporter`` and ``FileSpanExporter`` write one JSON object per
+span; any other exporter is plugged in with ``TRACING_EXPORTER=module:Class``
+(an object with ``export(spans)`` and ``shutdown()``).
+
+Requests that are not sampled cost one header lookup and, without a parent,
+one random draw; the SQL listeners return after a context variable read.
+
+``parse_traceparent``, ``format_traceparent``, ``Span`` and the exporters
+have a twin in flask-frontend/tracing.py (whose ``Span`` has no explicit
+timestamps). The two apps are installed and deployed separately and share
+no package, so a fix to one belongs in both.
+"""
+import abc
+import importlib
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "student-enrollment-api"
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """``(trace_id, parent_span_id, sampled)`` of a valid header, else None"""
+    if not header:
+        return None
+    match = _TRACEPARENT.match(header.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, parent_id, flags = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def format_traceparent(trace_id: str, span_id: str, sampled: bool) -> str:
+    return f"00-{trace_id}-{span_id}-{'01' if sampled else '00'}"
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits) or 1:0{bits // 4}x}"
+
+
+class Span:
+    """One timed operation of a trace"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, kind: str = "internal",
+                 start_ns: Optional[int] = None):
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, object] = {}
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = end_ns if end_ns is not None else time.time_ns()
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "service": SERVICE_NAME,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(((self.end_ns or self.start_ns) - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """The sampled spans of one request"""
+
+    __slots__ = ("root", "spans", "active", "_lock")
+
+    def __init__(self, root: Span):
+        self.root = root
+        self.spans: List[Span] = [root]
+        self.active = root  # parent for new spans
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, kind: str = "internal", start_ns: Optional[int] = None) -> Span:
+        span = Span(self.root.trace_id, self.active.span_id, name, kind, start_ns)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """The sampled trace of the request being handled, if any"""
+    return _current_trace.get()
+
+
+def start_handler_span(name: str) -> Optional[Span]:
+    """Open the endpoint span; SQL issued until it ends becomes its children"""
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    span = trace.start_span(f"handler {name}")
+    trace.active = span
+    return span
+
+
+def end_handler_span(span: Optional[Span]) -> None:
+    if span is not None:
+        span.end()
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.active = trace.root
+
+
+# ======================== EXPORTERS ========================
+
+class SpanExporter(abc.ABC):
+    """Receives the spans of each finished request"""
+
+    @abc.abstractmethod
+    def export(self, spans: Sequence[Span]) -> None:
+        """Write out the spans of one request"""
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """One JSON line per span on a stream (stderr by default)"""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def _open(self):
+        return sys.stderr
+
+    def export(self, spans: Sequence[Span]) -> None:
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        with self._lock:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(lines)
+            self.stream.flush()
+
+
+class FileSpanExporter(ConsoleSpanExporter):
+    """One JSON line per span, appended to ``path`` (opened on first export)"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def _open(self):
+        return open(self.path, "a", encoding="utf-8")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+
+
+def create_exporter(spec: str, path: str = "./traces.jsonl") -> SpanExporter:
+    """``console``, ``file`` (written to ``path``) or ``module:Class``"""
+    if spec == "console":
+        return ConsoleSpanExporter()
+    if spec == "file":
+        return FileSpanExporter(path)
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown span exporter {spec!r}; use console, file or module:Class")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+# ======================== INSTRUMENTATION ========================
+
+def install_tracing(engine: Engine) -> None:
+    """Record a span per SQL statement of sampled requests"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        trace = _current_trace.get()
+        if trace is not None:
+            span = trace.start_span("db", kind="client")
+            span.attributes["db.system"] = engine.dialect.name
+            span.attributes["db.statement"] = " ".join(statement.split())[:500]
+            conn.info.setdefault("trace_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current_trace.get() is not None and conn.info.get("trace_spans"):
+            span = conn.info["trace_spans"].pop()
+            span.end()
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                span.attributes["db.rows"] = cursor.rowcount
+
+
+class TracingMiddleware:
+    """ASGI middleware that records a trace for sampled requests
+
+    Incoming ``traceparent`` headers decide sampling when present (the
+    caller's choice is kept); otherwise ``sample_rate`` does.
+    """
+
+    def __init__(self, app, exporter: SpanExporter, sample_rate: float = 0.0):
+        self.app = app
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def _start_trace(self, scope) -> Optional[Trace]:
+        header = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                header = value.decode("latin-1")
+                break
+        parent = parse_traceparent(header)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+            if not sampled:
+                return None
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            trace_id, parent_id = _new_id(128), None
+        else:
+            return None
+        root = Span(trace_id, parent_id, f"{scope['method']} {scope['path']}", kind="server")
+        root.attributes["http.method"] = scope["method"]
+        root.attributes["http.target"] = scope["path"]
+        return Trace(root)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = self._start_trace(scope)
+        if trace is None:
+            await self.app(scope, receive, send)
+            return
+
+        token = _current_trace.set(trace)
+        root = trace.root
+
+        async def send_with_spans(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                handler = next((span for span in trace.spans if span.name.startswith("handler ")), None)
+                if handler is not None and handler.end_ns is not None:
+                    trace.active = root
+                    trace.start_span("serialize", start_ns=handler.end_ns).end()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_spans)
+        finally:
+            _current_trace.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+                root.attributes["http.route"] = route.path
+            root.end()
+            try:
+                self.exporter.export(trace.spans)
+            except Exception:
+                logger.exception("Span export failed")
@@ -0,0 +1,93 @@
+"""
+Startup warm-up for the readiness endpoint
+
+The lifespan handler runs ``warm_up`` before marking the app ready, so the
+first real requests a worker receives do not pay for opening database
+connections, compiling SQLAlchemy statements or building serializers:
+
+* ``warm_pool`` opens the pool's connections and returns them idle
+* ``warm_routes`` serves a few GET requests in-process (``warmup_paths``)
+
+``GET /ready`` answers 503 until this has finished, so a load balancer or
+orchestrator only routes traffic to warm workers.
+"""
+import logging
+import time
+from typing import Dict, Iterable
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+def warm_pool(engine: Engine) -> int:
+    """Open up to pool_size connections at once and return them to the pool"""
+    size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+    connections = []
+    try:
+        for _ in range(max(size, 1)):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+async def _get(app, path: str) -> int:
+    """Serve one GET request through the full ASGI stack; returns the status"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"warmup")],
+        "client": None,
+        "server": None,
+    }
+    status = 500
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def warm_routes(app, paths: Iterable[str]) -> Dict[str, int]:
+    """GET each path once; failures are logged, not raised"""
+    statuses = {}
+    for path in paths:
+        try:
+            statuses[path] = await _get(app, path)
+        except Exception:
+            logger.exception("Warm-up request %s failed", path)
+            statuses[path] = 500
+        if statuses[path] >= 500:
+            logger.warning("Warm-up request %s answered %d", path, statuses[path])
+    return statuses
+
+
+async def warm_up(app, engine: Engine, paths: Iterable[str]) -> None:
+    """Warm the connection pool, then the given routes"""
+    start = time.perf_counter()
+    connections = await run_in_threadpool(warm_pool, engine)
+    statuses = await warm_routes(app, paths)
+    logger.info(
+        "Warm-up finished in %.0f ms (%d connections, %d requests)",
+        (time.perf_counter() - start) * 1000, connections, len(statuses)
+    )
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+In-process latency benchmark for every backend endpoint
+
+Usage:
+    python benchmarks/bench_endpoints.py --scale 1k
+    python benchmarks/bench_endpoints.py --scale 100k --save-baseline
+    python benchmarks/bench_endpoints.py --scale 1m --max-seconds 5
+
+A synthetic dataset of the requested scale (number of enrollment rows) is
+generated into a temporary SQLite file, the FastAPI app is driven through
+TestClient, and for every case p50/p95/p99 latency and SQL statements per
+request are reported. Results are compared against benchmarks/baseline.json:
+a case regresses when it issues more statements than before, and the exit
+status is 1 if any case regressed. Statement counts are deterministic;
+timings are not. Even against a baseline saved a minute earlier, p95 varies
+by more than 25% from run to run, so timings only gate with
+--timing-tolerance, and otherwise are printed for a human to judge.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def cases(counts: Dict[str, int]) -> List[Dict]:
+    """Endpoint cases; ids point into the middle of the generated data"""
+    student_id = counts["students"] // 2 or 1
+    course_id = counts["courses"] // 2 or 1
+    return [
+        {"name": "health", "method": "GET", "path": "/health"},
+        {"name": "list_students", "method": "GET", "path": "/students"},
+        {"name": "list_students_search", "method": "GET", "path": "/students", "params": {"search": "Student 12"}},
+        {"name": "get_student", "method": "GET", "path": f"/students/{student_id}"},
+        {"name": "student_enrollment_page", "method": "GET", "path": f"/students/{student_id}/enrollment-page"},
+        {"name": "student_eligible_courses", "method": "GET", "path": f"/students/{student_id}/eligible-courses"},
+        {"name": "list_courses", "method": "GET", "path": "/courses"},
+        {"name": "list_courses_search", "method": "GET", "path": "/courses", "params": {"search": "Course 1"}},
+        {"name": "list_courses_available_only", "method": "GET", "path": "/courses", "params": {"available_only": "true"}},
+        {"name": "get_course", "method": "GET", "path": f"/courses/{course_id}"},
+        {"name": "get_course_students", "method": "GET", "path": f"/courses/{course_id}/students"},
+        {"name": "list_enrollments", "method": "GET", "path": "/enrollments"},
+        {"name": "list_enrollments_active", "method": "GET", "path": "/enrollments", "params": {"status": "active"}},
+        {"name": "student_enrollments", "method": "GET", "path": f"/enrollments/student/{student_id}"},
+        {"name": "course_enrollments", "method": "GET", "path": f"/enrollments/course/{course_id}"},
+        {"name": "stats", "method": "GET", "path": "/stats"},
+        {"name": "create_student", "method": "POST", "path": "/students", "unique_body": True},
+    ]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_case(client, case: Dict, iterations: int, max_seconds: float) -> Dict:
+    """Time one case; stops early once ``max_seconds`` have been spent"""
+    from app.query_stats import count_queries
+
+    timings = []
+    statements = []
+    deadline = time.perf_counter() + max_seconds
+    for i in range(iterations):
+        kwargs = {"params": case.get("params")}
+        if case.get("unique_body"):
+            suffix = f"{os.getpid()}{time.perf_counter_ns()}{i}"
+            kwargs["json"] = {"student_id": f"B{suffix}", "name": "Bench Student",
+                              "email": f"bench{suffix}@example.com"}
+        with count_queries() as stats:
+            start = time.perf_counter()
+            response = client.request(case["method"], case["path"], **kwargs)
+            timings.append((time.perf_counter() - start) * 1000)
+        statements.append(stats.count)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{case['name']}: HTTP {response.status_code} {response.text[:200]}")
+        if time.perf_counter() > deadline:
+            break
+    return {
+        "iterations": len(timings),
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "queries": max(statements),
+    }
+
+
+def compare(results: Dict, baseline: Dict, timing_tolerance: Optional[float] = None) -> List[str]:
+    """Names of cases that regressed against the baseline"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        slower = timing_tolerance is not None and result["p95_ms"] > before["p95_ms"] * (1 + timing_tolerance)
+        if slower or result["queries"] > before["queries"]:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend endpoints in-process")
+    parser.add_argument("--scale", choices=SCALES, default="1k")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--max-seconds", type=float, default=3.0, help="time budget per case")
+    parser.add_argument("--timing-tolerance", type=float,
+                        help="also fail on a p95 slowdown beyond this (1.0 = 100%%); off by default")
+    parser.add_argument("--only", help="comma-separated case names to run")
+    parser.add_argument("--save-baseline", action="store_true", help="store results as the new baseline")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench_endpoints_")
+    database_url = f"sqlite:///{directory}/bench.db"
+    os.environ["DATABASE_URL"] = database_url
+
+    from sqlalchemy import create_engine
+    from generate_data import generate
+
+    start = time.perf_counter()
+    counts = generate(create_engine(database_url), SCALES[args.scale])
+    print(f"Generated {counts} in {time.perf_counter() - start:.1f}s")
+
+    from fastapi.testclient import TestClient
+    from main import app
+
+    selected = cases(counts)
+    if args.only:
+        names = set(args.only.split(","))
+        selected = [case for case in selected if case["name"] in names]
+
+    results = {}
+    with TestClient(app) as client:
+        print(f"{'case':<28}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}")
+        for case in selected:
+            result = run_case(client, case, args.iterations, args.max_seconds)
+            results[case["name"]] = result
+            print(f"{case['name']:<28}{result['iterations']:>5}{result['p50_ms']:>10.2f}"
+                  f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['queries']:>9}")
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baselines = json.load(f)
+
+    baseline = baselines.get(args.scale, {})
+    regressions = compare(results, baseline, args.timing_tolerance)
+    for name, after in results.items():
+        before = baseline.get(name)
+        if before:
+            label = "REGRESSION" if name in regressions else "p95"
+            print(f"{label} {name}: p95 {before['p95_ms']} -> {after['p95_ms']} ms, "
+                  f"queries {before['queries']} -> {after['queries']}")
+
+    if args.save_baseline:
+        baselines.setdefault(args.scale, {}).update(results)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved baseline for scale {args.scale} to {BASELINE_PATH}")
+        return 0
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark: time from interpreter start to the first response
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 --path /students
+    python benchmarks/bench_startup.py --importtime
+
+Every run starts a fresh interpreter, imports ``main``, runs the lifespan
+startup and serves one request through TestClient, reporting the median
+and worst time of each phase:
+
+* import: ``import main`` (module imports and app construction)
+* startup: lifespan startup (engine creation)
+* first response: the first request, including the first connection
+
+With ``--importtime`` the slowest modules by cumulative import time are
+listed as well, from ``python -X importtime``.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    started = time.perf_counter()
+    status = client.get(sys.argv[1]).status_code
+    responded = time.perf_counter()
+print(json.dumps({
+    "import": imported - start, "startup": started - imported,
+    "first_response": responded - started, "total": responded - start, "status": status,
+}))
+"""
+
+
+def run_once(path: str, env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, path], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_times(env: dict, limit: int):
+    """Slowest modules by cumulative import time, in microseconds"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import-to-first-response time")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--path", default="/health", help="path of the first request")
+    parser.add_argument("--importtime", action="store_true", help="list the slowest imports")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench_startup_")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{directory}/bench.db", AUTO_MIGRATE="true")
+
+    results = [run_once(args.path, env) for _ in range(args.runs)]
+    if any(result["status"] >= 400 for result in results):
+        print(f"warning: {args.path} answered {results[0]['status']}")
+
+    print(f"{'phase':<16}{'median ms':>12}{'max ms':>10}")
+    for phase in ("import", "startup", "first_response", "total"):
+        samples = [result[phase] * 1000 for result in results]
+        print(f"{phase:<16}{statistics.median(samples):>12.1f}{max(samples):>10.1f}")
+
+    if args.importtime:
+        print("\nslowest imports (cumulative ms)")
+        for cumulative_us, name in import_times(env, 15):
+            print(f"{cumulative_us / 1000:>10.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
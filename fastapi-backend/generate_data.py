@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generator for development, benchmarks and load tests
+
+Writes students, courses and enrollments straight into the database with
+SQLAlchemy Core bulk inserts, bypassing the API and the ORM unit of work, so
+millions of enrollments load in well under a minute. Output is fully
+determined by the seed and the requested scale.
+
+The data is shaped like a real registration system:
+
+* course popularity follows a Zipf distribution and course capacity roughly
+  tracks demand, so the most popular courses fill up and late registrants
+  spill over into other courses
+* each student takes a variable number of courses around the mean load
+* enrollments are a mix of active (current term), completed (earlier terms)
+  and dropped, and are dated in bursts after each term's registration opens
+
+Usage:
+    python generate_data.py --scale 100k
+    python generate_data.py --enrollments 2500000 --database-url sqlite:///./load.db --reset
+"""
+import argparse
+import bisect
+import itertools
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.engine import Engine
+
+from app import models
+from app.init_db import drop_db, migrate
+
+# Named scales, in enrollment rows
+SCALES = {"tiny": 40, "1k": 1_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Rows per executemany batch
+BATCH_SIZE = 20_000
+
+# Share of enrollments by status; active ones also need a free seat
+STATUS_WEIGHTS = {"active": 0.72, "completed": 0.20, "dropped": 0.08}
+
+# Zipf exponent for course popularity, and the rank offset (as a fraction of
+# the catalog) that flattens the head so demand stays within course capacity
+POPULARITY_SKEW = 1.0
+POPULARITY_OFFSET = 0.02
+
+# Redraws for a course the student already takes or, if active, that is full
+FULL_COURSE_RETRIES = 8
+
+# Registration opens at the start of each term; the last one is current
+TERM_COUNT = 6
+TERM_LENGTH = timedelta(days=182)
+EPOCH = datetime(2026, 8, 24, tzinfo=timezone.utc)
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Carol", "David", "Emma", "Frank", "Grace", "Henry", "Isabel", "Jack",
+    "Karen", "Liam", "Maya", "Noah", "Olivia", "Pablo", "Quinn", "Rosa", "Samir", "Tara",
+    "Umar", "Vera", "Wei", "Ximena", "Yusuf", "Zoe", "Aiko", "Bruno", "Chloe", "Dmitri",
+]
+LAST_NAMES = [
+    "Johnson", "Smith", "Davis", "Wilson", "Brown", "Miller", "Lee", "Chen", "Garcia", "Khan",
+    "Nguyen", "Patel", "Rossi", "Schmidt", "Tanaka", "Okafor", "Silva", "Kowalski", "Haddad", "Berg",
+]
+DEPARTMENTS = {
+    "CS": "Computer Science", "MATH": "Mathematics", "PHYS": "Physics", "CHEM": "Chemistry",
+    "BIO": "Biology", "ENG": "English", "HIST": "History", "ECON": "Economics",
+    "PSY": "Psychology", "ART": "Art",
+}
+TOPICS = [
+    "Foundations", "Methods", "Theory", "Laboratory", "Seminar", "Systems", "Analysis",
+    "Applications", "Topics", "Workshop", "Research", "Design",
+]
+
+
+def scale_counts(enrollments: int, students: Optional[int] = None,
+                 courses: Optional[int] = None) -> Dict[str, int]:
+    """Student and course counts that go with a target number of enrollments"""
+    return {
+        "students": students or max(1, enrollments // 5),
+        "courses": courses or max(10, enrollments // 200),
+        "enrollments": enrollments,
+    }
+
+
+def _insert_batches(conn, table, rows: Iterator[Dict]) -> int:
+    total = 0
+    while True:
+        batch = list(itertools.islice(rows, BATCH_SIZE))
+        if not batch:
+            return total
+        conn.execute(insert(table), batch)
+        total += len(batch)
+
+
+def _student_rows(rng: random.Random, count: int) -> Iterator[Dict]:
+    start = EPOCH - TERM_LENGTH * TERM_COUNT
+    span = int((EPOCH - start).total_seconds())
+    for i in range(1, count + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield {
+            "id": i,
+            "student_id": f"STU{i:07d}",
+            "name": f"{first} {last}",
+            "email": f"{first.lower()}.{last.lower()}.{i}@university.edu",
+            "created_at": start + timedelta(seconds=rng.randrange(span)),
+        }
+
+
+def _course_rows(rng: random.Random, count: int, demand: List[float]) -> Iterator[Dict]:
+    departments = list(DEPARTMENTS.items())
+    active_share = STATUS_WEIGHTS["active"]
+    for i in range(1, count + 1):
+        code, department = departments[(i - 1) % len(departments)]
+        number = 100 + (i - 1) // len(departments)
+        topic = rng.choice(TOPICS)
+        # Capacity roughly tracks expected active demand; popular courses overflow
+        capacity = int(demand[i - 1] * active_share * rng.uniform(1.0, 1.6))
+        yield {
+            "id": i,
+            "course_code": f"{code}{number}",
+            "name": f"{department} {topic} {number}",
+            "description": f"{topic} in {department.lower()} at the {number // 100}00 level",
+            "credits": rng.choice((1, 2, 3, 3, 3, 4, 4, 5)),
+            "max_students": min(500, max(15, capacity)),
+        }
+
+
+def _enrollment_rows(rng: random.Random, counts: Dict[str, int], cum_weights: List[float],
+                     capacity: List[int]) -> Iterator[Dict]:
+    student_count, course_count = counts["students"], counts["courses"]
+    mean_load = counts["enrollments"] / student_count
+    max_load = min(course_count, max(1, int(mean_load * 3)))
+    statuses = list(STATUS_WEIGHTS)
+    status_cum = list(itertools.accumulate(STATUS_WEIGHTS.values()))
+    total_weight = cum_weights[-1]
+    term_starts = [EPOCH - TERM_LENGTH * n for n in range(TERM_COUNT - 1, -1, -1)]
+    active_counts = [0] * course_count
+
+    remaining = counts["enrollments"]
+    enrollment_id = 0
+    for student_id in range(1, student_count + 1):
+        students_left = student_count - student_id + 1
+        load = round(rng.gauss(remaining / students_left, mean_load / 3))
+        load = max(1 if remaining else 0, min(load, max_load, remaining))
+
+        chosen = set()
+        for _ in range(load):
+            status = statuses[bisect.bisect(status_cum, rng.random() * status_cum[-1])]
+            for _ in range(FULL_COURSE_RETRIES):
+                course_index = bisect.bisect(cum_weights, rng.random() * total_weight)
+                if course_index in chosen:
+                    continue
+                if status != "active" or active_counts[course_index] < capacity[course_index]:
+                    break
+            else:
+                # Every draw was full or already taken: record a past-term enrollment
+                if course_index in chosen:
+                    continue
+                status = "completed"
+            chosen.add(course_index)
+            remaining -= 1
+
+            if status == "active":
+                active_counts[course_index] += 1
+                term_start = term_starts[-1]
+            else:
+                term_start = term_starts[rng.randrange(TERM_COUNT - 1)]
+            # Most registrations land in the first days after registration opens
+            offset = timedelta(hours=min(rng.expovariate(1 / 36), 24 * 40))
+            enrollment_id += 1
+            yield {
+                "id": enrollment_id,
+                "student_id": student_id,
+                "course_id": course_index + 1,
+                "enrollment_date": term_start + offset,
+                "status": status,
+            }
+
+
+def _fast_load_pragmas(dbapi_connection, connection_record):
+    """Trade durability for speed while bulk loading a scratch database"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA cache_size=-262144")
+    cursor.close()
+
+
+def generate(engine: Engine, enrollments: int, seed: int = 0, students: Optional[int] = None,
+             courses: Optional[int] = None, reset: bool = False) -> Dict[str, int]:
+    """Create the schema and fill it with a dataset of the given size
+
+    Returns the number of students, courses and enrollments written. The
+    database must be empty unless ``reset`` is set, in which case existing
+    tables are dropped first.
+    """
+    rng = random.Random(seed)
+    counts = scale_counts(enrollments, students, courses)
+
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _fast_load_pragmas)
+        engine.dispose()
+    if reset:
+        drop_db(engine)
+    migrate(engine)
+
+    # Zipf popularity over a shuffled course order
+    ranks = list(range(1, counts["courses"] + 1))
+    rng.shuffle(ranks)
+    offset = counts["courses"] * POPULARITY_OFFSET
+    weights = [1 / (rank + offset) ** POPULARITY_SKEW for rank in ranks]
+    weight_total = sum(weights)
+    demand = [w / weight_total * counts["enrollments"] for w in weights]
+    cum_weights = list(itertools.accumulate(weights))
+
+    with engine.begin() as conn:
+        if conn.execute(select(func.count()).select_from(models.Student.__table__)).scalar():
+            raise RuntimeError("Database already contains students")
+
+        _insert_batches(conn, models.Student.__table__, _student_rows(rng, counts["students"]))
+        course_rows = list(_course_rows(rng, counts["courses"], demand))
+        capacity = [row["max_students"] for row in course_rows]
+        _insert_batches(conn, models.Course.__table__, iter(course_rows))
+        counts["enrollments"] = _insert_batches(
+            conn, models.Enrollment.__table__, _enrollment_rows(rng, counts, cum_weights, capacity)
+        )
+
+    if engine.dialect.name == "sqlite":
+        event.remove(engine, "connect", _fast_load_pragmas)
+        engine.dispose()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic enrollment dataset")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--scale", choices=SCALES, default="1k", help="named dataset size")
+    size.add_argument("--enrollments", type=int, help="exact number of enrollments")
+    parser.add_argument("--students", type=int, help="override the number of students")
+    parser.add_argument("--courses", type=int, help="override the number of courses")
+    parser.add_argument("--database-url", default="sqlite:///./student_enrollment.db")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reset", action="store_true", help="drop existing tables first")
+    args = parser.parse_args()
+
+    enrollments = args.enrollments if args.enrollments is not None else SCALES[args.scale]
+    engine = create_engine(args.database_url)
+    start = time.perf_counter()
+    try:
+        counts = generate(engine, enrollments, args.seed, args.students, args.courses, args.reset)
+    except RuntimeError as e:
+        parser.exit(1, f"{e}; pass --reset to replace it\n")
+    print(f"Generated {counts['students']} students, {counts['courses']} courses and "
+          f"{counts['enrollments']} enrollments in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
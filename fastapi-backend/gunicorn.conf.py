@@ -0,0 +1,74 @@
+"""
+Gunicorn configuration for running the FastAPI backend in production
+
+Usage: gunicorn -c gunicorn.conf.py main:app
+
+Runs one uvicorn worker process per core. The app is imported once in the
+master (``preload_app``) and forked, so workers share the imported code;
+the master creates the schema and switches the database to WAL before the
+first fork, and each worker then opens its own engine and warms it up in
+the lifespan handler before ``GET /ready`` reports ready.
+
+SQLite with several worker processes needs the WAL journal (``SQLITE_WAL``,
+on by default here); see "Production Deployment" in README.md.
+"""
+import multiprocessing
+import os
+
+# Settings are read when the app is preloaded, which happens after this file
+os.environ.setdefault('SQLITE_WAL', 'true')
+# Idempotency keys shared by the workers, so retries on another worker replay too
+os.environ.setdefault('IDEMPOTENCY_STORE', './idempotency.db')
+
+bind = os.environ.get('BACKEND_BIND', f"0.0.0.0:{os.environ.get('BACKEND_PORT', 8000)}")
+
+# One process per core; each worker runs its own event loop and threadpool
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'uvicorn.workers.UvicornWorker'
+preload_app = True
+
+# Connections queued by the kernel while all workers are busy
+backlog = int(os.environ.get('BACKEND_BACKLOG', 2048))
+keepalive = int(os.environ.get('BACKEND_KEEPALIVE', 5))
+timeout = int(os.environ.get('BACKEND_WORKER_TIMEOUT', 60))
+graceful_timeout = 30
+
+max_requests = int(os.environ.get('BACKEND_MAX_REQUESTS', 10000))
+max_requests_jitter = 500
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    """Prepare shared state once, before any worker is forked"""
+    # Drop metric files left over from a previous run (see app/metrics.py)
+    metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for name in os.listdir(metrics_dir):
+            if name.endswith('.db'):
+                os.remove(os.path.join(metrics_dir, name))
+
+    # Create the schema and switch the journal to WAL while only one process
+    # has the database open, then close the master's connections
+    from app.database import dispose_engine
+    from app.init_db import journal_mode, migrate_all
+    migrate_all()
+    mode = journal_mode()
+    if mode != 'wal':
+        server.log.warning("SQLite journal mode is %r; concurrent workers need 'wal'", mode)
+    dispose_engine()
+
+
+def post_fork(server, worker):
+    """Never share pooled connections between processes"""
+    from app.database import reset_after_fork
+    reset_after_fork()
+
+
+def child_exit(server, worker):
+    """Stop counting an exited worker's live gauges"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
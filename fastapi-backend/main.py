@@ -1,57 +1,244 @@
 """
 Main FastAPI application for student enrollment system
+
+``create_app`` builds the application; the module-level ``app`` is what
+``uvicorn main:app`` serves. Importing this module does not touch the
+database: the engine is created in the lifespan handler, and migrations
+are only applied by ``python -m app.init_db`` (or on startup with
+``AUTO_MIGRATE=true``).
+
+For production, run several workers with ``gunicorn -c gunicorn.conf.py
+main:app``; ``GET /ready`` turns green once a worker has warmed up.
 """
-from fastapi import FastAPI, HTTPException, Depends, Query
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, HTTPException, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 import logging
 
-from app.database import engine, get_db
-from app import models, schemas
+from app.changes import changes_page
+from app.config import Settings, settings
+from app.database import SessionLocal, db_session, dispose_engine, init_engine, init_read_engine
+from app.enrollment_queue import EnrollmentQueue, EnrollmentRejected, EnrollmentTimeout, QueueFull
+from app.group_commit import GroupCommitter, get_write_db, group_committed
+from app.metrics import CONTENT_TYPE_LATEST, MetricsMiddleware, render_metrics
+from app.query_stats import QueryStatsMiddleware
+from app.read_split import ReadYourWritesMiddleware, get_read_db
+from app.server_timing import ServerTimingMiddleware, TimedRoute
+from app.warmup import warm_up
+from app import models, queries, schemas, sharding
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
-
-# Create FastAPI instance
-app = FastAPI(
-    title="Student Enrollment API",
-    description="RESTful API for managing students, courses, and enrollments",
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc"
-)
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5000", "http://localhost:5001"],  # Flask frontend
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# All endpoints; TimedRoute records when each endpoint returns, for the
+# serialize entry of Server-Timing
+router = APIRouter(route_class=TimedRoute)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create and warm the engine on startup; release its connections on shutdown"""
+    engine = init_engine(shard_urls=app.state.settings.shard_urls)
+    if app.state.settings.auto_migrate:
+        from app.init_db import migrate_all
+        migrate_all()
+    if app.state.settings.read_split and not app.state.settings.shard_urls:
+        init_read_engine(app.state.settings.read_replica_url)
+    if app.state.settings.registration_mode:
+        app.state.enrollment_queue = EnrollmentQueue(
+            SessionLocal,
+            batch_size=app.state.settings.registration_batch_size,
+            batch_wait_ms=app.state.settings.registration_batch_wait_ms,
+            max_queued=app.state.settings.registration_queue_size,
+            timeout=app.state.settings.registration_timeout_seconds
+        )
+        app.state.enrollment_queue.start()
+    if app.state.settings.group_commit:
+        app.state.group_committer = GroupCommitter(
+            engine,
+            window_ms=app.state.settings.group_commit_window_ms,
+            max_batch=app.state.settings.group_commit_max_batch,
+            timeout=app.state.settings.group_commit_timeout_seconds
+        )
+        app.state.group_committer.start()
+    await warm_up(app, engine, app.state.settings.warmup_paths)
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    if app.state.enrollment_queue is not None:
+        # Queued requests are still written before the engine goes away
+        await run_in_threadpool(app.state.enrollment_queue.stop)
+        app.state.enrollment_queue = None
+    if app.state.group_committer is not None:
+        await run_in_threadpool(app.state.group_committer.stop)
+        app.state.group_committer = None
+    if app.state.span_exporter is not None:
+        app.state.span_exporter.shutdown()
+    dispose_engine()
+
+
+def create_app(app_settings: Settings = None) -> FastAPI:
+    """Build the FastAPI application"""
+    app_settings = app_settings or settings
+    if app_settings.shard_urls and (app_settings.group_commit or app_settings.registration_mode):
+        # Both write through one connection to a single database
+        raise ValueError("GROUP_COMMIT and REGISTRATION_MODE cannot be combined with SHARD_URLS")
+    
+    # Create FastAPI instance
+    app = FastAPI(
+        title="Student Enrollment API",
+        description="RESTful API for managing students, courses, and enrollments",
+        version="1.0.0",
+        docs_url="/docs",
+        redoc_url="/redoc",
+        lifespan=lifespan
+    )
+    app.state.settings = app_settings
+    app.state.ready = False  # set by the lifespan handler after warm-up
+    app.state.span_exporter = None
+    app.state.enrollment_queue = None  # started by the lifespan handler in registration mode
+    app.state.group_committer = None  # started by the lifespan handler with GROUP_COMMIT
+    
+    # The routes are complete already; include_router() would copy each one
+    # and defer building the copies to the first request (~20 ms)
+    app.router.routes.extend(router.routes)
+    
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:5000", "http://localhost:5001"],  # Flask frontend
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    # With a replica, clients that just wrote read from the primary for a while
+    if app_settings.read_split and app_settings.read_replica_url:
+        app.add_middleware(ReadYourWritesMiddleware, window=app_settings.read_your_writes_seconds)
+    
+    # Server-Timing header (db, serialize, total); runs inside QueryStatsMiddleware
+    if app_settings.server_timing:
+        app.add_middleware(ServerTimingMiddleware)
+    
+    # Per-request SQL statement counts, DB time headers and N+1 warnings
+    app.add_middleware(
+        QueryStatsMiddleware,
+        expose_headers=app_settings.debug,
+        n_plus_one_threshold=app_settings.n_plus_one_threshold
+    )
+    
+    # Replays of responses to repeated Idempotency-Key headers; replays
+    # run no SQL, but are still counted and traced
+    if app_settings.idempotency_enabled:
+        from app.idempotency import IdempotencyMiddleware, create_store
+        app.add_middleware(
+            IdempotencyMiddleware,
+            store=create_store(
+                app_settings.idempotency_store,
+                app_settings.idempotency_max_keys,
+                app_settings.idempotency_ttl_seconds
+            )
+        )
+    
+    # Load shedding: bounded concurrency and queueing per route, 503 beyond
+    if app_settings.admission_enabled:
+        from app.admission import AdmissionController, AdmissionMiddleware, TokenBuckets
+        priority = list(app_settings.admission_priority_routes)
+        if app_settings.registration_mode:
+            # Bounded by the registration queue, which sheds on its own
+            priority.append("POST /enrollments")
+        app.add_middleware(
+            AdmissionMiddleware,
+            routes=app.router.routes,
+            controller=AdmissionController(
+                app_settings.admission_max_concurrency,
+                app_settings.admission_route_concurrency,
+                app_settings.admission_route_limits,
+                queue_size=app_settings.admission_queue_size,
+                max_wait=app_settings.admission_max_wait_ms / 1000
+            ),
+            buckets=TokenBuckets(
+                app_settings.rate_limit_per_second, app_settings.rate_limit_burst
+            ) if app_settings.rate_limit_per_second > 0 else None,
+            priority=priority,
+            client_header=app_settings.rate_limit_client_header,
+            retry_after=app_settings.admission_retry_after
+        )
+    
+    # Identical concurrent GETs share one response; outside admission
+    # control, so followers do not take up admission slots
+    if app_settings.single_flight_routes:
+        from app.single_flight import SingleFlightMiddleware
+        app.add_middleware(
+            SingleFlightMiddleware,
+            routes=app.router.routes,
+            coalesced=app_settings.single_flight_routes,
+            read_your_writes_seconds=app_settings.read_your_writes_seconds
+        )
+    
+    # Prometheus request metrics, served at /metrics
+    app.add_middleware(MetricsMiddleware)
+    
+    # W3C trace context: spans for the request, its SQL and serialization
+    if app_settings.tracing_enabled:
+        from app.tracing import TracingMiddleware, create_exporter
+        app.state.span_exporter = create_exporter(app_settings.tracing_exporter, app_settings.tracing_file)
+        app.add_middleware(
+            TracingMiddleware,
+            exporter=app.state.span_exporter,
+            sample_rate=app_settings.tracing_sample_rate
+        )
+    
+    # On-demand and 1-in-N request profiling to folded-stack reports
+    if app_settings.profiling_enabled:
+        from app.profiling import ProfilingMiddleware
+        app.add_middleware(
+            ProfilingMiddleware,
+            token=app_settings.profiling_token,
+            sample_every=app_settings.profiling_sample_every,
+            directory=app_settings.profiling_dir,
+            keep=app_settings.profiling_keep,
+            interval=app_settings.profiling_interval
+        )
+    
+    return app
 
 
 # Health check endpoint
-@app.get("/health")
+@router.get("/health")
 def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "student-enrollment-api"}
 
 
+@router.get("/ready")
+async def readiness_check(request: Request, response: Response):
+    """Readiness probe: 503 until the pool and routes have been warmed up"""
+    if not request.app.state.ready:
+        response.status_code = 503
+        return {"status": "starting"}
+    return {"status": "ready"}
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics, aggregated across worker processes"""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 # ======================== STUDENT ENDPOINTS ========================
 
-@app.get("/students", response_model=schemas.PaginatedResponse[schemas.StudentRead])
+@router.get("/students", response_model=schemas.PaginatedResponse[schemas.StudentRead])
 def list_students(
     skip: int = Query(0, ge=0, description="Number of students to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of students to return"),
     search: Optional[str] = Query(None, description="Search by name or email"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     List all students with optional pagination and search
@@ -66,11 +253,8 @@ def list_students(
             (models.Student.student_id.ilike(search_term))
         )
     
-    # Get total count before pagination
-    total = query.count()
-    
-    # Get paginated results
-    students = query.offset(skip).limit(limit).all()
+    # Total count and paginated results, merged across shards when sharded
+    total, students = sharding.paginate(db, query, skip, limit)
     
     # Calculate current page
     page = (skip // limit) + 1 if limit > 0 else 1
@@ -83,10 +267,11 @@ def list_students(
     }
 
 
-@app.post("/students", response_model=schemas.StudentRead, status_code=201)
+@router.post("/students", response_model=schemas.StudentRead, status_code=201)
+@group_committed(schemas.StudentRead)
 def create_student(
     student: schemas.StudentCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
     Create a new student
@@ -117,10 +302,10 @@ def create_student(
         raise HTTPException(status_code=400, detail="Error creating student")
 
 
-@app.get("/students/{student_id}", response_model=schemas.StudentWithEnrollments)
+@router.get("/students/{student_id}", response_model=schemas.StudentWithEnrollments)
 def get_student(
     student_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get a student by ID with their enrollments
@@ -131,11 +316,74 @@ def get_student(
     return student
 
 
-@app.put("/students/{student_id}", response_model=schemas.StudentRead)
+@router.get("/students/{student_id}/enrollment-page", response_model=schemas.StudentEnrollmentPage)
+def get_student_enrollment_page(
+    student_id: int,
+    status: str = Query("active", pattern="^(active|dropped|completed|all)$"),
+    eligible_limit: int = Query(1000, ge=0, le=1000, description="Maximum number of eligible courses to return"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get a student, their enrollments and the courses they can still join
+    
+    Backend-for-frontend endpoint for the student enrollment page: replaces
+    separate calls to /students/{id}, /enrollments/student/{id} and /courses.
+    """
+    student = db.get(models.Student, student_id)
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+    
+    eligible_courses, eligible_next_cursor = queries.eligible_courses_page(db, student_id, eligible_limit)
+    
+    return {
+        "student": schemas.StudentRead.model_validate(student),
+        "enrollments": queries.student_enrollments_with_courses(
+            db, student_id, None if status == "all" else status
+        ),
+        "eligible_courses": eligible_courses,
+        "eligible_next_cursor": eligible_next_cursor
+    }
+
+
+@router.get("/students/{student_id}/eligible-courses", response_model=schemas.KeysetPage[schemas.CourseRead])
+def get_eligible_courses(
+    student_id: int,
+    search: Optional[str] = Query(None, description="Search by name, code, or description"),
+    sort: str = Query("course_code", pattern="^(course_code|name|credits|available_seats)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of courses to return"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    List courses a student can enroll in: not actively enrolled and with seats left
+    
+    Uses keyset pagination; follow next_cursor until it is null.
+    """
+    if not db.get(models.Student, student_id):
+        raise HTTPException(status_code=404, detail="Student not found")
+    
+    try:
+        items, next_cursor = queries.eligible_courses_page(
+            db, student_id, limit,
+            search=search, sort=sort, descending=order == "desc", cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "items": items,
+        "next_cursor": next_cursor,
+        "per_page": limit
+    }
+
+
+@router.put("/students/{student_id}", response_model=schemas.StudentRead)
+@group_committed(schemas.StudentRead)
 def update_student(
     student_id: int,
     student_update: schemas.StudentUpdate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
     Update a student's information
@@ -169,10 +417,11 @@ def update_student(
         raise HTTPException(status_code=400, detail="Error updating student")
 
 
-@app.delete("/students/{student_id}", status_code=204)
+@router.delete("/students/{student_id}", status_code=204)
+@group_committed()
 def delete_student(
     student_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
     Delete a student
@@ -189,13 +438,13 @@ def delete_student(
 
 # ======================== COURSE ENDPOINTS ========================
 
-@app.get("/courses", response_model=schemas.PaginatedResponse[schemas.CourseRead])
+@router.get("/courses", response_model=schemas.PaginatedResponse[schemas.CourseRead])
 def list_courses(
     skip: int = Query(0, ge=0, description="Number of courses to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of courses to return"),
     search: Optional[str] = Query(None, description="Search by name, code, or description"),
     available_only: bool = Query(False, description="Show only courses with available seats"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     List all courses with optional pagination, search, and filtering
@@ -236,10 +485,11 @@ def list_courses(
     }
 
 
-@app.post("/courses", response_model=schemas.CourseRead, status_code=201)
+@router.post("/courses", response_model=schemas.CourseRead, status_code=201)
+@group_committed(schemas.CourseRead)
 def create_course(
     course: schemas.CourseCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
     Create a new course
@@ -266,10 +516,10 @@ def create_course(
         raise HTTPException(status_code=400, detail="Error creating course")
 
 
-@app.get("/courses/{course_id}", response_model=schemas.CourseRead)
+@router.get("/courses/{course_id}", response_model=schemas.CourseRead)
 def get_course(
     course_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get a course by ID
@@ -280,10 +530,10 @@ def get_course(
     return course
 
 
-@app.get("/courses/{course_id}/students", response_model=schemas.CourseWithStudents)
+@router.get("/courses/{course_id}/students", response_model=schemas.CourseWithStudents)
 def get_course_students(
     course_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all students enrolled in a course
@@ -293,15 +543,16 @@ def get_course_students(
         raise HTTPException(status_code=404, detail="Course not found")
     
     # Filter only active enrollments
-    course.enrollments = [e for e in course.enrollments if e.status == "active"]
+    course.enrollments = [e for e in course.enrollments if e.status == models.EnrollmentStatus.ACTIVE]
     return course
 
 
-@app.put("/courses/{course_id}", response_model=schemas.CourseRead)
+@router.put("/courses/{course_id}", response_model=schemas.CourseRead)
+@group_committed(schemas.CourseRead)
 def update_course(
     course_id: int,
     course_update: schemas.CourseUpdate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
     Update a course's information
@@ -334,10 +585,11 @@ def update_course(
         raise HTTPException(status_code=400, detail="Error updating course")
 
 
-@app.delete("/courses/{course_id}", status_code=204)
+@router.delete("/courses/{course_id}", status_code=204)
+@group_committed()
 def delete_course(
     course_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
     Delete a course (will cascade delete enrollments)
@@ -347,7 +599,7 @@ def delete_course(
         raise HTTPException(status_code=404, detail="Course not found")
     
     # Check if there are active enrollments
-    active_enrollments = [e for e in course.enrollments if e.status == "active"]
+    active_enrollments = [e for e in course.enrollments if e.status == models.EnrollmentStatus.ACTIVE]
     if active_enrollments:
         raise HTTPException(
             status_code=400,
@@ -362,14 +614,39 @@ def delete_course(
 
 # ======================== ENROLLMENT ENDPOINTS ========================
 
-@app.post("/enrollments", response_model=schemas.EnrollmentRead, status_code=201)
-def create_enrollment(
-    enrollment: schemas.EnrollmentCreate,
-    db: Session = Depends(get_db)
-):
+@router.post("/enrollments", response_model=schemas.EnrollmentRead, status_code=201)
+async def create_enrollment(enrollment: schemas.EnrollmentCreate, request: Request):
     """
     Enroll a student in a course
+    
+    In registration mode the request is queued and written in a batch with
+    others (see app/enrollment_queue.py); with group commit it shares a
+    commit with concurrent writes. The answers are the same either way.
     """
+    enrollment_queue = request.app.state.enrollment_queue
+    if enrollment_queue is not None:
+        try:
+            return await enrollment_queue.enroll(enrollment.student_id, enrollment.course_id)
+        except EnrollmentRejected as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        except QueueFull:
+            raise HTTPException(status_code=503, detail="Too many enrollment requests", headers={"Retry-After": "1"})
+        except EnrollmentTimeout:
+            raise HTTPException(status_code=503, detail="Enrollment timed out", headers={"Retry-After": "1"})
+    
+    committer = request.app.state.group_committer
+    if committer is not None:
+        return await committer.run_async(lambda db: _enroll(enrollment, db), schemas.EnrollmentRead)
+    return await run_in_threadpool(_enroll_now, enrollment)
+
+
+def _enroll_now(enrollment: schemas.EnrollmentCreate):
+    """Validate and commit a single enrollment"""
+    with db_session() as db:
+        return _enroll(enrollment, db)
+
+
+def _enroll(enrollment: schemas.EnrollmentCreate, db: Session):
     # Check if student exists
     student = db.query(models.Student).filter(
         models.Student.id == enrollment.student_id
@@ -395,11 +672,11 @@ def create_enrollment(
     ).first()
     
     if existing_enrollment:
-        if existing_enrollment.status == "active":
+        if existing_enrollment.status == models.EnrollmentStatus.ACTIVE:
             raise HTTPException(status_code=400, detail="Student is already enrolled in this course")
         else:
             # Reactivate the enrollment
-            existing_enrollment.status = "active"
+            existing_enrollment.status = models.EnrollmentStatus.ACTIVE
             db.commit()
             db.refresh(existing_enrollment)
             logger.info(f"Reactivated enrollment: Student {student.student_id} in Course {course.course_code}")
@@ -409,7 +686,7 @@ def create_enrollment(
     db_enrollment = models.Enrollment(
         student_id=enrollment.student_id,
         course_id=enrollment.course_id,
-        status="active"
+        status=models.EnrollmentStatus.ACTIVE
     )
     db.add(db_enrollment)
     
@@ -424,12 +701,12 @@ def create_enrollment(
         raise HTTPException(status_code=400, detail="Error creating enrollment")
 
 
-@app.get("/enrollments", response_model=schemas.PaginatedResponse[schemas.EnrollmentRead])
+@router.get("/enrollments", response_model=schemas.PaginatedResponse[schemas.EnrollmentRead])
 def list_enrollments(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    status: Optional[str] = Query(None, regex="^(active|dropped|completed)$"),
-    db: Session = Depends(get_db)
+    status: Optional[models.EnrollmentStatus] = Query(None),
+    db: Session = Depends(get_read_db)
 ):
     """
     List all enrollments with optional filtering
@@ -439,11 +716,8 @@ def list_enrollments(
     if status:
         query = query.filter(models.Enrollment.status == status)
     
-    # Get total count before pagination
-    total = query.count()
-    
-    # Get paginated results
-    enrollments = query.offset(skip).limit(limit).all()
+    # Total count and paginated results, merged across shards when sharded
+    total, enrollments = sharding.paginate(db, query, skip, limit)
     
     # Calculate current page
     page = (skip // limit) + 1 if limit > 0 else 1
@@ -456,13 +730,13 @@ def list_enrollments(
     }
 
 
-@app.get("/enrollments/student/{student_id}", response_model=schemas.PaginatedResponse[schemas.EnrollmentWithCourse])
+@router.get("/enrollments/student/{student_id}", response_model=schemas.PaginatedResponse[schemas.EnrollmentWithCourse])
 def get_student_enrollments(
     student_id: int,
-    status: Optional[str] = Query(None, regex="^(active|dropped|completed)$"),
+    status: Optional[models.EnrollmentStatus] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all enrollments for a specific student
@@ -479,11 +753,8 @@ def get_student_enrollments(
     if status:
         query = query.filter(models.Enrollment.status == status)
     
-    # Get total count before pagination
-    total = query.count()
-    
-    # Get paginated results
-    enrollments = query.offset(skip).limit(limit).all()
+    # Total count and paginated results, merged across shards when sharded
+    total, enrollments = sharding.paginate(db, query, skip, limit)
     
     # Calculate current page
     page = (skip // limit) + 1 if limit > 0 else 1
@@ -496,13 +767,13 @@ def get_student_enrollments(
     }
 
 
-@app.get("/enrollments/course/{course_id}", response_model=schemas.PaginatedResponse[schemas.EnrollmentWithStudent])
+@router.get("/enrollments/course/{course_id}", response_model=schemas.PaginatedResponse[schemas.EnrollmentWithStudent])
 def get_course_enrollments(
     course_id: int,
-    status: Optional[str] = Query(None, regex="^(active|dropped|completed)$"),
+    status: Optional[models.EnrollmentStatus] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all enrollments for a specific course
@@ -519,11 +790,8 @@ def get_course_enrollments(
     if status:
         query = query.filter(models.Enrollment.status == status)
     
-    # Get total count before pagination
-    total = query.count()
-    
-    # Get paginated results
-    enrollments = query.offset(skip).limit(limit).all()
+    # Total count and paginated results, merged across shards when sharded
+    total, enrollments = sharding.paginate(db, query, skip, limit)
     
     # Calculate current page
     page = (skip // limit) + 1 if limit > 0 else 1
@@ -536,11 +804,12 @@ def get_course_enrollments(
     }
 
 
-@app.put("/enrollments/{enrollment_id}", response_model=schemas.EnrollmentRead)
+@router.put("/enrollments/{enrollment_id}", response_model=schemas.EnrollmentRead)
+@group_committed(schemas.EnrollmentRead)
 def update_enrollment(
     enrollment_id: int,
     enrollment_update: schemas.EnrollmentUpdate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
     Update enrollment status (e.g., drop a course)
@@ -566,10 +835,11 @@ def update_enrollment(
         raise HTTPException(status_code=400, detail="Error updating enrollment")
 
 
-@app.delete("/enrollments/{enrollment_id}", status_code=204)
+@router.delete("/enrollments/{enrollment_id}", status_code=204)
+@group_committed()
 def delete_enrollment(
     enrollment_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
     Delete an enrollment record completely
@@ -589,16 +859,16 @@ def delete_enrollment(
 
 # ======================== UTILITY ENDPOINTS ========================
 
-@app.get("/stats")
-def get_statistics(db: Session = Depends(get_db)):
+@router.get("/stats")
+def get_statistics(db: Session = Depends(get_read_db)):
     """
     Get system statistics
     """
-    total_students = db.query(models.Student).count()
+    total_students = sharding.count(db, db.query(models.Student))
     total_courses = db.query(models.Course).count()
-    active_enrollments = db.query(models.Enrollment).filter(
-        models.Enrollment.status == "active"
-    ).count()
+    active_enrollments = sharding.count(db, db.query(models.Enrollment).filter(
+        models.Enrollment.status == models.EnrollmentStatus.ACTIVE
+    ))
     
     return {
         "total_students": total_students,
@@ -608,6 +878,27 @@ def get_statistics(db: Session = Depends(get_db)):
     }
 
 
+@router.get("/changes", response_model=schemas.ChangePage)
+def list_changes(
+    since: int = Query(0, ge=0, description="Last version already applied; 0 for the whole log"),
+    limit: int = Query(1000, ge=1, le=10000, description="Maximum number of changes to return"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Inserts, updates and deletes after version `since`, oldest first
+    
+    Follow next_since until it reaches latest_version. To start syncing,
+    note latest_version, download the lists, then apply the changes after
+    the noted version.
+    """
+    if isinstance(db, sharding.StudentShardedSession):
+        raise HTTPException(status_code=501, detail="The change feed needs a single database")
+    return changes_page(db, since, limit)
+
+
+app = create_app()
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
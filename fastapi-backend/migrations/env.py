@@ -0,0 +1,53 @@
+"""
+Alembic environment
+
+``app.init_db.migrate`` passes an open connection in
+``config.attributes["connection"]``; the alembic CLI gets the app's engine
+instead. Batch mode is on because SQLite can only alter most column and
+constraint definitions by copying the table.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+
+from app import models  # noqa: F401  (registers the tables on Base.metadata)
+from app.database import Base, get_engine
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("connection") is None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Emit the SQL instead of running it (``alembic upgrade head --sql``)"""
+    context.configure(
+        url=str(get_engine().url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    with get_engine().connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,65 @@
+"""Initial schema: students, courses and enrollments
+
+This is the schema ``Base.metadata.create_all`` used to create. Databases
+created that way are stamped at this revision by ``app.init_db.migrate``
+instead of running it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "students",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("student_id", sa.String(length=50), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("email", sa.String(length=100), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_students_id", "students", ["id"])
+    op.create_index("ix_students_email", "students", ["email"], unique=True)
+    op.create_index("ix_students_student_id", "students", ["student_id"], unique=True)
+
+    op.create_table(
+        "courses",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("course_code", sa.String(length=20), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("credits", sa.Integer(), nullable=False),
+        sa.Column("max_students", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_courses_id", "courses", ["id"])
+    op.create_index("ix_courses_course_code", "courses", ["course_code"], unique=True)
+
+    op.create_table(
+        "enrollments",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("student_id", sa.Integer(), nullable=False),
+        sa.Column("course_id", sa.Integer(), nullable=False),
+        sa.Column("enrollment_date", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.ForeignKeyConstraint(["course_id"], ["courses.id"]),
+        sa.ForeignKeyConstraint(["student_id"], ["students.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("student_id", "course_id", name="_student_course_uc"),
+    )
+    op.create_index("ix_enrollments_id", "enrollments", ["id"])
+
+
+def downgrade():
+    op.drop_table("enrollments")
+    op.drop_table("courses")
+    op.drop_table("students")
@@ -0,0 +1,33 @@
+"""Indexes for the enrollment access paths
+
+* ``(course_id, status)``: a course's enrollments, optionally by status
+* ``(student_id, status)``: a student's enrollments, optionally by status
+* ``(status, course_id)``: ``GET /enrollments?status=...``, ``/stats`` and
+  the active seat counts grouped by course, all read from the index alone
+
+An active-only partial index on ``course_id`` was tried for the seat
+counts, but SQLite's planner prefers ``(status, course_id)`` for them, so
+it would only have added write cost.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_enrollments_course_status", "enrollments", ["course_id", "status"])
+    op.create_index("ix_enrollments_student_status", "enrollments", ["student_id", "status"])
+    op.create_index("ix_enrollments_status_course", "enrollments", ["status", "course_id"])
+
+
+def downgrade():
+    op.drop_index("ix_enrollments_status_course", table_name="enrollments")
+    op.drop_index("ix_enrollments_student_status", table_name="enrollments")
+    op.drop_index("ix_enrollments_course_status", table_name="enrollments")
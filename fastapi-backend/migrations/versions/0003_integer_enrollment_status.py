@@ -0,0 +1,82 @@
+"""Store enrollment status as a SMALLINT code with a check constraint
+
+``active``/``dropped``/``completed`` become 1/2/3 (see
+``models.ENROLLMENT_STATUS_CODES``); the API keeps using the strings. The
+indexes that include ``status`` are rebuilt on the integer column.
+
+On SQLite every row is written twice: once by the UPDATE that fills the
+new column, and once when the second batch operation copies the table to
+drop the old column.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# Frozen copy of models.ENROLLMENT_STATUS_CODES at this revision
+CODES = {"active": 1, "dropped": 2, "completed": 3}
+
+STATUS_INDEXES = {
+    "ix_enrollments_course_status": ["course_id", "status"],
+    "ix_enrollments_student_status": ["student_id", "status"],
+    "ix_enrollments_status_course": ["status", "course_id"],
+}
+
+
+def _drop_status_indexes():
+    for name in STATUS_INDEXES:
+        op.drop_index(name, table_name="enrollments")
+
+
+def _create_status_indexes():
+    for name, columns in STATUS_INDEXES.items():
+        op.create_index(name, "enrollments", columns)
+
+
+def upgrade():
+    connection = op.get_bind()
+    unknown = connection.execute(
+        sa.text(
+            "SELECT DISTINCT status FROM enrollments"
+            " WHERE status IS NULL OR status NOT IN ('active', 'dropped', 'completed')"
+        )
+    ).scalars().all()
+    if unknown:
+        raise RuntimeError(f"Enrollments with unknown status values: {unknown}")
+
+    _drop_status_indexes()
+    with op.batch_alter_table("enrollments") as batch:
+        batch.add_column(sa.Column("status_code", sa.SmallInteger(), nullable=True))
+    op.execute(
+        "UPDATE enrollments SET status_code = CASE status "
+        + " ".join(f"WHEN '{name}' THEN {code}" for name, code in CODES.items())
+        + " END"
+    )
+    with op.batch_alter_table("enrollments") as batch:
+        batch.drop_column("status")
+        batch.alter_column("status_code", new_column_name="status", existing_type=sa.SmallInteger(), nullable=False)
+        batch.create_check_constraint("ck_enrollments_status", "status IN (1, 2, 3)")
+    _create_status_indexes()
+
+
+def downgrade():
+    _drop_status_indexes()
+    with op.batch_alter_table("enrollments") as batch:
+        batch.drop_constraint("ck_enrollments_status", type_="check")
+        batch.add_column(sa.Column("status_name", sa.String(length=20), nullable=True))
+    op.execute(
+        "UPDATE enrollments SET status_name = CASE status "
+        + " ".join(f"WHEN {code} THEN '{name}'" for name, code in CODES.items())
+        + " END"
+    )
+    with op.batch_alter_table("enrollments") as batch:
+        batch.drop_column("status")
+        batch.alter_column("status_name", new_column_name="status", existing_type=sa.String(length=20), nullable=False)
+    _create_status_indexes()
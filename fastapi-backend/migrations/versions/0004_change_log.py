@@ -0,0 +1,34 @@
+"""Change log behind the incremental sync feed (``GET /changes``)
+
+One row per insert, update or delete of a student, course or enrollment,
+written in the same transaction as the change (see ``app.changes``).
+``version`` uses AUTOINCREMENT so it keeps growing even if old entries are
+deleted.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "changes",
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("entity", sa.String(length=20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("op", sa.String(length=6), nullable=False),
+        sa.PrimaryKeyConstraint("version"),
+        sqlite_autoincrement=True,
+    )
+
+
+def downgrade():
+    op.drop_table("changes")
@@ -11,5 +11,8 @@ if [ -d ".venv" ]; then
     source .venv/bin/activate
 fi
 
+# Create or update the database schema
+python -m app.init_db
+
 # Run the server
 uvicorn main:app --reload --host 0.0.0.0 --port 8000
\ No newline at end of file
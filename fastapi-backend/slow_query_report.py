@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Summarize the slow-query log by normalized statement fingerprint
+
+Usage:
+    python slow_query_report.py
+    python slow_query_report.py --log /var/log/api/slow_queries.jsonl --sort count
+
+Statements that differ only in literals or in the length of IN lists are
+grouped together. Each group shows its count, total, mean and max duration,
+the endpoints that issued it and any plan flags (full scans, temporary
+B-trees) recorded by app/slow_queries.py.
+"""
+import argparse
+import json
+
+from app.config import settings
+from app.slow_queries import summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the slow-query log by statement fingerprint")
+    parser.add_argument("--log", default=settings.slow_query_log, help="log file (default: SLOW_QUERY_LOG)")
+    parser.add_argument("--sort", choices=("total", "count", "max"), default="total")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.log) as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+
+    sort_key = {"total": "total_ms", "count": "count", "max": "max_ms"}[args.sort]
+    groups = sorted(summarize(entries), key=lambda group: group[sort_key], reverse=True)
+    print(f"{len(entries)} slow statements, {len(groups)} fingerprints\n")
+    for group in groups[:args.limit]:
+        print(f"{group['count']:>6}x  total {group['total_ms']:>10.1f} ms  "
+              f"mean {group['mean_ms']:>8.1f} ms  max {group['max_ms']:>8.1f} ms")
+        print(f"        {group['fingerprint'][:200]}")
+        if group["flags"]:
+            print(f"        flags: {', '.join(group['flags'])}")
+        if group["endpoints"]:
+            print(f"        endpoints: {', '.join(group['endpoints'])}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
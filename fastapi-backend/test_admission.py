@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for admission control, load shedding and per-client rate limits
+"""
+import asyncio
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_admission.db"
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.admission import AdmissionController, AdmissionMiddleware, TokenBuckets
+from app.config import Settings
+from app.init_db import migrate
+from main import create_app
+
+migrate()
+
+
+def test_controller_queues_then_sheds():
+    """Requests wait for their route's slot, and are shed when the queue is full or the wait is over"""
+    async def scenario():
+        controller = AdmissionController(max_concurrency=10, route_concurrency=1, queue_size=1, max_wait=0.2)
+        assert await controller.acquire("GET /slow") is None
+        waiting = asyncio.ensure_future(controller.acquire("GET /slow"))
+        await asyncio.sleep(0)
+        assert controller.queued == 1
+        assert await controller.acquire("GET /slow") == "queue_full"
+        # Another route is not held up by the saturated one
+        assert await controller.acquire("GET /fast") is None
+
+        controller.release("GET /slow")
+        assert await waiting is None
+        assert await controller.acquire("GET /fast") == "timeout"
+        assert controller.active == 2 and controller.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_token_buckets_refill():
+    """A client gets burst requests at once, then rate per second"""
+    buckets = TokenBuckets(rate=10, burst=2)
+    assert buckets.take("a") == buckets.take("a") == 0
+    wait = buckets.take("a")
+    assert 0 < wait <= 0.1
+    assert buckets.take("b") == 0
+
+
+@pytest.fixture
+def slow_app():
+    """An ASGI app whose /slow requests block until released, behind admission control"""
+    release = asyncio.Event()
+
+    async def slow(request):
+        await release.wait()
+        return PlainTextResponse("done")
+
+    async def health(request):
+        return PlainTextResponse("ok")
+
+    inner = Starlette(routes=[Route("/slow", slow), Route("/health", health), Route("/fast", health)])
+    app = AdmissionMiddleware(
+        inner,
+        routes=inner.routes,
+        controller=AdmissionController(max_concurrency=1, route_concurrency=1, queue_size=0, max_wait=1),
+        buckets=TokenBuckets(rate=1, burst=3),
+        priority=["/health"],
+        client_header="X-Client-Id",
+        retry_after=2,
+    )
+    return app, release
+
+
+def test_overload_is_answered_fast(slow_app):
+    """Beyond the limits: 503 with Retry-After, while the priority lane still answers"""
+    app, release = slow_app
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            running = asyncio.ensure_future(client.get("/slow", headers={"X-Client-Id": "a"}))
+            await asyncio.sleep(0.05)
+
+            shed = await client.get("/fast", headers={"X-Client-Id": "b"})
+            assert shed.status_code == 503
+            assert shed.headers["Retry-After"] == "2"
+            assert (await client.get("/health")).status_code == 200
+
+            release.set()
+            assert (await running).text == "done"
+
+            # Client "a" has used 1 of its 3 tokens, "b" 1 of 3
+            statuses = [(await client.get("/fast", headers={"X-Client-Id": "a"})).status_code for _ in range(3)]
+            assert statuses == [200, 200, 429]
+
+    asyncio.run(scenario())
+
+
+def test_settings_configure_the_app():
+    """Admission control is built from Settings; priority routes bypass it"""
+    app = create_app(Settings(
+        admission_route_limits={"GET /students": 0}, admission_queue_size=0, warmup_paths=[],
+    ))
+    with TestClient(app) as client:
+        response = client.get("/students")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert client.get("/courses").status_code == 200
+        assert client.get("/health").status_code == 200
+        assert client.get("/stats").status_code == 200
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
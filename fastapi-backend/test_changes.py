@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the change log and the GET /changes feed
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_changes.db"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import db_session
+from app.init_db import migrate
+from main import app
+
+migrate()
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def cleanup():
+    yield
+    with db_session() as db:
+        db.query(models.Course).filter(models.Course.course_code.like("CHP%")).delete(synchronize_session=False)
+        db.commit()
+
+
+def latest(client):
+    return client.get("/changes", params={"since": 10 ** 9}).json()["latest_version"]
+
+
+def changes_after(client, since):
+    return [
+        (item["entity"], item["id"], item["op"])
+        for item in client.get("/changes", params={"since": since}).json()["items"]
+    ]
+
+
+def test_writes_are_logged_in_order(client):
+    """Inserts, updates and deletes, including cascaded deletes, appear in commit order"""
+    since = latest(client)
+    student = client.post("/students", json={
+        "student_id": "CH001", "name": "Change", "email": "ch001@example.com"
+    }).json()
+    course = client.post("/courses", json={
+        "course_code": "CH100", "name": "Changes", "credits": 3, "max_students": 10
+    }).json()
+    enrollment = client.post("/enrollments", json={"student_id": student["id"], "course_id": course["id"]}).json()
+    client.put(f"/courses/{course['id']}", json={"name": "Changes 2"})
+    client.put(f"/courses/{course['id']}", json={"name": "Changes 2"})  # nothing changed
+    client.get(f"/courses/{course['id']}/students")
+    client.delete(f"/students/{student['id']}")
+
+    assert changes_after(client, since) == [
+        ("students", student["id"], "insert"),
+        ("courses", course["id"], "insert"),
+        ("enrollments", enrollment["id"], "insert"),
+        ("courses", course["id"], "update"),
+        ("enrollments", enrollment["id"], "delete"),
+        ("students", student["id"], "delete"),
+    ]
+    client.delete(f"/courses/{course['id']}")
+
+
+def test_rolled_back_writes_are_not_logged(client):
+    since = latest(client)
+    with db_session() as db:
+        db.add(models.Student(student_id="CH002", name="Gone", email="ch002@example.com"))
+        db.flush()
+        db.rollback()
+    assert client.post("/students", json={"student_id": "CH003", "name": "Bad", "email": "x"}).status_code == 422
+    assert changes_after(client, since) == []
+
+
+def test_feed_pages_until_latest(client, cleanup):
+    """Following next_since with a small limit visits every version once, in order"""
+    for number in range(5):
+        client.post("/courses", json={
+            "course_code": f"CHP{number}", "name": "Paged", "credits": 1, "max_students": 1
+        })
+    since, versions = 0, []
+    while True:
+        page = client.get("/changes", params={"since": since, "limit": 2}).json()
+        assert len(page["items"]) <= 2
+        versions += [item["version"] for item in page["items"]]
+        since = page["next_since"]
+        if since == page["latest_version"]:
+            break
+    assert versions == sorted(set(versions)) and versions[-1] == since
+    assert len(versions) >= 5
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Tests for registration mode: batched enrollment writes with per-request outcomes
+"""
+import asyncio
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_enrollment_queue.db"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import models
+from app.config import Settings
+from app.database import SessionLocal, db_session, get_engine
+from app.enrollment_queue import EnrollmentQueue, EnrollmentRejected, EnrollmentTimeout
+from app.init_db import migrate
+from main import create_app
+
+migrate()
+
+
+@pytest.fixture
+def course():
+    """A course with 3 seats and 8 students, removed afterwards"""
+    with db_session() as db:
+        course = models.Course(course_code="REG101", name="Registration", credits=3, max_students=3)
+        students = [
+            models.Student(student_id=f"REG{i:04d}", name=f"Student {i}", email=f"reg{i}@example.com")
+            for i in range(8)
+        ]
+        db.add(course)
+        db.add_all(students)
+        db.commit()
+        ids = course.id, [student.id for student in students]
+    yield ids
+    with db_session() as db:
+        db.query(models.Enrollment).filter(models.Enrollment.course_id == ids[0]).delete()
+        db.query(models.Student).filter(models.Student.id.in_(ids[1])).delete()
+        db.query(models.Course).filter(models.Course.id == ids[0]).delete()
+        db.commit()
+
+
+@pytest.fixture
+def enrollment_queue():
+    """A running queue that gathers requests for up to 200 ms"""
+    get_engine()
+    writer = EnrollmentQueue(SessionLocal, batch_size=100, batch_wait_ms=200)
+    writer.start()
+    yield writer
+    writer.stop()
+
+
+def outcome(future):
+    try:
+        return future.result(timeout=10).status
+    except EnrollmentRejected as e:
+        return e.status_code, e.detail
+
+
+def active_count(course_id):
+    with db_session() as db:
+        return db.query(models.Enrollment).filter(
+            models.Enrollment.course_id == course_id,
+            models.Enrollment.status == models.EnrollmentStatus.ACTIVE
+        ).count()
+
+
+def test_batch_is_checked_in_arrival_order(course, enrollment_queue):
+    """Seats taken earlier in the batch count; each caller gets its own answer"""
+    course_id, student_ids = course
+    commits = []
+
+    def count_commit(connection):
+        commits.append(connection)
+
+    event.listen(get_engine(), "commit", count_commit)
+    try:
+        requests = [(student_ids[0], course_id), (student_ids[0], course_id), (0, course_id), (student_ids[1], 0)]
+        requests += [(student_id, course_id) for student_id in student_ids[1:]]
+        futures = [enrollment_queue.submit(student_id, course_id) for student_id, course_id in requests]
+        outcomes = [outcome(future) for future in futures]
+    finally:
+        event.remove(get_engine(), "commit", count_commit)
+
+    assert outcomes[:6] == [
+        "active",
+        (400, "Student is already enrolled in this course"),
+        (404, "Student not found"),
+        (404, "Course not found"),
+        "active",
+        "active",
+    ]
+    assert outcomes[6:] == [(400, "Course is full")] * 5
+    assert len(commits) == 1
+    assert active_count(course_id) == 3
+
+
+def test_dropped_enrollment_is_reactivated(course, enrollment_queue):
+    """A dropped enrollment is reactivated rather than duplicated"""
+    course_id, student_ids = course
+    with db_session() as db:
+        db.add(models.Enrollment(student_id=student_ids[0], course_id=course_id, status=models.EnrollmentStatus.DROPPED))
+        db.commit()
+
+    result = enrollment_queue.submit(student_ids[0], course_id).result(timeout=10)
+    assert result.status == models.EnrollmentStatus.ACTIVE
+    assert active_count(course_id) == 1
+
+
+def test_registration_mode_endpoint(course):
+    """Concurrent POST /enrollments fill the course exactly and get the usual answers"""
+    course_id, student_ids = course
+    with TestClient(create_app(Settings(registration_mode=True, warmup_paths=[]))) as client:
+        with ThreadPoolExecutor(8) as pool:
+            responses = list(pool.map(
+                lambda student_id: client.post("/enrollments", json={"student_id": student_id, "course_id": course_id}),
+                student_ids
+            ))
+        missing = client.post("/enrollments", json={"student_id": student_ids[0], "course_id": 0})
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [201] * 3 + [400] * 5
+    created = [response.json() for response in responses if response.status_code == 201]
+    assert all(item["status"] == "active" and item["enrollment_date"] for item in created)
+    assert {response.json()["detail"] for response in responses if response.status_code == 400} == {"Course is full"}
+    assert missing.status_code == 404
+    assert active_count(course_id) == 3
+
+
+def test_waiting_callers_time_out(course):
+    """A caller gets EnrollmentTimeout instead of waiting for a stuck writer forever"""
+    course_id, student_ids = course
+    stuck, release = threading.Event(), threading.Event()
+
+    def stuck_session():
+        stuck.set()
+        release.wait(10)
+        return SessionLocal()
+
+    writer = EnrollmentQueue(stuck_session, timeout=0.1)
+    writer.start()
+    try:
+        # The writer is stuck on the first request; the second one times out in the queue
+        first = writer.submit(student_ids[0], course_id)
+        assert stuck.wait(10)
+        with pytest.raises(EnrollmentTimeout):
+            asyncio.run(writer.enroll(student_ids[1], course_id))
+    finally:
+        release.set()
+        writer.stop()
+    assert first.result(timeout=10).status == "active"
+    assert active_count(course_id) == 1
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_submit_needs_a_live_writer():
+    """Requests are refused rather than queued for a writer thread that has exited"""
+    writer = EnrollmentQueue(SessionLocal)
+    with pytest.raises(RuntimeError, match="not running"):
+        writer.submit(1, 1)
+    writer.start()
+    writer.stop()
+    with pytest.raises(RuntimeError, match="not running"):
+        writer.submit(1, 1)
+    writer.start()
+    writer._requests.put(object())  # not a request: the writer thread dies on it
+    writer._thread.join(10)
+    with pytest.raises(RuntimeError, match="not running"):
+        writer.submit(1, 1)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
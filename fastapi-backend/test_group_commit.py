@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Tests for group commit: concurrent writes share a commit, each keeps its own outcome
+"""
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_group_commit.db"
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.exc import OperationalError
+
+from app import models
+from app.config import Settings
+from app.database import db_session, get_engine
+from app.group_commit import GroupCommitter
+from app.init_db import migrate
+from main import create_app
+
+migrate()
+
+
+@pytest.fixture
+def client():
+    """Client of an app whose write batches stay open for 300 ms"""
+    app = create_app(Settings(group_commit=True, group_commit_window_ms=300, warmup_paths=[]))
+    with TestClient(app) as client:
+        yield client
+    with db_session() as db:
+        db.query(models.Student).filter(models.Student.student_id.like("GC%")).delete(synchronize_session=False)
+        db.query(models.Course).filter(models.Course.course_code.like("GC%")).delete(synchronize_session=False)
+        db.commit()
+
+
+@pytest.fixture
+def commits():
+    """Transactions committed on the engine while the test runs"""
+    committed = []
+
+    def count_commit(connection):
+        committed.append(connection)
+
+    event.listen(get_engine(), "commit", count_commit)
+    yield committed
+    event.remove(get_engine(), "commit", count_commit)
+
+
+def student(number, email=None):
+    return {"student_id": f"GC{number:04d}", "name": f"Group {number}", "email": email or f"gc{number}@example.com"}
+
+
+def test_concurrent_writes_share_one_commit(client, commits):
+    """Each request gets its own answer; a failed one does not undo the others"""
+    bodies = [student(1), student(2), student(3, email="gc1@example.com"), student(4)]
+    with ThreadPoolExecutor(len(bodies)) as pool:
+        responses = list(pool.map(lambda body: client.post("/students", json=body), bodies))
+
+    by_id = {body["student_id"]: response for body, response in zip(bodies, responses)}
+    failed = [response for response in responses if response.status_code == 400]
+    assert len(failed) == 1 and failed[0].json()["detail"] in ("Email already exists", "Student ID already exists")
+    assert sorted(response.status_code for response in responses) == [201, 201, 201, 400]
+    assert len(commits) == 1
+    assert by_id["GC0002"].json()["email"] == "gc2@example.com"
+    assert client.get("/students", params={"search": "Group"}).json()["total"] == 3
+
+
+def test_handler_errors_and_response_models(client):
+    """404s, updates and deletes behave as without group commit"""
+    assert client.put("/students/999999", json={"name": "Nobody"}).status_code == 404
+    assert client.delete("/courses/999999").status_code == 404
+
+    response = client.post("/courses", json={"course_code": "GC101", "name": "Batched", "credits": 3, "max_students": 5})
+    assert response.status_code == 201
+    course = response.json()
+    assert (course["enrolled_count"], course["available_seats"]) == (0, 5)
+
+    created = client.post("/students", json=student(5)).json()
+    enrollment = client.post("/enrollments", json={"student_id": created["id"], "course_id": course["id"]})
+    assert enrollment.status_code == 201
+    assert client.put(f"/courses/{course['id']}", json={"max_students": 1}).json()["available_seats"] == 0
+
+    dropped = client.put(f"/enrollments/{enrollment.json()['id']}", json={"status": "dropped"})
+    assert dropped.json()["status"] == "dropped"
+    assert client.delete(f"/students/{created['id']}").status_code == 204
+    assert client.get(f"/students/{created['id']}").status_code == 404
+
+
+def test_statements_count_towards_the_request(client):
+    """Statements run on the writer thread are attributed to their request"""
+    response = client.post("/students", json=student(6))
+    assert response.status_code == 201
+    assert int(response.headers["X-DB-Query-Count"]) >= 2
+
+
+@pytest.fixture
+def locked():
+    """Write lock held by another connection until the test releases it"""
+    holder = sqlite3.connect(get_engine().url.database, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    yield holder
+    if holder.in_transaction:
+        holder.rollback()
+    holder.close()
+    with db_session() as db:
+        db.query(models.Course).filter(models.Course.course_code.like("GC%")).delete(synchronize_session=False)
+        db.commit()
+
+
+def add_course(code):
+    def work(db):
+        course = models.Course(course_code=code, name="Locked", credits=1, max_students=1)
+        db.add(course)
+        db.flush()
+        return course.id
+
+    return work
+
+
+def test_writer_survives_a_locked_database(locked):
+    """A batch that cannot take the write lock fails; the next batch still commits"""
+    engine = create_engine(get_engine().url, connect_args={"timeout": 0.1})
+    committer = GroupCommitter(engine, window_ms=0, timeout=5)
+    committer.start()
+    try:
+        with pytest.raises(OperationalError, match="locked"):
+            committer.run(add_course("GC201"))
+        locked.rollback()
+        assert committer.run(add_course("GC202"))
+    finally:
+        committer.stop()
+        engine.dispose()
+    with db_session() as db:
+        codes = db.scalars(select(models.Course.course_code).where(models.Course.course_code.like("GC2%"))).all()
+    assert codes == ["GC202"]
+
+
+def test_waiting_callers_time_out(locked):
+    """Callers get 503 instead of waiting for the lock forever"""
+    engine = create_engine(get_engine().url, connect_args={"timeout": 1})
+    committer = GroupCommitter(engine, window_ms=0, timeout=0.1)
+    committer.start()
+    try:
+        with pytest.raises(HTTPException) as error:
+            committer.run(add_course("GC301"))
+        assert error.value.status_code == 503
+    finally:
+        locked.rollback()
+        committer.stop()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
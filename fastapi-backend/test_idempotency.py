@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests for Idempotency-Key replays, coalescing and the key stores
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_idempotency.db"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import db_session
+from app.idempotency import IdempotencyMiddleware, MemoryIdempotencyStore, SQLiteIdempotencyStore, StoredResponse
+from app.init_db import migrate
+from main import app
+
+migrate()
+client = TestClient(app)
+
+
+@pytest.fixture
+def course():
+    """A course with one seat, removed afterwards with its students"""
+    with db_session() as db:
+        course = models.Course(course_code="IDEM101", name="Retries", credits=3, max_students=1)
+        db.add(course)
+        db.commit()
+        course_id = course.id
+    yield course_id
+    with db_session() as db:
+        db.query(models.Enrollment).filter(models.Enrollment.course_id == course_id).delete()
+        db.query(models.Student).filter(models.Student.student_id.like("IDEM%")).delete(synchronize_session=False)
+        db.query(models.Course).filter(models.Course.id == course_id).delete()
+        db.commit()
+
+
+def student(number):
+    return {"student_id": f"IDEM{number:04d}", "name": f"Retry {number}", "email": f"idem{number}@example.com"}
+
+
+def test_retry_is_replayed_without_running_the_endpoint(course):
+    """The same key gets the first response back, and no SQL runs for it"""
+    headers = {"Idempotency-Key": "create-student-1"}
+    first = client.post("/students", json=student(1), headers=headers)
+    retry = client.post("/students", json=student(1), headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "X-DB-Query-Count" in first.headers and "X-DB-Query-Count" not in retry.headers
+
+    # Without a key the retry is a duplicate, as before
+    assert client.post("/students", json=student(1)).status_code == 400
+
+
+def test_key_reused_for_a_different_request(course):
+    """A key is bound to the request it was first used with"""
+    headers = {"Idempotency-Key": "create-student-2"}
+    assert client.post("/students", json=student(2), headers=headers).status_code == 201
+    response = client.post("/students", json=student(3), headers=headers)
+    assert response.status_code == 422
+    # ...but only on the same method and path
+    assert client.put("/students/1", json={"name": "Renamed"}, headers=headers).status_code != 422
+
+
+def test_concurrent_retries_are_coalesced(course):
+    """Simultaneous requests with one key enroll once and all see the same answer"""
+    student_id = client.post("/students", json=student(4)).json()["id"]
+    body = {"student_id": student_id, "course_id": course}
+    headers = {"Idempotency-Key": "enroll-4"}
+    # One event loop, as in a worker process
+    with TestClient(app) as worker, ThreadPoolExecutor(6) as pool:
+        responses = list(pool.map(lambda _: worker.post("/enrollments", json=body, headers=headers), range(6)))
+
+    assert [response.status_code for response in responses] == [201] * 6
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert sum(response.headers.get("Idempotent-Replayed") == "true" for response in responses) == 5
+
+
+def test_client_errors_are_replayed_but_server_errors_are_not():
+    """A 4xx is the request's outcome; after a 5xx the request runs again"""
+    headers = {"Idempotency-Key": "missing-course"}
+    first = client.put("/courses/999999", json={"name": "Nothing"}, headers=headers)
+    retry = client.put("/courses/999999", json={"name": "Nothing"}, headers=headers)
+    assert first.status_code == retry.status_code == 404
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+    calls = []
+
+    async def failing(scope, receive, send):
+        calls.append(scope["path"])
+        await send({"type": "http.response.start", "status": 503, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    flaky = TestClient(IdempotencyMiddleware(failing, MemoryIdempotencyStore()))
+    for _ in range(2):
+        assert flaky.post("/flaky", headers={"Idempotency-Key": "k"}).status_code == 503
+    assert len(calls) == 2
+
+
+def test_memory_store_is_bounded_and_expires():
+    """Oldest keys are evicted beyond max_keys; finished keys expire after ttl"""
+    store = MemoryIdempotencyStore(max_keys=2, ttl=0.05)
+    response = StoredResponse(201, [], b"{}")
+    for key in ("a", "b", "c"):
+        assert store.reserve(key, "f") is None
+        store.complete(key, "f", response)
+    assert len(store) == 2 and store.get("a") is None
+    assert store.reserve("c", "f").response == response
+    time.sleep(0.06)
+    assert store.reserve("c", "f") is None
+
+
+def test_sqlite_store_is_shared_between_workers():
+    """Two stores on one file see each other's keys, as two workers would"""
+    path = os.path.join(tempfile.mkdtemp(), "keys.db")
+    first, second = SQLiteIdempotencyStore(path), SQLiteIdempotencyStore(path, max_keys=1)
+    response = StoredResponse(201, [(b"content-type", b"application/json")], b'{"id": 1}')
+
+    assert first.reserve("k", "f") is None
+    assert second.reserve("k", "f").response is None  # in progress elsewhere
+    first.complete("k", "f", response)
+    assert second.reserve("k", "f").response == response
+
+    second.reserve("other", "f")
+    second.complete("other", "f", response)
+    assert second.sweep() == 1 and len(second) == 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
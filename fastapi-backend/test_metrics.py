@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+In-process tests for the Prometheus /metrics endpoint
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_metrics.db"
+
+from fastapi.testclient import TestClient
+
+from app.init_db import migrate
+from main import app
+
+migrate()
+client = TestClient(app)
+
+
+def scrape():
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    return response.text
+
+
+def sample(text, prefix):
+    """Value of the first sample line starting with ``prefix``"""
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_route_latency_uses_path_template():
+    """Requests are labelled with the route template, not the raw path"""
+    client.get("/students/999999")
+    client.get("/students/999998")
+    text = scrape()
+    assert sample(text, 'http_request_duration_seconds_count{method="GET",route="/students/{student_id}"}') >= 2
+    assert 'route="/students/999999"' not in text
+    assert sample(text, 'http_request_errors_total{method="GET",route="/students/{student_id}",status="404"}') >= 2
+
+
+def test_unmatched_and_scrapes_are_grouped():
+    """Unknown paths share one label and /metrics does not record itself"""
+    client.get("/no-such-page")
+    text = scrape()
+    assert sample(text, 'http_request_duration_seconds_count{method="GET",route="unmatched"}') >= 1
+    assert 'route="/metrics"' not in text
+
+
+def test_pool_stats():
+    """Every request using the database checks out a connection and returns it"""
+    before = sample(scrape(), "db_pool_checkouts_total")
+    client.get("/students")
+    text = scrape()
+    assert sample(text, "db_pool_checkouts_total") > before
+    assert sample(text, "db_pool_checkout_wait_seconds_count") >= 1
+    assert sample(text, "db_pool_checked_out") == 0
+    assert sample(text, "http_requests_in_flight") == 0
+
+
+if __name__ == "__main__":
+    test_route_latency_uses_path_template()
+    test_unmatched_and_scrapes_are_grouped()
+    test_pool_stats()
+    print("All metrics tests passed!")
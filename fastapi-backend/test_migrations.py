@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Tests for the Alembic migrations and the enrollment indexes they add
+"""
+import os
+import re
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_migrations.db"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal, get_engine
+from app.init_db import current_revision, head_revision, migrate
+from main import app
+
+migrate()
+client = TestClient(app)
+
+NEW_INDEXES = {"ix_enrollments_course_status", "ix_enrollments_student_status", "ix_enrollments_status_course"}
+
+
+@contextmanager
+def captured_statements():
+    """(statement, parameters) of every SELECT run while the block executes"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    engine = get_engine()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def enrollment_searches(statements):
+    """(index, constrained columns) of every index search on enrollments"""
+    searches = set()
+    with get_engine().connect() as connection:
+        for statement, parameters in statements:
+            for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters):
+                match = re.match(r"SEARCH enrollments USING (?:COVERING )?INDEX (\w+) \((.*)\)", row[3])
+                if match:
+                    index, constraints = match.groups()
+                    searches.add((index, frozenset(re.findall(r"(\w+)=\?", constraints))))
+    return searches
+
+
+@pytest.fixture
+def enrollment():
+    """A student enrolled in a course, removed afterwards"""
+    db = SessionLocal()
+    student = models.Student(student_id="MIG0001", name="Index Student", email="index@example.com")
+    course = models.Course(course_code="MIG101", name="Indexing", credits=3, max_students=10)
+    db.add_all([student, course])
+    db.flush()
+    db.add(models.Enrollment(student_id=student.id, course_id=course.id, status="active"))
+    db.commit()
+    yield student.id, course.id
+    db.delete(student)
+    db.delete(course)
+    db.commit()
+    db.close()
+
+
+def test_fresh_database_is_at_head():
+    """migrate() applies every revision and the schema has the new indexes"""
+    assert current_revision() == head_revision()
+    names = {index["name"] for index in inspect(get_engine()).get_indexes("enrollments")}
+    assert NEW_INDEXES <= names
+
+
+def test_create_all_database_is_stamped():
+    """Databases built by create_all are adopted at the baseline revision"""
+    engine = create_engine(f"sqlite:///{tempfile.mkdtemp()}/legacy.db")
+    migrate(engine, "0001")
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE alembic_version"))
+
+    migrate(engine)
+    assert current_revision(engine) == head_revision()
+    names = {index["name"] for index in inspect(engine).get_indexes("enrollments")}
+    assert "ix_enrollments_status_course" in names
+    engine.dispose()
+
+
+@pytest.mark.parametrize("path, columns", [
+    ("/enrollments/course/{course_id}?status=active", {"course_id", "status"}),
+    ("/enrollments/student/{student_id}?status=active", {"student_id", "status"}),
+    ("/enrollments?status=dropped", {"status"}),
+    ("/stats", {"status"}),
+    ("/students/{student_id}/eligible-courses", {"status"}),
+])
+def test_hot_queries_use_indexes(enrollment, path, columns):
+    """The enrollment filters of these endpoints are index searches on all their columns"""
+    student_id, course_id = enrollment
+    with captured_statements() as statements:
+        response = client.get(path.format(student_id=student_id, course_id=course_id))
+    assert response.status_code == 200
+    searches = enrollment_searches(statements)
+    assert any(index in NEW_INDEXES and constrained == columns for index, constrained in searches), searches
+
+
+def test_status_codes_migration():
+    """0003 turns status strings into codes that read back as EnrollmentStatus"""
+    engine = create_engine(f"sqlite:///{tempfile.mkdtemp()}/status.db")
+    migrate(engine, "0002")
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO students (id, student_id, name, email) VALUES (1, 'S1', 'A', 'a@x.com')"))
+        connection.execute(text("INSERT INTO courses (id, course_code, name, credits, max_students) VALUES (1, 'C1', 'C', 3, 5), (2, 'C2', 'D', 3, 5)"))
+        connection.execute(text("INSERT INTO enrollments (student_id, course_id, status) VALUES (1, 1, 'dropped'), (1, 2, 'active')"))
+
+    migrate(engine)
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT status FROM enrollments ORDER BY course_id")).scalars().all() == [2, 1]
+    with Session(engine) as db:
+        statuses = [e.status for e in db.query(models.Enrollment).order_by(models.Enrollment.course_id)]
+        assert statuses == [models.EnrollmentStatus.DROPPED, models.EnrollmentStatus.ACTIVE]
+        assert db.query(models.Enrollment).filter(models.Enrollment.status == "dropped").count() == 1
+    with pytest.raises(IntegrityError), engine.begin() as connection:
+        connection.execute(text("UPDATE enrollments SET status = 9"))
+    engine.dispose()
+
+
+def test_status_codes_migration_rejects_null_status():
+    """NULL statuses, possible in old hand-made schemas, stop 0003 before any change"""
+    path = os.path.join(tempfile.mkdtemp(), "null_status.db")
+    engine = create_engine(f"sqlite:///{path}")
+    migrate(engine, "0002")
+    engine.dispose()
+    with sqlite3.connect(path) as connection:
+        connection.execute("PRAGMA writable_schema = ON")
+        connection.execute(
+            "UPDATE sqlite_master SET sql = replace(sql, 'status VARCHAR(20) NOT NULL', 'status VARCHAR(20)')"
+            " WHERE name = 'enrollments'"
+        )
+    with sqlite3.connect(path) as connection:
+        connection.execute("INSERT INTO students (id, student_id, name, email) VALUES (1, 'S1', 'A', 'a@x.com')")
+        connection.execute("INSERT INTO courses (id, course_code, name, credits, max_students) VALUES (1, 'C1', 'C', 3, 5)")
+        connection.execute("INSERT INTO enrollments (student_id, course_id, status) VALUES (1, 1, NULL)")
+
+    engine = create_engine(f"sqlite:///{path}")
+    with pytest.raises(RuntimeError, match=r"unknown status values: \[None\]"):
+        migrate(engine)
+    assert current_revision(engine) == "0002"
+    engine.dispose()
+
+
+def test_status_is_a_string_at_the_api(enrollment):
+    """Clients still send and receive the status names"""
+    student_id, course_id = enrollment
+    item = client.get(f"/enrollments/course/{course_id}").json()["items"][0]
+    assert item["status"] == "active"
+    assert client.put(f"/enrollments/{item['id']}", json={"status": "paused"}).status_code == 422
+    assert client.get("/enrollments", params={"status": "paused"}).status_code == 422
+    response = client.put(f"/enrollments/{item['id']}", json={"status": "dropped"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "dropped"
+
+
+if __name__ == "__main__":
+    test_fresh_database_is_at_head()
+    test_create_all_database_is_stamped()
+    test_status_codes_migration()
+    test_status_codes_migration_rejects_null_status()
+    print("All migration tests passed!")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Smoke load test for the multi-worker production launcher
+
+Starts ``gunicorn -c gunicorn.conf.py main:app`` with two workers on a free
+port and a temporary database, waits for ``/ready`` and then runs
+concurrent reads and writes against it.
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def request(url, method="GET", payload=None, headers=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    req = urllib.request.Request(url, data=data, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read() or b"null")
+
+
+def wait_until_ready(base_url, process, deadline=30):
+    end = time.monotonic() + deadline
+    while time.monotonic() < end:
+        assert process.poll() is None, "gunicorn exited during startup"
+        try:
+            status, body = request(f"{base_url}/ready")
+            if status == 200:
+                return body
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise AssertionError("backend never became ready")
+
+
+def test_multi_worker_smoke_load():
+    """Two workers serve concurrent reads and writes on a WAL database"""
+    directory = tempfile.mkdtemp()
+    database = os.path.join(directory, "production.db")
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{database}",
+        BACKEND_BIND=f"127.0.0.1:{port}",
+        WEB_CONCURRENCY="2",
+        SLOW_QUERY_THRESHOLD_MS="0",
+        IDEMPOTENCY_STORE=os.path.join(directory, "idempotency.db"),
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        assert wait_until_ready(base_url, process) == {"status": "ready"}
+
+        def create(n):
+            return request(f"{base_url}/students", "POST", {
+                "student_id": f"LOAD{n:04d}", "name": f"Load Student {n}", "email": f"load{n}@example.com",
+            })[0]
+
+        def read(n):
+            path = ("/students?limit=5", "/courses?limit=5", "/stats", "/health")[n % 4]
+            return request(f"{base_url}{path}")[0]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            writes = list(pool.map(create, range(40)))
+            reads = list(pool.map(read, range(200)))
+
+        assert writes == [201] * 40
+        assert reads == [200] * 200
+        assert request(f"{base_url}/stats")[1]["total_students"] == 40
+        assert os.path.exists(database + "-wal")
+
+        # Retries are replayed by whichever worker they reach
+        def create_with_key(_):
+            return request(f"{base_url}/courses", "POST", {
+                "course_code": "LOAD101", "name": "Retried", "credits": 3, "max_students": 10,
+            }, headers={"Idempotency-Key": "load-course"})
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            retries = list(pool.map(create_with_key, range(8)))
+        assert {status for status, _ in retries} == {201}
+        assert len({body["id"] for _, body in retries}) == 1
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    test_multi_worker_smoke_load()
+    print("All production launcher tests passed!")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+In-process tests for on-demand request profiling
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_profiling.db"
+
+from fastapi.testclient import TestClient
+
+from app.profiling import ProfilingMiddleware
+from app.init_db import migrate
+from main import app
+
+migrate()
+
+PROFILE_DIR = tempfile.mkdtemp()
+
+
+def profiled_client(**kwargs):
+    """The API wrapped in a profiling middleware writing to PROFILE_DIR"""
+    options = {"token": "secret", "directory": PROFILE_DIR, "interval": 0.0005}
+    options.update(kwargs)
+    return TestClient(ProfilingMiddleware(app, **options))
+
+
+def test_token_header_and_query():
+    """Only requests carrying the right token are profiled"""
+    client = profiled_client()
+    assert "X-Profile-Report" not in client.get("/students").headers
+    assert "X-Profile-Report" not in client.get("/students", headers={"X-Profile-Token": "wrong"}).headers
+
+    # Requests take a few ms, so a single one may be too short to be sampled
+    # inside the endpoint; the threadpool thread must show up eventually
+    for _ in range(50):
+        response = client.get("/students", headers={"X-Profile-Token": "secret"})
+        assert response.status_code == 200
+        report = os.path.join(PROFILE_DIR, response.headers["X-Profile-Report"])
+        with open(report) as f:
+            lines = f.read().splitlines()
+        # Folded stacks: "frame;frame;... count"
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+        if any("list_students (main.py:" in line for line in lines):
+            break
+    else:
+        raise AssertionError("endpoint thread never sampled")
+
+    response = client.get("/students", params={"profile": "secret"})
+    assert "X-Profile-Report" in response.headers
+
+
+def test_non_ascii_tokens_are_rejected():
+    """Tokens that are not ASCII do not match, and do not break the request"""
+    client = profiled_client()
+    response = client.get("/health", params={"profile": "é"})
+    assert response.status_code == 200 and "X-Profile-Report" not in response.headers
+    response = client.get("/health", headers={"X-Profile-Token": "é".encode("latin-1")})
+    assert response.status_code == 200 and "X-Profile-Report" not in response.headers
+
+
+def test_sampling_and_rotation():
+    """Every Nth request is profiled and only the newest reports are kept"""
+    directory = tempfile.mkdtemp()
+    client = profiled_client(token="", sample_every=2, directory=directory, keep=2)
+    reported = [bool(client.get("/health").headers.get("X-Profile-Report")) for _ in range(8)]
+    assert reported == [False, True] * 4
+    assert len(os.listdir(directory)) == 2
+
+
+if __name__ == "__main__":
+    test_token_header_and_query()
+    test_non_ascii_tokens_are_rejected()
+    test_sampling_and_rotation()
+    print("All profiling tests passed!")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+In-process tests for per-request query counting and N+1 detection
+"""
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_query_stats.db"
+
+from fastapi.testclient import TestClient
+
+from app.query_stats import assert_max_queries, count_queries
+from app.init_db import migrate
+from main import app
+
+migrate()
+client = TestClient(app)
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@contextmanager
+def course_with_students(count):
+    """A course with ``count`` active students, removed again afterwards
+
+    The database may be shared with other in-process test modules, so the
+    fixture does not outlive the test that uses it.
+    """
+    course = client.post("/courses", json={
+        "course_code": "QS100", "name": "Query Stats", "credits": 3, "max_students": 50
+    }).json()
+    students = []
+    for i in range(count):
+        student = client.post("/students", json={
+            "student_id": f"QS{i:03d}", "name": f"Stats Student {i}", "email": f"stats{i}@example.com"
+        }).json()
+        client.post("/enrollments", json={"student_id": student["id"], "course_id": course["id"]})
+        students.append(student)
+    try:
+        yield course
+    finally:
+        for student in students:
+            client.delete(f"/students/{student['id']}")
+        client.delete(f"/courses/{course['id']}")
+
+
+def test_debug_headers():
+    """Debug responses report the statement count and DB time"""
+    response = client.get("/courses")
+    assert response.status_code == 200
+    assert int(response.headers["X-DB-Query-Count"]) >= 1
+    assert float(response.headers["X-DB-Time-Ms"]) >= 0
+
+    response = client.get("/health")
+    assert response.headers["X-DB-Query-Count"] == "0"
+
+
+def test_n_plus_one_is_logged():
+    """Loading each enrolled student separately is reported once per statement"""
+    handler = RecordingHandler()
+    logger = logging.getLogger("app.query_stats")
+    logger.addHandler(handler)
+    try:
+        with course_with_students(6) as course:
+            response = client.get(f"/courses/{course['id']}/students")
+    finally:
+        logger.removeHandler(handler)
+    assert response.status_code == 200
+    assert any(
+        message.startswith("Suspected N+1: GET /courses/{course_id}/students")
+        for message in handler.messages
+    ), handler.messages
+
+
+def test_count_queries():
+    """count_queries sees statements issued from the server thread"""
+    with count_queries() as stats:
+        client.get("/students")
+    assert stats.count >= 1
+    assert sum(stats.statements.values()) == stats.count
+
+
+def test_assert_max_queries():
+    """The helper passes within budget and lists statements when over it"""
+    with assert_max_queries(1):
+        client.get("/health")
+
+    try:
+        with course_with_students(3) as course, assert_max_queries(1):
+            client.get(f"/courses/{course['id']}/students")
+    except AssertionError as e:
+        assert "Expected at most 1 queries" in str(e)
+    else:
+        raise AssertionError("assert_max_queries did not fail")
+
+
+if __name__ == "__main__":
+    test_debug_headers()
+    test_n_plus_one_is_logged()
+    test_count_queries()
+    test_assert_max_queries()
+    print("All query stats tests passed!")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the read/write split: read-only pool, replica reads and read-your-writes
+"""
+import os
+import sqlite3
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_read_split.db"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from app import database, models
+from app.config import Settings
+from app.database import db_session, get_engine, read_only_url
+from app.init_db import migrate
+from app.read_split import LAST_WRITE_COOKIE
+from main import create_app
+
+migrate()
+
+
+@pytest.fixture
+def cleanup():
+    yield
+    with db_session() as db:
+        db.query(models.Student).filter(models.Student.student_id.like("RS%")).delete(synchronize_session=False)
+        db.commit()
+
+
+def student(number):
+    return {"student_id": f"RS{number:03d}", "name": f"Reader {number}", "email": f"rs{number}@example.com"}
+
+
+def copy_database(target):
+    """Snapshot the primary database into ``target``, like a replication tool would"""
+    with sqlite3.connect(get_engine().url.database) as source, sqlite3.connect(target) as replica:
+        source.backup(replica)
+
+
+def test_get_handlers_use_the_read_only_pool(cleanup):
+    """GETs check out read-only connections and see writes made just before"""
+    with TestClient(create_app(Settings(warmup_paths=[]))) as client:
+        created = client.post("/students", json=student(1)).json()
+        assert LAST_WRITE_COOKIE not in client.cookies
+
+        checkouts = []
+        event.listen(database.read_engine, "checkout", lambda *args: checkouts.append(args))
+        assert client.get(f"/students/{created['id']}").json()["student_id"] == "RS001"
+        assert checkouts
+
+        with database.read_engine.connect() as connection:
+            assert connection.execute(text("PRAGMA query_only")).scalar() == 1
+            with pytest.raises(OperationalError, match="readonly"):
+                connection.execute(text("DELETE FROM students"))
+
+
+def test_replica_reads_follow_writes(cleanup):
+    """Reads go to the replica, except for a client that has just written"""
+    replica = os.path.join(tempfile.mkdtemp(), "replica.db")
+    app = create_app(Settings(read_replica_url=f"sqlite:///{replica}", warmup_paths=[]))
+    with TestClient(app) as client:
+        copy_database(replica)
+        created = client.post("/students", json=student(2))
+        assert created.status_code == 201
+        assert LAST_WRITE_COOKIE in created.cookies
+        path = f"/students/{created.json()['id']}"
+
+        # The writer reads the primary; others read the replica, which lags
+        assert client.get(path).status_code == 200
+        client.cookies.clear()
+        assert client.get(path).status_code == 404
+
+        copy_database(replica)
+        assert client.get(path).status_code == 200
+
+
+def test_in_memory_databases_have_no_read_only_url():
+    assert read_only_url("sqlite://") is None
+    assert read_only_url("sqlite:///./app.db").endswith("file%3A./app.db?mode=ro&uri=true")
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
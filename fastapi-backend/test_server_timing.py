@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+In-process tests for the Server-Timing response header
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_server_timing.db"
+
+from fastapi.testclient import TestClient
+
+from app.init_db import migrate
+from main import app
+
+migrate()
+client = TestClient(app)
+
+
+def parse_server_timing(header):
+    entries = {}
+    for entry in header.split(","):
+        name, _, duration = entry.strip().partition(";dur=")
+        entries[name] = float(duration)
+    return entries
+
+
+def test_endpoint_breakdown():
+    """Routed requests report db, serialize and total in milliseconds"""
+    response = client.get("/students")
+    assert response.status_code == 200
+    timing = parse_server_timing(response.headers["Server-Timing"])
+    assert set(timing) == {"db", "serialize", "total"}
+    assert timing["db"] > 0
+    assert timing["db"] + timing["serialize"] <= timing["total"]
+
+
+def test_unrouted_request():
+    """Requests that never reach an endpoint have no serialize entry"""
+    response = client.get("/no-such-page")
+    timing = parse_server_timing(response.headers["Server-Timing"])
+    assert set(timing) == {"db", "total"}
+
+
+if __name__ == "__main__":
+    test_endpoint_breakdown()
+    test_unrouted_request()
+    print("All Server-Timing tests passed!")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for sharding students and enrollments across SQLite files
+"""
+import os
+import sqlite3
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_sharding.db"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.database import dispose_engine, init_engine
+from app.init_db import migrate_all
+from app.sharding import shard_of
+from main import create_app
+
+SHARDS = 3
+
+
+@pytest.fixture(scope="module")
+def files():
+    """Catalog and shard database files, migrated"""
+    directory = tempfile.mkdtemp()
+    catalog = os.path.join(directory, "catalog.db")
+    shards = [os.path.join(directory, f"shard{number}.db") for number in range(SHARDS)]
+    dispose_engine()
+    init_engine(f"sqlite:///{catalog}", [f"sqlite:///{path}" for path in shards])
+    migrate_all()
+    yield catalog, shards
+    dispose_engine()
+
+
+@pytest.fixture(scope="module")
+def client(files):
+    catalog, shards = files
+    app = create_app(Settings(shard_urls=[f"sqlite:///{path}" for path in shards], warmup_paths=[]))
+    with TestClient(app) as client:
+        students = [
+            client.post("/students", json={
+                "student_id": f"SH{number:03d}", "name": f"Shard {number}", "email": f"sh{number}@example.com"
+            }).json()
+            for number in range(12)
+        ]
+        course = client.post("/courses", json={
+            "course_code": "SH100", "name": "Sharded", "credits": 3, "max_students": 3
+        }).json()
+        yield client, students, course
+
+
+def rows(path, sql):
+    with sqlite3.connect(path) as connection:
+        return connection.execute(sql).fetchall()
+
+
+def test_students_live_in_the_shard_of_their_id(files, client):
+    """Ids are unique across shards, and each row is stored only in its shard"""
+    (catalog, shards), (api, students, course) = files, client
+    ids = [student["id"] for student in students]
+    assert len(set(ids)) == 12
+    for number, path in enumerate(shards):
+        assert {row[0] for row in rows(path, "SELECT id FROM students")} == {
+            student_id for student_id in ids if shard_of(student_id, SHARDS) == number
+        }
+        assert rows(path, "SELECT count(*) FROM courses") == [(0,)]
+    assert rows(catalog, "SELECT count(*) FROM students") == [(0,)]
+    assert rows(catalog, "SELECT course_code FROM courses") == [("SH100",)]
+
+    assert api.get(f"/students/{ids[5]}").json()["student_id"] == students[5]["student_id"]
+    duplicate = api.post("/students", json={"student_id": "SH999", "name": "Copy", "email": "sh7@example.com"})
+    assert duplicate.status_code == 400
+
+
+def test_lists_merge_pages_across_shards(client):
+    """Offset pages are merged by id; totals are summed over the shards"""
+    api, students, course = client
+    ids = sorted(student["id"] for student in students)
+    pages = [api.get("/students", params={"skip": skip, "limit": 5}).json() for skip in (0, 5, 10)]
+    assert [page["total"] for page in pages] == [12, 12, 12]
+    assert [item["id"] for page in pages for item in page["items"]] == ids
+
+    found = api.get("/students", params={"search": "sh1"}).json()
+    assert sorted(item["student_id"] for item in found["items"]) == ["SH001", "SH010", "SH011"]
+    assert found["total"] == 3
+    assert api.get("/stats").json()["total_students"] == 12
+
+
+def test_enrollments_across_shards(client):
+    """Seat counts, enrollment lists and writes work for students on different shards"""
+    api, students, course = client
+    enrolled = students[:3]
+    assert len({shard_of(student["id"], SHARDS) for student in students}) > 1
+    enrollments = [
+        api.post("/enrollments", json={"student_id": student["id"], "course_id": course["id"]}).json()
+        for student in enrolled
+    ]
+    assert all(shard_of(e["id"], SHARDS) == shard_of(e["student_id"], SHARDS) for e in enrollments)
+
+    full = api.post("/enrollments", json={"student_id": students[3]["id"], "course_id": course["id"]})
+    assert full.json()["detail"] == "Course is full"
+    assert api.get(f"/courses/{course['id']}").json()["enrolled_count"] == 3
+    listed = api.get(f"/enrollments/course/{course['id']}", params={"limit": 2}).json()
+    assert listed["total"] == 3 and len(listed["items"]) == 2
+    assert api.get("/stats").json()["active_enrollments"] == 3
+
+    page = api.get(f"/students/{enrolled[1]['id']}/enrollment-page").json()
+    assert [e["course"]["enrolled_count"] for e in page["enrollments"]] == [3]
+    assert page["eligible_courses"] == []
+
+    dropped = api.put(f"/enrollments/{enrollments[1]['id']}", json={"status": "dropped"})
+    assert dropped.json()["status"] == "dropped"
+    eligible = api.get(f"/students/{students[3]['id']}/eligible-courses").json()
+    assert [c["available_seats"] for c in eligible["items"]] == [1]
+    assert api.get(f"/enrollments/student/{enrolled[1]['id']}").json()["total"] == 1
+    assert api.delete(f"/enrollments/{enrollments[1]['id']}").status_code == 204
+    assert api.get(f"/courses/{course['id']}/students").json()["enrolled_count"] == 2
+
+
+def test_single_database_features_are_rejected():
+    with pytest.raises(ValueError):
+        create_app(Settings(shard_urls=["sqlite:///unused.db"], group_commit=True))
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight coalescing of identical concurrent GET requests
+"""
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_single_flight.db"
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from starlette.responses import JSONResponse
+from starlette.routing import Route, Router
+
+from app import models
+from app.database import db_session
+from app.init_db import migrate
+from app.read_split import LAST_WRITE_COOKIE
+from app.single_flight import SingleFlightMiddleware, flight_key
+from main import app
+
+migrate()
+
+
+def samples(route, role):
+    return REGISTRY.get_sample_value("single_flight_requests_total", {"route": route, "role": role}) or 0
+
+
+@pytest.fixture
+def counting_app():
+    """/items/{id} and /other answer after 50 ms and count how often they ran"""
+    calls = []
+
+    async def item(request):
+        calls.append(request.url.path)
+        await asyncio.sleep(0.05)
+        if request.path_params["id"] == "broken":
+            raise RuntimeError("leader failed")
+        return JSONResponse({"id": request.path_params["id"], "query": dict(request.query_params)})
+
+    # A bare router, so exceptions reach the middleware as in the app
+    inner = Router(routes=[Route("/items/{id}", item), Route("/other/{id}", item)])
+    return SingleFlightMiddleware(inner, routes=inner.routes, coalesced=["/items/{id}"]), calls
+
+
+def gather(app, *paths):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.get(path) for path in paths))
+
+    return asyncio.run(scenario())
+
+
+def test_identical_requests_share_one_flight(counting_app):
+    """One leader runs; followers get its bytes, marked X-Coalesced"""
+    app, calls = counting_app
+    before = samples("/items/{id}", "follower")
+    responses = gather(app, *["/items/1?b=2&a=1", "/items/1?a=1&b=2"] * 3)
+
+    assert calls == ["/items/1"]
+    assert {response.content for response in responses} == {responses[0].content}
+    assert sum(response.headers.get("X-Coalesced") == "true" for response in responses) == 5
+    assert samples("/items/{id}", "follower") - before == 5
+
+
+def test_only_identical_requests_on_opted_in_routes(counting_app):
+    """Different ids, and routes that did not opt in, are not coalesced"""
+    app, calls = counting_app
+    gather(app, "/items/1", "/items/2", "/other/1", "/other/1")
+    assert sorted(calls) == ["/items/1", "/items/2", "/other/1", "/other/1"]
+
+
+def test_followers_run_themselves_when_the_leader_fails(counting_app):
+    """A failed leader's error is not shared"""
+    app, calls = counting_app
+    responses = gather(app, "/items/broken", "/items/broken", "/items/broken")
+    assert len(calls) == 3
+    assert all(response.status_code == 500 for response in responses)
+
+
+def test_clients_that_just_wrote_are_not_coalesced(counting_app):
+    """A fresh last_write cookie makes a request run on its own"""
+    app, calls = counting_app
+    app.read_your_writes_seconds = 5
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            fresh = {"Cookie": f"{LAST_WRITE_COOKIE}={time.time()}"}
+            stale = {"Cookie": f"{LAST_WRITE_COOKIE}={time.time() - 60}"}
+            return await asyncio.gather(
+                *(client.get("/items/1", headers=fresh) for _ in range(3)),
+                *(client.get("/items/1", headers=stale) for _ in range(3)),
+            )
+
+    responses = asyncio.run(scenario())
+    assert len(calls) == 4
+    assert not any(response.headers.get("X-Coalesced") for response in responses[:3])
+
+
+def test_flight_key_normalizes_the_query():
+    def scope(query, origin=None):
+        headers = [(b"origin", origin)] if origin else []
+        return {"path": "/courses", "query_string": query, "headers": headers}
+
+    assert flight_key(scope(b"limit=5&available_only=true")) == flight_key(scope(b"available_only=true&limit=5"))
+    assert flight_key(scope(b"limit=5")) != flight_key(scope(b"limit=5", b"http://localhost:5000"))
+
+
+@pytest.fixture
+def course_id():
+    with db_session() as db:
+        course = models.Course(course_code="SF101", name="Popular", credits=3, max_students=30)
+        db.add(course)
+        db.commit()
+        yield course.id
+        db.delete(course)
+        db.commit()
+
+
+def test_course_requests_are_coalesced_in_the_app(course_id):
+    """Concurrent GET /courses/{id} all get the same course, with fewer executions than requests"""
+
+    leaders = samples("/courses/{course_id}", "leader")
+    followers = samples("/courses/{course_id}", "follower")
+    with TestClient(app) as client, ThreadPoolExecutor(16) as pool:
+        responses = list(pool.map(lambda _: client.get(f"/courses/{course_id}"), range(64)))
+
+    assert all(response.status_code == 200 for response in responses)
+    assert {response.json()["course_code"] for response in responses} == {"SF101"}
+    ran = samples("/courses/{course_id}", "leader") - leaders
+    shared = samples("/courses/{course_id}", "follower") - followers
+    assert ran + shared == 64
+    assert ran == sum("X-Coalesced" not in response.headers for response in responses)
+
+
+def test_followers_get_the_cors_headers(course_id):
+    """Cross-origin followers carry the leader's CORS headers"""
+    origin = "http://localhost:5000"
+    with TestClient(app) as client, ThreadPoolExecutor(16) as pool:
+        responses = list(pool.map(
+            lambda _: client.get(f"/courses/{course_id}", headers={"Origin": origin}), range(32)
+        ))
+    assert any(response.headers.get("X-Coalesced") for response in responses)
+    assert all(response.headers.get("Access-Control-Allow-Origin") == origin for response in responses)
+    assert all(response.headers.get("Access-Control-Allow-Credentials") == "true" for response in responses)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the slow-query log and its summary
+"""
+import json
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test_slow_queries.db")
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.query_stats import QueryStats, _current_stats
+from app.slow_queries import _log_handler, fingerprint, install_slow_query_log, plan_flags, summarize
+
+LOG_PATH = os.path.join(tempfile.mkdtemp(), "slow.jsonl")
+
+engine = create_engine(f"sqlite:///{tempfile.mkdtemp()}/slow.db")
+models.Base.metadata.create_all(bind=engine)
+# A zero threshold logs every statement
+install_slow_query_log(engine, 0, LOG_PATH)
+
+
+def read_log():
+    with open(LOG_PATH) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_entries_are_redacted_explained_and_attributed():
+    token = _current_stats.set(QueryStats({"method": "GET", "path": "/courses"}))
+    try:
+        with Session(engine) as db:
+            db.execute(select(models.Course).where(models.Course.name.ilike("%secret%"))).all()
+            db.execute(select(models.Course).where(models.Course.id == 1)).all()
+    finally:
+        _current_stats.reset(token)
+
+    search, by_id = read_log()[-2:]
+    assert search["endpoint"] == "GET /courses"
+    assert "secret" not in json.dumps(search)
+    assert search["parameters"] == ["<str>"]
+    assert "full_scan:courses" in search["flags"]
+    assert by_id["flags"] == []
+    assert any("PRIMARY KEY" in detail for detail in by_id["plan"])
+
+
+def test_engines_share_one_handler_per_file():
+    """Every engine logging to a file writes, and rotates, through one handler"""
+    other = create_engine(f"sqlite:///{tempfile.mkdtemp()}/other.db")
+    install_slow_query_log(other, 0, LOG_PATH)
+    with other.connect() as connection:
+        connection.exec_driver_sql("SELECT 42")
+    assert read_log()[-1]["statement"] == "SELECT 42"
+    assert _log_handler(os.path.relpath(LOG_PATH)) is _log_handler(LOG_PATH)
+    other.dispose()
+
+
+def test_plan_flags():
+    assert plan_flags(["SCAN enrollments"]) == ["full_scan:enrollments"]
+    assert plan_flags(["SCAN enrollments USING COVERING INDEX ix_enrollments_course_id"]) == []
+    assert plan_flags(["SEARCH courses USING INTEGER PRIMARY KEY (rowid=?)"]) == []
+    assert plan_flags(["SCAN CONSTANT ROW"]) == []
+    assert plan_flags(["USE TEMP B-TREE FOR ORDER BY"]) == ["temp_btree:order by"]
+
+
+def test_fingerprint_and_summary():
+    assert fingerprint("SELECT *  FROM t WHERE a = 'x' LIMIT 10") == "select * from t where a = ? limit ?"
+    assert fingerprint("SELECT * FROM t WHERE id IN (?, ?, ?)") == fingerprint("select * from t where id in (?, ?)")
+
+    entries = [
+        {"statement": "SELECT 1 FROM t LIMIT 5", "duration_ms": 10.0, "endpoint": "GET /a", "flags": ["full_scan:t"]},
+        {"statement": "SELECT 1 FROM t LIMIT 50", "duration_ms": 30.0, "endpoint": "GET /b"},
+        {"statement": "SELECT 2 FROM u", "duration_ms": 5.0, "endpoint": None},
+    ]
+    groups = {group["fingerprint"]: group for group in summarize(entries)}
+    group = groups["select ? from t limit ?"]
+    assert (group["count"], group["total_ms"], group["max_ms"], group["mean_ms"]) == (2, 40.0, 30.0, 20.0)
+    assert group["endpoints"] == ["GET /a", "GET /b"]
+    assert group["flags"] == ["full_scan:t"]
+
+
+if __name__ == "__main__":
+    test_entries_are_redacted_explained_and_attributed()
+    test_engines_share_one_handler_per_file()
+    test_plan_flags()
+    test_fingerprint_and_summary()
+    print("All slow-query log tests passed!")
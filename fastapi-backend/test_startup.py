@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the app factory and lazy database initialization
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_child(code, **env):
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=dict(os.environ, **env),
+        capture_output=True, text=True, check=True,
+    ).stdout.strip()
+
+
+def test_import_does_not_touch_database():
+    """Importing main creates neither an engine nor the database file"""
+    path = os.path.join(tempfile.mkdtemp(), "startup.db")
+    output = run_child(
+        "import main, app.database; print(app.database.engine is None)",
+        DATABASE_URL=f"sqlite:///{path}",
+    )
+    assert output == "True"
+    assert not os.path.exists(path)
+
+
+def test_lifespan_migrates_when_enabled():
+    """With AUTO_MIGRATE the lifespan creates the schema and warms up before serving"""
+    path = os.path.join(tempfile.mkdtemp(), "startup.db")
+    code = (
+        "from fastapi.testclient import TestClient\n"
+        "import main, app.database\n"
+        "with TestClient(main.app) as client:\n"
+        "    print(client.get('/ready').status_code)\n"
+        "    print(client.get('/students').status_code)\n"
+        "print(app.database.engine is None)\n"
+    )
+    output = run_child(code, DATABASE_URL=f"sqlite:///{path}", AUTO_MIGRATE="true")
+    assert output.splitlines()[-3:] == ["200", "200", "True"]
+
+
+def test_not_ready_before_startup():
+    """/ready answers 503 until the lifespan warm-up has run"""
+    from fastapi.testclient import TestClient
+    from main import create_app
+
+    response = TestClient(create_app()).get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "starting"}
+
+
+def test_factory_builds_independent_apps():
+    """create_app() can be called again, e.g. with different settings"""
+    from main import create_app
+    from app.config import Settings
+
+    first = create_app(Settings(server_timing=False))
+    second = create_app()
+    assert first is not second
+    assert {route.path for route in first.routes} == {route.path for route in second.routes}
+
+
+if __name__ == "__main__":
+    test_import_does_not_touch_database()
+    test_lifespan_migrates_when_enabled()
+    test_not_ready_before_startup()
+    test_factory_builds_independent_apps()
+    print("All startup tests passed!")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+In-process tests for the purpose-built student query endpoints
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_student_queries.db"
+
+from fastapi.testclient import TestClient
+
+from app import queries
+from app.init_db import migrate
+from main import app
+
+migrate()
+client = TestClient(app)
+
+
+def create_fixture():
+    """Create one student, three courses (one full) and two enrollments"""
+    student = client.post("/students", json={
+        "student_id": "Q001", "name": "Query Student", "email": "query.student@example.com"
+    }).json()
+    other = client.post("/students", json={
+        "student_id": "Q002", "name": "Other Student", "email": "other.student@example.com"
+    }).json()
+    courses = [
+        client.post("/courses", json={
+            "course_code": code, "name": f"Course {code}", "credits": 3, "max_students": seats
+        }).json()
+        for code, seats in (("QA100", 10), ("QB200", 1), ("QC300", 10), ("QD400", 10))
+    ]
+    client.post("/enrollments", json={"student_id": student["id"], "course_id": courses[0]["id"]})
+    client.post("/enrollments", json={"student_id": other["id"], "course_id": courses[1]["id"]})
+    dropped = client.post("/enrollments", json={"student_id": student["id"], "course_id": courses[3]["id"]}).json()
+    client.put(f"/enrollments/{dropped['id']}", json={"status": "dropped"})
+    return student, courses
+
+
+student, courses = create_fixture()
+
+
+def test_enrollment_page():
+    """Composite endpoint returns student, filtered enrollments and eligible courses"""
+    response = client.get(f"/students/{student['id']}/enrollment-page")
+    assert response.status_code == 200
+    page = response.json()
+    
+    assert page["student"]["student_id"] == "Q001"
+    assert [e["course"]["course_code"] for e in page["enrollments"]] == ["QA100"]
+    assert page["enrollments"][0]["course"]["enrolled_count"] == 1
+    # QA100 is already taken, QB200 is full; the dropped QD400 can be rejoined
+    assert [c["course_code"] for c in page["eligible_courses"]] == ["QC300", "QD400"]
+    
+    all_statuses = client.get(f"/students/{student['id']}/enrollment-page", params={"status": "all"}).json()
+    assert len(all_statuses["enrollments"]) == 2
+
+
+def test_enrollment_page_missing_student():
+    """Unknown students return 404"""
+    assert client.get("/students/999999/enrollment-page").status_code == 404
+
+
+def test_eligible_courses_keyset_pagination():
+    """Pages follow next_cursor without gaps or repeats"""
+    url = f"/students/{student['id']}/eligible-courses"
+    first = client.get(url, params={"limit": 1}).json()
+    assert [c["course_code"] for c in first["items"]] == ["QC300"]
+    assert first["next_cursor"]
+    
+    second = client.get(url, params={"limit": 1, "cursor": first["next_cursor"]}).json()
+    assert [c["course_code"] for c in second["items"]] == ["QD400"]
+    assert second["next_cursor"] is None
+
+
+def test_eligible_courses_search_and_sort():
+    """Search filters and sort/order control the ordering"""
+    url = f"/students/{student['id']}/eligible-courses"
+    found = client.get(url, params={"search": "QD4"}).json()
+    assert [c["course_code"] for c in found["items"]] == ["QD400"]
+    
+    by_code_desc = client.get(url, params={"sort": "course_code", "order": "desc"}).json()
+    assert [c["course_code"] for c in by_code_desc["items"]] == ["QD400", "QC300"]
+    
+    assert client.get(url, params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_eligible_courses_cursor_types():
+    """Cursors whose values do not match the sort column are rejected"""
+    url = f"/students/{student['id']}/eligible-courses"
+    for sort, value in (("course_code", [1]), ("credits", "3"), ("credits", True), ("name", {"a": 1})):
+        cursor = queries.encode_cursor(value, 1)
+        assert client.get(url, params={"sort": sort, "cursor": cursor}).status_code == 400
+    assert client.get(url, params={"cursor": queries.encode_cursor("QC300", [1])}).status_code == 400
+    assert client.get(url, params={"sort": "credits", "cursor": queries.encode_cursor(3, 1)}).status_code == 200
+
+
+if __name__ == "__main__":
+    test_enrollment_page()
+    test_enrollment_page_missing_student()
+    test_eligible_courses_keyset_pagination()
+    test_eligible_courses_search_and_sort()
+    test_eligible_courses_cursor_types()
+    print("All student query tests passed!")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+In-process tests for W3C trace-context spans
+"""
+import json
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_tracing.db"
+
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.init_db import migrate
+from app.tracing import format_traceparent, parse_traceparent
+from main import create_app
+
+migrate()
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def traced_client(**overrides):
+    """A client for an app exporting spans to a fresh file"""
+    path = os.path.join(tempfile.mkdtemp(), "traces.jsonl")
+    app = create_app(Settings(tracing_exporter="file", tracing_file=path, **overrides))
+    return TestClient(app), path
+
+
+def read_spans(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_parse_traceparent():
+    """Valid headers parse; malformed and all-zero ids are ignored"""
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, True)
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00") == (TRACE_ID, PARENT_ID, False)
+    assert parse_traceparent(format_traceparent(TRACE_ID, PARENT_ID, True)) == (TRACE_ID, PARENT_ID, True)
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+    assert parse_traceparent(f"ff-{TRACE_ID}-{PARENT_ID}-01") is None
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(None) is None
+
+
+def test_sampled_parent_is_continued():
+    """A sampled traceparent yields request, handler, db and serialize spans"""
+    client, path = traced_client()
+    response = client.get("/students", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    assert response.status_code == 200
+    spans = read_spans(path)
+    assert {span["trace_id"] for span in spans} == {TRACE_ID}
+
+    root = next(span for span in spans if span["kind"] == "server")
+    assert root["name"] == "GET /students"
+    assert root["parent_id"] == PARENT_ID
+    assert root["attributes"]["http.status_code"] == 200
+
+    handler = next(span for span in spans if span["name"] == "handler list_students")
+    assert handler["parent_id"] == root["span_id"]
+    queries = [span for span in spans if span["name"] == "db"]
+    assert queries and all(span["parent_id"] in (root["span_id"], handler["span_id"]) for span in queries)
+    assert any(span["parent_id"] == handler["span_id"] for span in queries)
+    assert "SELECT" in queries[-1]["attributes"]["db.statement"]
+    serialize = next(span for span in spans if span["name"] == "serialize")
+    assert serialize["start_time_unix_nano"] == handler["end_time_unix_nano"]
+
+
+def test_unsampled_requests_export_nothing():
+    """Without a sampled parent and with a 0 sample rate nothing is recorded"""
+    client, path = traced_client(tracing_sample_rate=0.0)
+    client.get("/students")
+    client.get("/students", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"})
+    assert read_spans(path) == []
+
+
+def test_sample_rate_starts_new_traces():
+    """With sample rate 1 every request without a parent becomes a new trace"""
+    client, path = traced_client(tracing_sample_rate=1.0)
+    client.get("/health")
+    client.get("/health")
+    roots = [span for span in read_spans(path) if span["kind"] == "server"]
+    assert len(roots) == 2
+    assert roots[0]["trace_id"] != roots[1]["trace_id"]
+    assert roots[0]["parent_id"] is None
+
+
+if __name__ == "__main__":
+    test_parse_traceparent()
+    test_sampled_parent_is_continued()
+    test_unsampled_requests_export_nothing()
+    test_sample_rate_starts_new_traces()
+    print("All tracing tests passed!")
@@ -1,15 +1,55 @@
 """
 API client for making requests to the FastAPI backend
 """
+import asyncio
+import inspect
+import ssl
+import threading
+import time
+import weakref
 import requests
+import httpx
 from typing import Dict, Any, Optional, Tuple
-from flask import current_app, session, flash, redirect, url_for, request
+from http.cookiejar import DefaultCookiePolicy
+from flask import current_app, has_request_context, session, flash, redirect, url_for, request
 import logging
-from functools import wraps
+from functools import wraps, lru_cache
 from requests.exceptions import RequestException, Timeout, ConnectionError
 
+from metrics import observe_api_call
+from server_timing import record_api_call
+from tracing import api_call_headers
+
 logger = logging.getLogger(__name__)
 
+# Cookie the backend sets after a write; while it is fresh, that client's
+# reads go to the primary database instead of a lagging replica
+LAST_WRITE_COOKIE = 'last_write'
+
+
+def _cookie_jar() -> requests.cookies.RequestsCookieJar:
+    """A jar that keeps nothing
+
+    The clients are shared by every user of the process, so a cookie stored
+    in them would be sent on everybody's behalf. ``last_write`` is kept in
+    each user's session instead (see ``_user_cookies``).
+    """
+    return requests.cookies.RequestsCookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+def _user_cookies() -> Dict[str, str]:
+    """Cookie header with the current user's backend cookies, if any"""
+    if has_request_context() and LAST_WRITE_COOKIE in session:
+        return {'Cookie': f"{LAST_WRITE_COOKIE}={session[LAST_WRITE_COOKIE]}"}
+    return {}
+
+
+def _remember_user_cookies(cookies) -> None:
+    """Keep a ``last_write`` cookie from a backend response in the user's session"""
+    value = cookies.get(LAST_WRITE_COOKIE)
+    if value and has_request_context():
+        session[LAST_WRITE_COOKIE] = value
+
 
 class APIError(Exception):
     """Custom exception for API errors"""
@@ -27,6 +67,7 @@ class APIClient:
         self.base_url = base_url or current_app.config.get('API_BASE_URL', 'http://localhost:8000')
         self.timeout = timeout or current_app.config.get('API_TIMEOUT', 30)
         self.session = requests.Session()
+        self.session.cookies = _cookie_jar()
         
     def _get_headers(self) -> Dict[str, str]:
         """Get request headers"""
@@ -65,10 +106,18 @@ class APIClient:
         
         # Add headers
         kwargs.setdefault('headers', {}).update(self._get_headers())
+        kwargs['headers'].update(_user_cookies())
         
+        start = time.perf_counter()
         try:
             logger.info(f"Making {method} request to {url}")
-            response = self.session.request(method, url, **kwargs)
+            with api_call_headers(method, endpoint) as trace_headers:
+                kwargs['headers'].update(trace_headers)
+                response = self.session.request(method, url, **kwargs)
+            _remember_user_cookies(response.cookies)
+            elapsed = time.perf_counter() - start
+            observe_api_call(method, endpoint, elapsed)
+            record_api_call(method, endpoint, elapsed, response.headers.get('Server-Timing'))
             return self._handle_response(response)
             
         except Timeout:
@@ -107,50 +156,241 @@ class APIClient:
     # def login, logout, check_auth methods removed
 
 
+@lru_cache(maxsize=1)
+def _ssl_context() -> ssl.SSLContext:
+    """Build the TLS context once; creating one per client costs ~20ms"""
+    return ssl.create_default_context()
+
+
+class AsyncAPIClient(APIClient):
+    """Async client for the FastAPI backend built on httpx
+
+    Use it as an async context manager inside an async view so that several
+    backend calls can be awaited concurrently::
+
+        async with get_async_api_client() as api:
+            student, courses = await api.gather(
+                api.get(f'/students/{student_id}'),
+                api.get('/courses'),
+            )
+
+    Inside views run by ``async_to_sync`` below, the client returned by
+    ``get_async_api_client`` is shared by every request to the app, so its
+    connection pool survives between requests and leaving the ``async with``
+    block does not close it.
+    """
+    
+    def __init__(self, base_url: str = None, timeout: int = None, shared: bool = False):
+        self.shared = shared
+        self.base_url = base_url or current_app.config.get('API_BASE_URL', 'http://localhost:8000')
+        self.timeout = timeout or current_app.config.get('API_TIMEOUT', 30)
+        self.session = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            headers=self._get_headers(),
+            limits=httpx.Limits(max_connections=current_app.config.get('API_MAX_CONNECTIONS', 20)),
+            verify=_ssl_context(),
+            cookies=_cookie_jar(),
+        )
+    
+    async def __aenter__(self) -> 'AsyncAPIClient':
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        if not self.shared:
+            await self.aclose()
+    
+    async def aclose(self) -> None:
+        """Close the underlying connection pool"""
+        await self.session.aclose()
+    
+    async def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """Make a request to the API with error handling"""
+        url = f"{self.base_url}{endpoint}"
+        
+        start = time.perf_counter()
+        try:
+            logger.info(f"Making async {method} request to {url}")
+            with api_call_headers(method, endpoint) as trace_headers:
+                headers = {**_user_cookies(), **trace_headers}
+                if headers:
+                    kwargs['headers'] = {**kwargs.get('headers', {}), **headers}
+                response = await self.session.request(method, endpoint, **kwargs)
+            _remember_user_cookies(response.cookies)
+            elapsed = time.perf_counter() - start
+            observe_api_call(method, endpoint, elapsed)
+            record_api_call(method, endpoint, elapsed, response.headers.get('Server-Timing'))
+            return self._handle_response(response)
+            
+        except httpx.TimeoutException:
+            logger.error(f"Request timeout for {method} {url}")
+            raise APIError("Request timed out. Please try again.", status_code=408)
+            
+        except httpx.ConnectError:
+            logger.error(f"Connection error for {method} {url}")
+            raise APIError("Unable to connect to the API server.", status_code=503)
+            
+        except httpx.HTTPError as e:
+            logger.error(f"Request failed for {method} {url}: {str(e)}")
+            raise APIError(f"Request failed: {str(e)}", status_code=500)
+    
+    async def get(self, endpoint: str, params: Dict = None) -> Dict[str, Any]:
+        """Make GET request"""
+        return await self._request('GET', endpoint, params=params)
+    
+    async def post(self, endpoint: str, data: Dict = None, json: Dict = None) -> Dict[str, Any]:
+        """Make POST request"""
+        return await self._request('POST', endpoint, data=data, json=json)
+    
+    async def put(self, endpoint: str, data: Dict = None, json: Dict = None) -> Dict[str, Any]:
+        """Make PUT request"""
+        return await self._request('PUT', endpoint, data=data, json=json)
+    
+    async def patch(self, endpoint: str, data: Dict = None, json: Dict = None) -> Dict[str, Any]:
+        """Make PATCH request"""
+        return await self._request('PATCH', endpoint, data=data, json=json)
+    
+    async def delete(self, endpoint: str) -> Dict[str, Any]:
+        """Make DELETE request"""
+        return await self._request('DELETE', endpoint)
+    
+    @staticmethod
+    async def gather(*calls, return_exceptions: bool = False):
+        """Await several backend calls concurrently"""
+        return await asyncio.gather(*calls, return_exceptions=return_exceptions)
+
+
 # Authentication decorator removed - no longer needed
 # def api_auth_required removed - all routes are now accessible without auth
 
 
 # Helper function to handle API errors in views
 def handle_api_error(func):
-    """Decorator to handle API errors in view functions"""
+    """Decorator to handle API errors in view functions (sync or async)"""
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                return _api_error_response(func, e)
+        
+        return async_wrapper
+    
     @wraps(func)
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
-        except APIError as e:
-            logger.error(f"API error in {func.__name__}: {e.message}")
-            
-            # Handle specific status codes
-            if e.status_code == 401:
-                flash('Authentication error occurred.', 'warning')
-                # No login redirect - auth not required
-            elif e.status_code == 403:
-                flash('You do not have permission to perform this action.', 'error')
-            elif e.status_code == 404:
-                flash('The requested resource was not found.', 'error')
-            elif e.status_code >= 500:
-                flash('A server error occurred. Please try again later.', 'error')
-            else:
-                flash(e.message, 'error')
-            
-            # Redirect to referrer or home page
-            return redirect(request.referrer or url_for('index'))
-            
         except Exception as e:
-            logger.error(f"Unexpected error in {func.__name__}: {str(e)}")
-            flash('An unexpected error occurred.', 'error')
-            return redirect(url_for('index'))
+            return _api_error_response(func, e)
     
     return wrapper
 
 
-# Singleton instance for easy access
-_api_client = None
+def _api_error_response(func, error: Exception):
+    """Flash a message for an error raised in a view and redirect"""
+    if isinstance(error, APIError):
+        logger.error(f"API error in {func.__name__}: {error.message}")
+        
+        # Handle specific status codes
+        if error.status_code == 401:
+            flash('Authentication error occurred.', 'warning')
+            # No login redirect - auth not required
+        elif error.status_code == 403:
+            flash('You do not have permission to perform this action.', 'error')
+        elif error.status_code == 404:
+            flash('The requested resource was not found.', 'error')
+        elif error.status_code >= 500:
+            flash('A server error occurred. Please try again later.', 'error')
+        else:
+            flash(error.message, 'error')
+        
+        # Redirect to referrer or home page
+        return redirect(request.referrer or url_for('index'))
+    
+    logger.error(f"Unexpected error in {func.__name__}: {str(error)}")
+    flash('An unexpected error occurred.', 'error')
+    return redirect(url_for('index'))
+
 
 def get_api_client() -> APIClient:
-    """Get or create API client instance"""
-    global _api_client
-    if _api_client is None:
-        _api_client = APIClient()
-    return _api_client
\ No newline at end of file
+    """Get the app's API client, created on first use"""
+    client = current_app.extensions.get('api_client')
+    if client is None:
+        client = current_app.extensions['api_client'] = APIClient()
+    return client
+
+
+_loop_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """The process's event loop for async views, started on first use"""
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name='async-views', daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def async_views_thread_id() -> Optional[int]:
+    """Ident of the thread that runs async views, once it has started"""
+    return _loop_thread.ident if _loop_thread is not None else None
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def async_to_sync(func):
+    """Run an async view on the event loop shared by the worker's threads
+
+    Installed as ``Flask.async_to_sync``. Flask's default starts a fresh loop
+    for every request, which rules out reusing httpx connection pools. Here
+    one long-lived loop thread per process runs the views of every request
+    thread, and ``get_async_api_client`` keeps one client per app on it.
+    The request thread waits for its view; the view sees the request's
+    context (``current_app``, ``g``) because the coroutine is scheduled
+    with a copy of it.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        loop = _event_loop()
+        if _running_loop() is loop:
+            raise RuntimeError('async_to_sync cannot be called from an async view')
+        return asyncio.run_coroutine_threadsafe(func(*args, **kwargs), loop).result()
+    
+    return wrapper
+
+
+def _close_client(client: 'AsyncAPIClient', loop: asyncio.AbstractEventLoop) -> None:
+    """Close a shared client on its loop once its app is gone"""
+    if not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+
+def get_async_api_client() -> AsyncAPIClient:
+    """Get the app's shared async API client, or a per-request one
+
+    Views run by ``async_to_sync`` share one client per app, so its
+    connection pool survives between requests and it talks to that app's
+    ``API_BASE_URL``. Elsewhere every call gets its own client.
+    """
+    running_loop = _running_loop()
+    if running_loop is None or running_loop is not _loop:
+        return AsyncAPIClient()
+    
+    # Only the loop thread gets here, so creating the client cannot race
+    app = current_app._get_current_object()
+    client = app.extensions.get('async_api_client')
+    if client is None:
+        client = app.extensions['async_api_client'] = AsyncAPIClient(shared=True)
+        weakref.finalize(app, _close_client, client, running_loop)
+    return client
@@ -3,7 +3,6 @@ Flask application initialization and configuration
 """
 import os
 from flask import Flask, render_template, flash, redirect, url_for, session
-from flask_session import Session
 from datetime import timedelta
 import logging
 
@@ -20,8 +19,13 @@ def create_app():
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
     
     # Session configuration
-    app.config['SESSION_TYPE'] = 'filesystem'
+    # 'sqlite' and 'memory' use session_store; anything else goes to Flask-Session
+    app.config['SESSION_TYPE'] = os.environ.get('SESSION_TYPE', 'sqlite')
     app.config['SESSION_FILE_DIR'] = os.path.join(os.path.dirname(__file__), '.flask_session')
+    app.config['SESSION_SQLITE_PATH'] = os.environ.get(
+        'SESSION_SQLITE_PATH', os.path.join(app.config['SESSION_FILE_DIR'], 'sessions.db')
+    )
+    app.config['SESSION_SWEEP_INTERVAL'] = int(os.environ.get('SESSION_SWEEP_INTERVAL', 60))
     app.config['SESSION_PERMANENT'] = False
     app.config['SESSION_USE_SIGNER'] = True
     app.config['SESSION_KEY_PREFIX'] = 'flask_frontend:'
@@ -35,8 +39,57 @@ def create_app():
     app.config['API_BASE_URL'] = os.environ.get('API_BASE_URL', 'http://localhost:8000')
     app.config['API_TIMEOUT'] = int(os.environ.get('API_TIMEOUT', 30))
     
-    # Initialize Flask-Session
-    Session(app)
+    # Rendered page cache configuration
+    app.config['PAGE_CACHE_ENABLED'] = os.environ.get('PAGE_CACHE_ENABLED', 'True').lower() == 'true'
+    app.config['PAGE_CACHE_TTL'] = int(os.environ.get('PAGE_CACHE_TTL', 30))
+    app.config['PAGE_CACHE_MAX_ENTRIES'] = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 512))
+    app.config['PAGE_CACHE_FEED_INTERVAL_MS'] = int(os.environ.get('PAGE_CACHE_FEED_INTERVAL_MS', 250))
+    
+    # Server-Timing breakdown (backend, network, render); footer for debugging
+    app.config['SERVER_TIMING_ENABLED'] = os.environ.get('SERVER_TIMING_ENABLED', 'True').lower() == 'true'
+    app.config['SERVER_TIMING_FOOTER'] = os.environ.get('SERVER_TIMING_FOOTER', 'False').lower() == 'true'
+    
+    # Request profiling: on demand with PROFILING_TOKEN, or every Nth request
+    app.config['PROFILING_ENABLED'] = os.environ.get('PROFILING_ENABLED', 'False').lower() == 'true'
+    app.config['PROFILING_TOKEN'] = os.environ.get('PROFILING_TOKEN', '')
+    app.config['PROFILING_SAMPLE_EVERY'] = int(os.environ.get('PROFILING_SAMPLE_EVERY', 0))
+    app.config['PROFILING_DIR'] = os.environ.get('PROFILING_DIR', os.path.join(os.path.dirname(__file__), 'profiles'))
+    app.config['PROFILING_KEEP'] = int(os.environ.get('PROFILING_KEEP', 200))
+    app.config['PROFILING_INTERVAL'] = float(os.environ.get('PROFILING_INTERVAL', 0.002))
+    
+    # W3C trace context forwarded to the backend; spans to a local exporter
+    app.config['TRACING_ENABLED'] = os.environ.get('TRACING_ENABLED', 'True').lower() == 'true'
+    app.config['TRACING_SAMPLE_RATE'] = float(os.environ.get('TRACING_SAMPLE_RATE', 0.0))
+    app.config['TRACING_EXPORTER'] = os.environ.get('TRACING_EXPORTER', 'file')
+    app.config['TRACING_FILE'] = os.environ.get('TRACING_FILE', os.path.join(os.path.dirname(__file__), 'traces.jsonl'))
+    
+    # Run async views on a long-lived event loop so API connections are reused
+    from api_client import async_to_sync
+    app.async_to_sync = async_to_sync
+    
+    # Start traces before any other hook so the page span covers them
+    from tracing import init_tracing
+    init_tracing(app)
+    
+    # Profile selected requests first so the hooks below are included
+    from profiling import init_profiling
+    init_profiling(app)
+    
+    # Prometheus request metrics, served at /metrics
+    from metrics import init_metrics
+    init_metrics(app)
+    
+    # Server-Timing header aggregated from backend calls and rendering
+    from server_timing import init_server_timing
+    init_server_timing(app)
+    
+    # Initialize server-side sessions
+    from session_store import init_session
+    init_session(app)
+    
+    # Initialize rendered page cache
+    from page_cache import init_page_cache
+    init_page_cache(app)
     
     # Error handlers
     @app.errorhandler(404)
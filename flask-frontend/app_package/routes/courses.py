@@ -2,7 +2,8 @@
 Course management routes for Flask frontend
 """
 from flask import Blueprint, render_template, redirect, url_for, flash, request, session
-from api_client import get_api_client, handle_api_error, APIError
+from api_client import get_api_client, get_async_api_client, handle_api_error, APIError
+from page_cache import cached_page
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +15,7 @@ courses_bp = Blueprint('courses', __name__)
 
 
 @courses_bp.route('/')
+@cached_page('courses')
 @handle_api_error
 def list_courses():
     """List all courses with search functionality"""
@@ -94,17 +96,17 @@ def create_course():
 
 
 @courses_bp.route('/<int:course_id>')
+@cached_page('courses', 'enrollments')
 @handle_api_error
-def view_course(course_id):
+async def view_course(course_id):
     """View course details including enrolled students"""
-    client = get_api_client()
-    
     try:
-        # Get course details
-        course = client.get(f'/courses/{course_id}')
-        
-        # Get enrolled students for this course
-        enrollments_response = client.get(f'/enrollments/course/{course_id}')
+        # Get course details and enrolled students concurrently
+        async with get_async_api_client() as client:
+            course, enrollments_response = await client.gather(
+                client.get(f'/courses/{course_id}'),
+                client.get(f'/enrollments/course/{course_id}')
+            )
         enrollments = enrollments_response.get('items', [])
         
         # Check if current user is enrolled - removed (no auth)
@@ -11,7 +11,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from api_client import get_api_client, APIError, handle_api_error
+from api_client import get_api_client, get_async_api_client, APIError, handle_api_error
 
 logger = logging.getLogger(__name__)
 
@@ -34,10 +34,8 @@ class DropCourseForm(FlaskForm):
 
 @enrollments_bp.route('/')
 @handle_api_error
-def index():
+async def index():
     """List all enrollments (admin view)"""
-    api = get_api_client()
-    
     # Get query parameters
     status = request.args.get('status')
     page = int(request.args.get('page', 1))
@@ -51,22 +49,40 @@ def index():
     if status:
         params['status'] = status
     
-    # Get enrollments
-    response = api.get('/enrollments', params=params)
-    
-    # Extract data from paginated response
-    enrollments = response.get('items', [])
-    total = response.get('total', 0)
+    async with get_async_api_client() as api:
+        # Get enrollments
+        response = await api.get('/enrollments', params=params)
+        
+        # Extract data from paginated response
+        enrollments = response.get('items', [])
+        total = response.get('total', 0)
+        
+        # Fetch each distinct student and course once, concurrently
+        student_ids = sorted({e['student_id'] for e in enrollments})
+        course_ids = sorted({e['course_id'] for e in enrollments})
+        results = await api.gather(
+            *[api.get(f'/students/{sid}') for sid in student_ids],
+            *[api.get(f'/courses/{cid}') for cid in course_ids],
+            return_exceptions=True
+        )
+    students = dict(zip(student_ids, results[:len(student_ids)]))
+    courses = dict(zip(course_ids, results[len(student_ids):]))
     
     # Get student and course details for each enrollment
     for enrollment in enrollments:
-        try:
-            enrollment['student'] = api.get(f'/students/{enrollment["student_id"]}')
-            enrollment['course'] = api.get(f'/courses/{enrollment["course_id"]}')
-        except APIError:
+        student = students[enrollment['student_id']]
+        course = courses[enrollment['course_id']]
+        if isinstance(student, APIError) or isinstance(course, APIError):
             # If we can't get details, use IDs
             enrollment['student'] = {'name': f'Student {enrollment["student_id"]}', 'id': enrollment['student_id']}
             enrollment['course'] = {'name': f'Course {enrollment["course_id"]}', 'id': enrollment['course_id']}
+        elif isinstance(student, Exception):
+            raise student
+        elif isinstance(course, Exception):
+            raise course
+        else:
+            enrollment['student'] = student
+            enrollment['course'] = course
     
     # Calculate pagination info
     total_pages = (total + per_page - 1) // per_page if per_page > 0 else 0
@@ -86,24 +102,16 @@ def index():
 
 @enrollments_bp.route('/student/<int:student_id>')
 @handle_api_error
-def student_enrollments(student_id):
+async def student_enrollments(student_id):
     """View enrollments for a specific student"""
-    api = get_api_client()
-    
-    # Get student details
-    student = api.get(f'/students/{student_id}')
-    
-    # Get student enrollments
     status = request.args.get('status', 'active')
-    params = {'status': status} if status != 'all' else {}
-    response = api.get(f'/enrollments/student/{student_id}', params=params)
-    enrollments = response.get('items', [])
     
-    # Get available courses for enrollment
-    courses_response = api.get('/courses', params={'limit': 1000})  # Get all courses
-    all_courses = courses_response.get('items', [])
-    enrolled_course_ids = [e['course_id'] for e in enrollments if e['status'] == 'active']
-    available_courses = [c for c in all_courses if c['id'] not in enrolled_course_ids and c['available_seats'] > 0]
+    # Student summary, filtered enrollments and eligible courses in one call
+    async with get_async_api_client() as api:
+        page = await api.get(f'/students/{student_id}/enrollment-page', params={'status': status})
+    student = page['student']
+    enrollments = page['enrollments']
+    available_courses = page['eligible_courses']
     
     # Create enrollment form
     form = EnrollmentForm()
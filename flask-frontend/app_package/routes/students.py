@@ -3,6 +3,7 @@ Student management routes for Flask frontend
 """
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from api_client import get_api_client, handle_api_error, APIError
+from page_cache import cached_page
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,6 +12,7 @@ students_bp = Blueprint('students', __name__)
 
 
 @students_bp.route('/')
+@cached_page('students')
 @handle_api_error
 def list_students():
     """List all students with pagination and search"""
@@ -110,6 +112,7 @@ def create_student():
 
 
 @students_bp.route('/<int:student_id>')
+@cached_page('students', 'enrollments')
 @handle_api_error
 def view_student(student_id):
     """View a single student's details"""
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Compare page capacity of the sync and async data paths
+
+Usage: python benchmarks/bench_async_pages.py [--latency MS] [--threads N] [--pages N]
+
+A local stand-in backend answers every API call after a fixed delay, the way
+a real backend would under load. The student enrollment page is then served
+with a fixed number of worker threads, once through the original blocking
+APIClient path (three sequential calls) and once through the current async
+view (a single call to the composite enrollment-page endpoint), and pages
+per second per worker are reported.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SESSION_TYPE', 'memory')
+os.environ.setdefault('PAGE_CACHE_ENABLED', 'False')
+
+STUDENT = {'id': 1, 'student_id': 'S001', 'name': 'Bench Student',
+           'email': 'bench@example.com', 'enrollments': []}
+COURSES = {'items': [{'id': i, 'course_code': f'C{i}', 'name': f'Course {i}', 'credits': 3,
+                      'available_seats': 10} for i in range(1, 51)],
+           'total': 50, 'page': 1, 'per_page': 1000}
+
+
+def start_backend(latency: float) -> ThreadingHTTPServer:
+    """Serve canned API responses after ``latency`` seconds"""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+        wbufsize = 64 * 1024
+
+        def do_GET(self):
+            time.sleep(latency)
+            if '/enrollment-page' in self.path:
+                body = {'student': STUDENT, 'enrollments': [], 'eligible_courses': COURSES['items']}
+            elif self.path.startswith('/students/'):
+                body = STUDENT
+            elif self.path.startswith('/enrollments/student/'):
+                body = {'items': [], 'total': 0, 'page': 1, 'per_page': 100}
+            else:
+                body = COURSES
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_app(api_base_url: str):
+    os.environ['API_BASE_URL'] = api_base_url
+    from flask import render_template
+    from app import create_app
+    from api_client import get_api_client
+    from app_package.routes.enrollments import EnrollmentForm
+
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    @app.route('/bench/sync/<int:student_id>')
+    def sync_student_enrollments(student_id):
+        """The pre-async implementation: three blocking calls in sequence"""
+        api = get_api_client()
+        student = api.get(f'/students/{student_id}')
+        enrollments = api.get(f'/enrollments/student/{student_id}', params={'status': 'active'})['items']
+        courses = api.get('/courses', params={'limit': 1000})['items']
+        form = EnrollmentForm()
+        form.course_id.choices = [(c['id'], c['name']) for c in courses]
+        return render_template('enrollments/student.html', student=student, enrollments=enrollments,
+                               form=form, drop_forms={}, status='active', available_courses=courses)
+
+    return app
+
+
+def measure(app, path: str, threads: int, pages: int) -> float:
+    """Serve ``pages`` requests with ``threads`` workers; return pages/sec"""
+    def fetch(_):
+        with app.test_client() as client:
+            response = client.get(path)
+            assert response.status_code == 200, response.status_code
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(fetch, range(threads)))  # warm up
+        start = time.perf_counter()
+        list(pool.map(fetch, range(pages)))
+        return pages / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=50, help='backend latency in ms')
+    parser.add_argument('--threads', type=int, default=4, help='worker threads')
+    parser.add_argument('--pages', type=int, default=200)
+    args = parser.parse_args()
+
+    backend = start_backend(args.latency / 1000)
+    app = build_app(f'http://127.0.0.1:{backend.server_address[1]}')
+
+    sync_rate = measure(app, '/bench/sync/1', args.threads, args.pages)
+    async_rate = measure(app, '/enrollments/student/1', args.threads, args.pages)
+    print(f"backend latency {args.latency:.0f} ms, {args.threads} worker threads")
+    print(f"{'path':<8}{'pages/s':>10}{'pages/s/thread':>16}")
+    print(f"{'sync':<8}{sync_rate:>10.1f}{sync_rate / args.threads:>16.2f}")
+    print(f"{'async':<8}{async_rate:>10.1f}{async_rate / args.threads:>16.2f}")
+    backend.shutdown()
+
+
+if __name__ == '__main__':
+    main()
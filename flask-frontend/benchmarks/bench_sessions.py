@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark the session backends against Flask-Session's filesystem backend
+
+Usage: python benchmarks/bench_sessions.py [--requests N]
+
+Each backend is exercised through the Flask test client with two request
+mixes: read-only requests (session loaded but unchanged) and write requests
+(a value is stored in the session on every hit).
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, session
+from session_store import init_session
+
+
+def build_app(session_type: str, directory: str) -> Flask:
+    """Create a minimal app using the given session backend"""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'bench'
+    app.config['SESSION_TYPE'] = session_type
+    app.config['SESSION_FILE_DIR'] = os.path.join(directory, 'files')
+    app.config['SESSION_SQLITE_PATH'] = os.path.join(directory, 'sessions.db')
+    app.config['SESSION_PERMANENT'] = False
+    app.config['SESSION_USE_SIGNER'] = True
+    app.config['SESSION_KEY_PREFIX'] = 'flask_frontend:'
+    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=1)
+    app.config['SESSION_SWEEP_INTERVAL'] = 0
+    init_session(app)
+
+    @app.route('/read')
+    def read():
+        return str(session.get('counter', 0))
+
+    @app.route('/write')
+    def write():
+        session['counter'] = session.get('counter', 0) + 1
+        return 'ok'
+
+    return app
+
+
+def run(app: Flask, path: str, n: int) -> float:
+    """Return requests per second for ``n`` requests to ``path``"""
+    with app.test_client() as client:
+        client.get('/write')  # establish the session cookie
+        start = time.perf_counter()
+        for _ in range(n):
+            client.get(path)
+        return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'backend':<12}{'read req/s':>14}{'write req/s':>14}")
+    for session_type in ('filesystem', 'sqlite', 'memory'):
+        directory = tempfile.mkdtemp(prefix='bench_sessions_')
+        try:
+            app = build_app(session_type, directory)
+            reads = run(app, '/read', args.requests)
+            writes = run(app, '/write', args.requests)
+            print(f"{session_type:<12}{reads:>14.0f}{writes:>14.0f}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Gunicorn configuration for running the Flask frontend in production
+
+Usage: gunicorn -c gunicorn.conf.py app:app
+
+Each worker process runs a pool of threads. Heavy pages are async views that
+await their backend calls concurrently on the worker's event loop thread
+(see ``api_client.async_to_sync``), so a thread is busy for roughly the
+slowest backend call of a page rather than the sum of all of them.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('FLASK_BIND', f"0.0.0.0:{os.environ.get('FLASK_PORT', 5000)}")
+
+# One process per core; threads cover the time spent waiting on the backend
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('FLASK_THREADS', 8))
+
+keepalive = int(os.environ.get('FLASK_KEEPALIVE', 5))
+timeout = int(os.environ.get('FLASK_WORKER_TIMEOUT', 60))
+graceful_timeout = 30
+
+# Recycle workers periodically to bound memory growth of in-process caches
+max_requests = int(os.environ.get('FLASK_MAX_REQUESTS', 10000))
+max_requests_jitter = 500
+
+accesslog = '-'
+errorlog = '-'
+
+
+# Multi-process Prometheus metrics (see metrics.py)
+
+def on_starting(server):
+    """Drop metric files left over from a previous run"""
+    metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for name in os.listdir(metrics_dir):
+            if name.endswith('.db'):
+                os.remove(os.path.join(metrics_dir, name))
+
+
+def child_exit(server, worker):
+    """Stop counting an exited worker's live gauges"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
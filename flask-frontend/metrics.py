@@ -0,0 +1,98 @@
+"""
+Prometheus metrics for the Flask frontend
+
+``init_metrics`` records a request-duration histogram and an error counter
+per URL rule, plus a gauge of requests in flight, and serves everything at
+``/metrics``. ``observe_api_call`` is called by ``APIClient`` for every
+backend call, labelled by method and endpoint with numeric ids collapsed
+(``/students/{id}``).
+
+Under gunicorn, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty directory; the
+hooks in ``gunicorn.conf.py`` clear it at startup and clean up after exited
+workers, and the scrape aggregates the samples of every worker.
+"""
+import os
+import re
+import time
+from functools import lru_cache
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+
+REQUEST_DURATION = Histogram(
+    'flask_request_duration_seconds',
+    'Time spent handling HTTP requests',
+    ['method', 'route'],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'flask_requests_in_flight',
+    'HTTP requests currently being handled',
+    multiprocess_mode='livesum',
+)
+REQUEST_ERRORS = Counter(
+    'flask_request_errors_total',
+    'HTTP requests answered with a 4xx or 5xx status',
+    ['method', 'route', 'status'],
+)
+API_CALL_DURATION = Histogram(
+    'api_client_request_duration_seconds',
+    'Latency of backend API calls made by APIClient',
+    ['method', 'endpoint'],
+)
+
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+@lru_cache(maxsize=1024)
+def endpoint_label(endpoint: str) -> str:
+    """Collapse numeric path segments so each endpoint is one label value"""
+    return _ID_SEGMENT.sub('/{id}', endpoint)
+
+
+def observe_api_call(method: str, endpoint: str, seconds: float) -> None:
+    """Record the latency of one backend call"""
+    API_CALL_DURATION.labels(method, endpoint_label(endpoint)).observe(seconds)
+
+
+def render_metrics() -> bytes:
+    """Metrics in the Prometheus text format, aggregated across workers"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def init_metrics(app) -> None:
+    """Register request instrumentation and the /metrics endpoint"""
+
+    @app.before_request
+    def start_request_timer():
+        if request.path != '/metrics':
+            REQUESTS_IN_FLIGHT.inc()
+            g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            REQUESTS_IN_FLIGHT.dec()
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            REQUEST_DURATION.labels(request.method, route).observe(time.perf_counter() - start)
+            if response.status_code >= 400:
+                REQUEST_ERRORS.labels(request.method, route, str(response.status_code)).inc()
+        return response
+
+    @app.teardown_request
+    def release_in_flight(error=None):
+        # after_request is skipped when a response could not be built
+        if g.pop('metrics_start', None) is not None:
+            REQUESTS_IN_FLIGHT.dec()
+
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus metrics endpoint"""
+        return Response(render_metrics(), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,317 @@
+"""
+Rendered page cache for the Flask frontend
+
+GET views decorated with ``cached_page`` have their rendered HTML cached in
+process, keyed on the endpoint, view arguments, query string and the current
+version of every data namespace the view depends on.
+
+The versions follow the backend's data, not the writes this process
+happens to see. At most every ``PAGE_CACHE_FEED_INTERVAL_MS``, a cached
+view first reads the backend's change feed
+(``GET /changes?since=<last version seen>``) and bumps the namespaces listed
+in ``INVALIDATES`` for every entity that changed; other requests meanwhile
+use the versions as they are, so a hit costs no backend call. A write made
+through another worker, or by another API client, invalidates the pages of
+every worker within that interval. After a write through this process the
+feed is read on the next cached request. If the feed cannot be read (the
+backend is down, or sharded and without a feed), cached entries are still
+served until ``PAGE_CACHE_TTL`` expires them.
+
+Per-user content such as flash messages or CSRF tokens must not be baked
+into a shared page. Templates render it through ``per_user_fragment(name)``;
+inside a cached view this emits a placeholder that is filled in for the
+current user every time the page is served.
+"""
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, Optional, Tuple
+
+from flask import current_app, g, make_response, render_template, request, session
+from markupsafe import Markup
+
+from api_client import APIError, get_api_client, get_async_api_client
+
+logger = logging.getLogger(__name__)
+
+# Namespaces whose pages change with each entity of the change feed
+INVALIDATES = {
+    'courses': ('courses', 'enrollments'),
+    'students': ('students', 'enrollments'),
+    'enrollments': ('enrollments',),
+}
+
+_PLACEHOLDER = '<!--per-user:{}-->'
+
+# Change feed entries read per request; with more pending, the cache starts over
+FEED_LIMIT = 1000
+# ``since`` that returns no entries, only the latest version
+_LATEST = 2 ** 62
+
+
+class PageCache:
+    """LRU cache of rendered pages with per-namespace data versions"""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 30.0, feed_interval: float = 0.25):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.feed_interval = feed_interval
+        self._feed_read_at: Optional[float] = None
+        self._feed_lock = threading.Lock()
+        self.enabled = True
+        self._entries: "OrderedDict[Tuple, Tuple[float, str, str]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._seen: Optional[int] = None  # last change feed version applied
+        self._fragments: Dict[str, Callable[[], str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Data versions
+
+    def version(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def claim_feed_read(self) -> bool:
+        """True if the caller should read the change feed now
+
+        A caller that gets True must call ``feed_read`` afterwards. Only one
+        request reads the feed at a time; the others carry on without it.
+        """
+        read_at = self._feed_read_at
+        if read_at is not None and time.monotonic() - read_at < self.feed_interval:
+            return False
+        return self._feed_lock.acquire(blocking=False)
+
+    def feed_read(self) -> None:
+        self._feed_read_at = time.monotonic()
+        self._feed_lock.release()
+
+    def expire_feed(self) -> None:
+        """Read the feed on the next cached request"""
+        self._feed_read_at = None
+
+    def feed_params(self) -> Dict[str, int]:
+        """Query parameters for the next ``GET /changes``"""
+        return {'since': _LATEST if self._seen is None else self._seen, 'limit': FEED_LIMIT}
+
+    def apply_changes(self, page: Dict) -> None:
+        """Bump the namespaces of the entities in a ``GET /changes`` page"""
+        with self._lock:
+            latest = page['latest_version']
+            if self._seen is None or latest < self._seen or page['next_since'] < latest:
+                # First read, a backend whose log was reset, or more changes
+                # than one page: nothing cached so far can be trusted
+                self._entries.clear()
+                self._seen = latest
+                return
+            for item in page['items']:
+                if item['version'] > self._seen:
+                    for namespace in INVALIDATES.get(item['entity'], ()):
+                        self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            self._seen = max(self._seen, page['next_since'])
+
+    # Entries
+
+    def get(self, key: Tuple) -> Optional[Tuple[str, str]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, body, mimetype = entry
+        if expires_at <= time.monotonic():
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return body, mimetype
+
+    def set(self, key: Tuple, body: str, mimetype: str, ttl: float = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, body, mimetype)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Per-user fragments
+
+    def fragment(self, name: str):
+        """Register a function that renders a per-user fragment"""
+        def decorator(func):
+            self._fragments[name] = func
+            return func
+        return decorator
+
+    def render_fragment(self, name: str) -> Markup:
+        """Template helper: render now, or leave a placeholder in cached views"""
+        if g.get('page_cache_active'):
+            return Markup(_PLACEHOLDER.format(name))
+        return Markup(self._fragments[name]())
+
+    def fill_fragments(self, body: str) -> str:
+        """Replace placeholders in a cached body with the current user's content"""
+        for name, func in self._fragments.items():
+            placeholder = _PLACEHOLDER.format(name)
+            if placeholder in body:
+                body = body.replace(placeholder, func())
+        return body
+
+    def make_key(self, namespaces: Tuple[str, ...]) -> Tuple:
+        return (
+            request.endpoint,
+            tuple(sorted(request.view_args.items())) if request.view_args else (),
+            tuple(sorted(request.args.items(multi=True))),
+            tuple(self.version(namespace) for namespace in namespaces),
+        )
+
+
+def get_page_cache() -> PageCache:
+    """The current app's page cache"""
+    return current_app.extensions['page_cache']
+
+
+def _refresh(page_cache: PageCache) -> None:
+    """Catch up with the backend's change feed, if it is time to"""
+    if not page_cache.claim_feed_read():
+        return
+    try:
+        page_cache.apply_changes(get_api_client().get('/changes', params=page_cache.feed_params()))
+    except APIError as e:
+        logger.debug(f"Change feed unavailable, cached pages expire by TTL only: {e.message}")
+    finally:
+        page_cache.feed_read()
+
+
+async def _refresh_async(page_cache: PageCache) -> None:
+    """``_refresh`` for async views"""
+    if not page_cache.claim_feed_read():
+        return
+    try:
+        async with get_async_api_client() as api:
+            page_cache.apply_changes(await api.get('/changes', params=page_cache.feed_params()))
+    except APIError as e:
+        logger.debug(f"Change feed unavailable, cached pages expire by TTL only: {e.message}")
+    finally:
+        page_cache.feed_read()
+
+
+def cached_page(*namespaces: str, ttl: float = None):
+    """Cache the rendered output of a GET view (sync or async)
+
+    ``namespaces`` are the data namespaces the page is built from; a write to
+    any of them invalidates the page.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                page_cache = get_page_cache()
+                if not page_cache.enabled or request.method != 'GET':
+                    return await func(*args, **kwargs)
+                await _refresh_async(page_cache)
+
+                key = page_cache.make_key(namespaces)
+                cached = _cached_response(page_cache, key)
+                if cached is not None:
+                    return cached
+
+                flashes_before = _begin_render()
+                try:
+                    response = make_response(await func(*args, **kwargs))
+                finally:
+                    g.page_cache_active = False
+                return _store_response(page_cache, key, response, flashes_before, ttl)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            page_cache = get_page_cache()
+            if not page_cache.enabled or request.method != 'GET':
+                return func(*args, **kwargs)
+            _refresh(page_cache)
+
+            key = page_cache.make_key(namespaces)
+            cached = _cached_response(page_cache, key)
+            if cached is not None:
+                return cached
+
+            flashes_before = _begin_render()
+            try:
+                response = make_response(func(*args, **kwargs))
+            finally:
+                g.page_cache_active = False
+            return _store_response(page_cache, key, response, flashes_before, ttl)
+
+        return wrapper
+    return decorator
+
+
+def _cached_response(page_cache: PageCache, key: Tuple):
+    """Build a response from the cache, or return None on a miss"""
+    cached = page_cache.get(key)
+    if cached is None:
+        page_cache.misses += 1
+        return None
+    page_cache.hits += 1
+    body, mimetype = cached
+    response = make_response(page_cache.fill_fragments(body))
+    response.mimetype = mimetype
+    response.headers['X-Page-Cache'] = 'HIT'
+    return response
+
+
+def _begin_render() -> int:
+    """Switch templates to placeholder mode and note pending flash messages"""
+    g.page_cache_active = True
+    return len(session.get('_flashes', []))
+
+
+def _store_response(page_cache: PageCache, key: Tuple, response, flashes_before: int, ttl: Optional[float]):
+    """Cache a freshly rendered response and fill in its per-user fragments"""
+    body = response.get_data(as_text=True)
+    # Only successful pages built without new flash messages are shared
+    if response.status_code == 200 and len(session.get('_flashes', [])) == flashes_before:
+        page_cache.set(key, body, response.mimetype, ttl)
+    response.set_data(page_cache.fill_fragments(body))
+    response.headers['X-Page-Cache'] = 'MISS'
+    return response
+
+
+def init_page_cache(app) -> None:
+    """Create the app's page cache and register its template hooks"""
+    page_cache = app.extensions['page_cache'] = PageCache(
+        max_entries=app.config.get('PAGE_CACHE_MAX_ENTRIES', 512),
+        ttl=app.config.get('PAGE_CACHE_TTL', 30),
+        feed_interval=app.config.get('PAGE_CACHE_FEED_INTERVAL_MS', 250) / 1000,
+    )
+    page_cache.enabled = app.config.get('PAGE_CACHE_ENABLED', True)
+
+    @page_cache.fragment('flashes')
+    def render_flashes():
+        return render_template('partials/flashes.html')
+
+    @page_cache.fragment('csrf_token')
+    def render_csrf_token():
+        from flask_wtf.csrf import generate_csrf
+        return generate_csrf()
+
+    app.jinja_env.globals['per_user_fragment'] = page_cache.render_fragment
+
+    @app.after_request
+    def read_feed_after_write(response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            page_cache.expire_feed()
+        return response
@@ -0,0 +1,143 @@
+"""
+On-demand request profiling for the Flask frontend
+
+With ``PROFILING_ENABLED`` set, a request is profiled when it carries
+``PROFILING_TOKEN`` as an ``X-Profile-Token`` header or a ``profile`` query
+parameter, and additionally every ``PROFILING_SAMPLE_EVERY``-th request
+when that is non-zero.
+
+A background thread samples the request thread's stack every
+``PROFILING_INTERVAL`` seconds, together with the thread that runs async
+views (see ``api_client.async_to_sync``). That thread is shared, so async
+views of concurrent requests can show up in a report as well. The report is written to ``PROFILING_DIR``
+in folded-stack format, one ``frame;frame;frame count`` line per distinct
+stack, which flamegraph.pl and speedscope read directly. The file name is
+returned in the ``X-Profile-Report`` header and only the newest
+``PROFILING_KEEP`` reports are kept.
+
+``StackSampler``, ``_fold`` and ``write_report`` have a twin in the
+backend's app/profiling.py. The frontend and the backend are installed and
+deployed separately and share no package, so a fix to one belongs in both.
+"""
+import hmac
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import g, request
+
+from api_client import async_views_thread_id
+
+
+class StackSampler:
+    """Sample the stacks of selected threads into folded-stack counts"""
+
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        self.threads = set()
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def add_thread(self, ident: int) -> None:
+        self.threads.add(ident)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in tuple(self.threads):
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.counts[_fold(frame)] += 1
+
+    def folded(self) -> str:
+        """Report in folded-stack format, heaviest stacks first"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.counts.most_common())
+
+
+def _fold(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        name = getattr(code, 'co_qualname', code.co_name)
+        names.append(f'{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def write_report(directory: str, name: str, report: str, keep: int) -> str:
+    """Store a report and delete the oldest ones beyond ``keep``"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    with open(path, 'w') as f:
+        f.write(report)
+
+    reports = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith('.folded')),
+        key=lambda entry: entry.stat().st_mtime_ns,
+    )
+    for entry in reports[:max(len(reports) - keep, 0)]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+    return path
+
+
+def init_profiling(app) -> None:
+    """Register the profiling hooks if ``PROFILING_ENABLED`` is set"""
+    if not app.config.get('PROFILING_ENABLED'):
+        return
+
+    token = app.config.get('PROFILING_TOKEN', '')
+    sample_every = app.config.get('PROFILING_SAMPLE_EVERY', 0)
+    directory = app.config.get('PROFILING_DIR', 'profiles')
+    keep = app.config.get('PROFILING_KEEP', 200)
+    interval = app.config.get('PROFILING_INTERVAL', 0.002)
+    requests_seen = itertools.count(1)
+    reports = itertools.count(1)
+
+    def requested() -> bool:
+        supplied = request.headers.get('X-Profile-Token') or request.args.get('profile', '')
+        # compare_digest only takes ASCII str, so compare bytes
+        return bool(token and supplied) and hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+    def sampled() -> bool:
+        return bool(sample_every) and next(requests_seen) % sample_every == 0
+
+    @app.before_request
+    def start_profile():
+        if not (requested() or sampled()):
+            return
+        path = re.sub(r'[^A-Za-z0-9]+', '_', request.path).strip('_') or 'root'
+        g.profile_report = (f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(reports)}"
+                            f"-{request.method}-{path}.folded")
+        g.profile_sampler = StackSampler(interval)
+        g.profile_sampler.add_thread(threading.get_ident())
+        if async_views_thread_id() is not None:
+            g.profile_sampler.add_thread(async_views_thread_id())
+        g.profile_sampler.start()
+
+    @app.after_request
+    def add_report_header(response):
+        if 'profile_report' in g:
+            response.headers['X-Profile-Report'] = g.profile_report
+        return response
+
+    @app.teardown_request
+    def finish_profile(error=None):
+        sampler = g.pop('profile_sampler', None)
+        if sampler is not None:
+            sampler.stop()
+            write_report(directory, g.profile_report, sampler.folded(), keep)
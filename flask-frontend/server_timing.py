@@ -0,0 +1,128 @@
+"""
+Server-Timing breakdown for Flask pages
+
+``APIClient`` reports every backend call here together with the backend's
+own ``Server-Timing`` header. At the end of the request the phases are
+summed into this response's ``Server-Timing`` header (milliseconds):
+
+* ``backend-db`` / ``backend-serialize`` / ``backend``: as reported by the
+  backend, summed over all calls
+* ``network``: call time not accounted for by the backend (transport,
+  queueing, JSON decoding)
+* ``render``: Jinja template rendering
+* ``total``: the whole Flask request
+
+Concurrent calls made by async views overlap, so the per-call sums can
+exceed ``total``; the ``backend`` entry lists the number of calls.
+
+With ``SERVER_TIMING_FOOTER`` enabled, HTML pages also get a small table of
+the phases and every backend call appended before ``</body>``.
+"""
+import time
+from typing import Dict, NamedTuple, Optional
+
+from flask import before_render_template, g, has_request_context, template_rendered
+from markupsafe import escape
+
+
+class APICallTiming(NamedTuple):
+    method: str
+    endpoint: str
+    duration: float
+    backend: Dict[str, float]
+
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    """Map metric names of a Server-Timing header to durations in ms"""
+    timings = {}
+    if not header:
+        return timings
+    for entry in header.split(','):
+        name, *params = entry.strip().split(';')
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key == 'dur':
+                try:
+                    timings[name] = float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+def record_api_call(method: str, endpoint: str, seconds: float, header: Optional[str]) -> None:
+    """Remember one backend call for the current request's breakdown"""
+    if has_request_context():
+        g.setdefault('api_calls', []).append(
+            APICallTiming(method, endpoint, seconds * 1000, parse_server_timing(header))
+        )
+
+
+def page_timings() -> Dict[str, float]:
+    """Phases of the current request so far, in milliseconds"""
+    calls = g.get('api_calls', [])
+    backend = sum(call.backend.get('total', 0.0) for call in calls)
+    return {
+        'backend-db': sum(call.backend.get('db', 0.0) for call in calls),
+        'backend-serialize': sum(call.backend.get('serialize', 0.0) for call in calls),
+        'backend': backend,
+        'network': max(sum(call.duration for call in calls) - backend, 0.0),
+        'render': g.get('render_time', 0.0) * 1000,
+        'total': (time.perf_counter() - g.server_timing_start) * 1000,
+    }
+
+
+def _render_footer(timings: Dict[str, float]) -> str:
+    rows = ''.join(
+        f'<tr><td>{name}</td><td>{duration:.2f} ms</td></tr>' for name, duration in timings.items()
+    )
+    rows += ''.join(
+        f'<tr><td>{escape(call.method)} {escape(call.endpoint)}</td><td>{call.duration:.2f} ms</td></tr>'
+        for call in g.get('api_calls', [])
+    )
+    return (
+        '<div class="server-timing container my-3"><table class="table table-sm small text-muted">'
+        f'<caption>Server timing</caption>{rows}</table></div>'
+    )
+
+
+def init_server_timing(app) -> None:
+    """Time requests and template rendering and emit the breakdown"""
+    if not app.config.get('SERVER_TIMING_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_server_timing():
+        g.server_timing_start = time.perf_counter()
+
+    def render_started(sender, template, context, **extra):
+        g.setdefault('render_starts', []).append(time.perf_counter())
+
+    def render_finished(sender, template, context, **extra):
+        starts = g.get('render_starts')
+        if starts:
+            elapsed = time.perf_counter() - starts.pop()
+            # Templates rendered from inside another one are already counted
+            if not starts:
+                g.render_time = g.get('render_time', 0.0) + elapsed
+
+    before_render_template.connect(render_started, app, weak=False)
+    template_rendered.connect(render_finished, app, weak=False)
+
+    @app.after_request
+    def add_server_timing(response):
+        if 'server_timing_start' not in g:
+            return response
+        timings = page_timings()
+        calls = len(g.get('api_calls', []))
+        entries = []
+        for name, duration in timings.items():
+            desc = f';desc="{calls} calls"' if name == 'backend' else ''
+            entries.append(f'{name}{desc};dur={duration:.2f}')
+        response.headers['Server-Timing'] = ', '.join(entries)
+
+        if (app.config.get('SERVER_TIMING_FOOTER') and response.mimetype == 'text/html'
+                and not response.direct_passthrough):
+            head, body_end, tail = response.get_data(as_text=True).rpartition('</body>')
+            if body_end:
+                response.set_data(head + _render_footer(timings) + body_end + tail)
+        return response
@@ -0,0 +1,295 @@
+"""
+Server-side session storage for the Flask frontend
+
+Two backends are provided:
+
+* ``MemorySessionStore`` keeps sessions in a process-local dict. It is the
+  fastest option but sessions are not shared between worker processes.
+* ``SQLiteSessionStore`` keeps sessions in a single SQLite file in WAL mode
+  with an index on the expiry column, so it can be shared by every worker on
+  one host.
+
+``StoreSessionInterface`` plugs either store into Flask. Sessions that were
+not modified during a request are never written back, and expired sessions
+are removed by a background sweeper thread, one per store, instead of on
+the request path.
+"""
+import os
+import pickle
+import secrets
+import sqlite3
+import threading
+import time
+import weakref
+import logging
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+logger = logging.getLogger(__name__)
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict that remembers whether it was changed during the request"""
+
+    def __init__(self, initial: Dict = None, sid: str = None, new: bool = False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class MemorySessionStore:
+    """In-process session store with per-entry expiry"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, sid: str) -> Optional[Tuple[bytes, float]]:
+        """Return ``(payload, expires_at)`` or None if missing or expired"""
+        entry = self._data.get(sid)
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry
+
+    def set(self, sid: str, payload: bytes, expires_at: float) -> None:
+        with self._lock:
+            self._data[sid] = (payload, expires_at)
+
+    def touch(self, sid: str, expires_at: float) -> None:
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is not None:
+                self._data[sid] = (entry[0], expires_at)
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def sweep(self) -> int:
+        """Remove expired sessions and return how many were removed"""
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, (_, expires_at) in self._data.items() if expires_at <= now]
+            for sid in expired:
+                del self._data[sid]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteSessionStore:
+    """Session store backed by a single SQLite file in WAL mode"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " sid TEXT PRIMARY KEY,"
+            " data BLOB NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_expires_at ON sessions (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the connection owned by the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode: every statement is its own short transaction
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, sid: str) -> Optional[Tuple[bytes, float]]:
+        row = self._connection().execute(
+            "SELECT data, expires_at FROM sessions WHERE sid = ? AND expires_at > ?",
+            (sid, time.time())
+        ).fetchone()
+        return row
+
+    def set(self, sid: str, payload: bytes, expires_at: float) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)",
+            (sid, payload, expires_at)
+        )
+
+    def touch(self, sid: str, expires_at: float) -> None:
+        self._connection().execute(
+            "UPDATE sessions SET expires_at = ? WHERE sid = ?", (expires_at, sid)
+        )
+
+    def delete(self, sid: str) -> None:
+        self._connection().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def sweep(self) -> int:
+        cursor = self._connection().execute(
+            "DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)
+        )
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class SessionSweeper(threading.Thread):
+    """Daemon thread that periodically removes expired sessions
+
+    There is one sweeper per store (see ``for_store``), however many apps
+    use it. The sweeper only holds a weak reference to its store and exits
+    once the store is gone, so app factories and tests do not pile up
+    threads.
+    """
+
+    def __init__(self, store, interval: float):
+        super().__init__(name='session-sweeper', daemon=True)
+        self._store = weakref.ref(store)
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    @classmethod
+    def for_store(cls, store, interval: float) -> 'SessionSweeper':
+        """The store's running sweeper, started on first use"""
+        with _sweepers_lock:
+            sweeper = getattr(store, 'sweeper', None)
+            if sweeper is None or not sweeper.is_alive():
+                sweeper = store.sweeper = cls(store, interval)
+                sweeper.start()
+            return sweeper
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            store = self._store()
+            if store is None:
+                return
+            try:
+                removed = store.sweep()
+                if removed:
+                    logger.debug(f"Swept {removed} expired sessions")
+            except Exception as e:
+                logger.error(f"Session sweep failed: {e}")
+            del store
+
+    def stop(self):
+        self._stopped.set()
+
+
+_sweepers_lock = threading.Lock()
+
+
+class StoreSessionInterface(SessionInterface):
+    """Flask session interface that keeps session data in a server-side store"""
+
+    session_class = ServerSideSession
+
+    def __init__(self, store, lifetime: timedelta, key_prefix: str = '',
+                 use_signer: bool = False, sweep_interval: float = 60.0):
+        self.store = store
+        self.lifetime = lifetime
+        self.key_prefix = key_prefix
+        self.use_signer = use_signer
+        self.sweeper = None
+        if sweep_interval and sweep_interval > 0:
+            self.sweeper = SessionSweeper.for_store(store, sweep_interval)
+
+    def _signer(self, app) -> Signer:
+        return Signer(app.secret_key, salt='flask-session', key_derivation='hmac')
+
+    def _load_sid(self, app, cookie_value: str) -> Optional[str]:
+        if not self.use_signer:
+            return cookie_value
+        try:
+            return self._signer(app).unsign(cookie_value).decode()
+        except BadSignature:
+            return None
+
+    def open_session(self, app, request):
+        cookie_value = request.cookies.get(self.get_cookie_name(app))
+        sid = self._load_sid(app, cookie_value) if cookie_value else None
+        if sid:
+            entry = self.store.get(self.key_prefix + sid)
+            if entry is not None:
+                payload, expires_at = entry
+                try:
+                    session = self.session_class(pickle.loads(payload), sid=sid)
+                    session.expires_at = expires_at
+                    return session
+                except Exception as e:
+                    logger.error(f"Discarding unreadable session {sid}: {e}")
+        return self.session_class(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        name = self.get_cookie_name(app)
+        key = self.key_prefix + session.sid
+
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(key)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        lifetime = self.lifetime.total_seconds()
+        now = time.time()
+        if session.modified:
+            self.store.set(key, pickle.dumps(dict(session), pickle.HIGHEST_PROTOCOL), now + lifetime)
+        elif getattr(session, 'expires_at', now) - now < lifetime / 2:
+            # Unchanged but more than half way to expiry: extend without re-serializing
+            self.store.touch(key, now + lifetime)
+        else:
+            return
+
+        if session.new or session.permanent:
+            cookie_value = session.sid
+            if self.use_signer:
+                cookie_value = self._signer(app).sign(session.sid).decode()
+            response.set_cookie(
+                name,
+                cookie_value,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+
+def init_session(app) -> None:
+    """Install the session backend selected by ``SESSION_TYPE``
+
+    ``memory`` and ``sqlite`` use the stores in this module; any other value
+    is handed to Flask-Session unchanged (e.g. ``filesystem``).
+    """
+    session_type = app.config['SESSION_TYPE']
+    if session_type == 'memory':
+        store = MemorySessionStore()
+    elif session_type == 'sqlite':
+        store = SQLiteSessionStore(app.config['SESSION_SQLITE_PATH'])
+    else:
+        from flask_session import Session
+        Session(app)
+        return
+
+    app.session_interface = StoreSessionInterface(
+        store,
+        lifetime=app.config['PERMANENT_SESSION_LIFETIME'],
+        key_prefix=app.config.get('SESSION_KEY_PREFIX', ''),
+        use_signer=app.config.get('SESSION_USE_SIGNER', False),
+        sweep_interval=app.config.get('SESSION_SWEEP_INTERVAL', 60),
+    )
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Tests for the Prometheus metrics of the frontend"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, abort
+from metrics import endpoint_label, init_metrics, observe_api_call
+
+
+def make_app():
+    app = Flask(__name__)
+    init_metrics(app)
+
+    @app.route('/students/<int:student_id>')
+    def view_student(student_id):
+        if student_id > 100:
+            abort(404)
+        return 'ok'
+
+    return app
+
+
+def sample(text, prefix):
+    """Value of the first sample line starting with ``prefix``"""
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+def test_requests_are_labelled_by_rule():
+    """Latency and errors use the URL rule; /metrics is not recorded"""
+    app = make_app()
+    with app.test_client() as client:
+        client.get('/students/1')
+        client.get('/students/2')
+        client.get('/students/500')
+        response = client.get('/metrics')
+    text = response.get_data(as_text=True)
+    assert response.content_type.startswith('text/plain')
+    assert sample(text, 'flask_request_duration_seconds_count{method="GET",route="/students/<int:student_id>"}') >= 3
+    assert sample(text, 'flask_request_errors_total{method="GET",route="/students/<int:student_id>",status="404"}') >= 1
+    assert sample(text, 'flask_requests_in_flight') == 0
+    assert 'route="/metrics"' not in text
+
+
+def test_api_calls_are_labelled_by_endpoint():
+    """Numeric ids are collapsed so each backend endpoint is one series"""
+    assert endpoint_label('/students/42/enrollment-page') == '/students/{id}/enrollment-page'
+    assert endpoint_label('/enrollments/course/7') == '/enrollments/course/{id}'
+    assert endpoint_label('/courses') == '/courses'
+
+    observe_api_call('GET', '/courses/9', 0.01)
+    with make_app().test_client() as client:
+        text = client.get('/metrics').get_data(as_text=True)
+    assert sample(text, 'api_client_request_duration_seconds_count{endpoint="/courses/{id}",method="GET"}') >= 1
+
+
+if __name__ == '__main__':
+    test_requests_are_labelled_by_rule()
+    test_api_calls_are_labelled_by_endpoint()
+    print('All metrics tests passed!')
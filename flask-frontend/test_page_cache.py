@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Tests for the rendered page cache"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from flask import Blueprint, Flask, flash, redirect, render_template_string
+from page_cache import cached_page, init_page_cache
+
+PAGE = "{{ per_user_fragment('flashes') }}<p>render {{ count }}</p>"
+
+# The backend's change log: (entity, id) per version
+changes = []
+feed_reads = []
+
+
+class ChangeFeedStub(BaseHTTPRequestHandler):
+    """Serves GET /changes from ``changes``"""
+
+    def do_GET(self):
+        feed_reads.append(self.path)
+        since = int(parse_qs(urlparse(self.path).query)['since'][0])
+        items = [
+            {'version': version, 'entity': entity, 'id': entity_id, 'op': 'insert'}
+            for version, (entity, entity_id) in enumerate(changes, 1) if version > since
+        ]
+        body = json.dumps({
+            'items': items,
+            'next_since': items[-1]['version'] if items else since,
+            'latest_version': len(changes),
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+server = ThreadingHTTPServer(('127.0.0.1', 0), ChangeFeedStub)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def make_app(feed_interval_ms=0):
+    app = Flask(__name__, template_folder='templates')
+    app.config['SECRET_KEY'] = 'test'
+    app.config['API_BASE_URL'] = f'http://127.0.0.1:{server.server_port}'
+    app.config['PAGE_CACHE_FEED_INTERVAL_MS'] = feed_interval_ms
+    init_page_cache(app)
+    renders = []
+
+    courses_bp = Blueprint('courses', __name__)
+
+    @courses_bp.route('/')
+    @cached_page('courses')
+    def list_courses():
+        renders.append(1)
+        return render_template_string(PAGE, count=len(renders))
+
+    @courses_bp.route('/new', methods=['POST'])
+    def create_course():
+        changes.append(('courses', len(changes) + 1))
+        flash('Course created', 'success')
+        return redirect('/courses/')
+
+    app.register_blueprint(courses_bp, url_prefix='/courses')
+    return app, renders
+
+
+def test_cache_hit_and_query_key():
+    """Repeated GETs are served from cache; different query args are not"""
+    app, renders = make_app()
+    with app.test_client() as client:
+        first = client.get('/courses/')
+        second = client.get('/courses/')
+        assert first.headers['X-Page-Cache'] == 'MISS'
+        assert second.headers['X-Page-Cache'] == 'HIT'
+        assert second.data == first.data
+        client.get('/courses/?page=2')
+        assert len(renders) == 2
+
+
+def test_post_invalidates_and_flashes_are_per_user():
+    """A POST bumps the namespace; flashes are filled in on cached pages"""
+    app, renders = make_app()
+    with app.test_client() as client:
+        client.get('/courses/')
+        client.post('/courses/new')
+        response = client.get('/courses/')
+        assert response.headers['X-Page-Cache'] == 'MISS'
+        assert b'Course created' in response.data
+
+    with app.test_client() as other_client:
+        response = other_client.get('/courses/')
+        assert response.headers['X-Page-Cache'] == 'HIT'
+        assert b'Course created' not in response.data
+    assert len(renders) == 2
+
+
+def test_writes_through_other_workers_invalidate():
+    """A write handled by one worker invalidates the pages of every worker"""
+    first, first_renders = make_app()
+    second, second_renders = make_app()
+    first_client, second_client = first.test_client(), second.test_client()
+    assert second_client.get('/courses/').headers['X-Page-Cache'] == 'MISS'
+    assert second_client.get('/courses/').headers['X-Page-Cache'] == 'HIT'
+
+    first_client.post('/courses/new')
+    assert second_client.get('/courses/').headers['X-Page-Cache'] == 'MISS'
+    changes.append(('students', 1))
+    assert second_client.get('/courses/').headers['X-Page-Cache'] == 'HIT'
+    assert (len(first_renders), len(second_renders)) == (0, 2)
+
+
+def test_feed_is_read_at_most_once_per_interval():
+    """Hits within the interval make no backend call; a local write forces a read"""
+    app, renders = make_app(feed_interval_ms=60_000)
+    client = app.test_client()
+    feed_reads.clear()
+    assert client.get('/courses/').headers['X-Page-Cache'] == 'MISS'
+    for _ in range(3):
+        assert client.get('/courses/').headers['X-Page-Cache'] == 'HIT'
+    assert len(feed_reads) == 1
+
+    client.post('/courses/new')
+    assert client.get('/courses/').headers['X-Page-Cache'] == 'MISS'
+    assert len(feed_reads) == 2 and len(renders) == 2
+
+
+def test_pages_are_cached_without_a_change_feed():
+    """Without a feed, entries are still served until their TTL"""
+    app, renders = make_app()
+    app.config['API_BASE_URL'] = 'http://127.0.0.1:9'
+    with app.test_client() as client:
+        assert client.get('/courses/').headers['X-Page-Cache'] == 'MISS'
+        assert client.get('/courses/').headers['X-Page-Cache'] == 'HIT'
+    assert len(renders) == 1
+
+
+if __name__ == '__main__':
+    test_cache_hit_and_query_key()
+    test_post_invalidates_and_flashes_are_per_user()
+    test_writes_through_other_workers_invalidate()
+    test_feed_is_read_at_most_once_per_interval()
+    test_pages_are_cached_without_a_change_feed()
+    print("All page cache tests passed!")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Tests for on-demand request profiling"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from profiling import init_profiling
+
+
+def make_app(**config):
+    app = Flask(__name__)
+    app.config.update(PROFILING_ENABLED=True, PROFILING_TOKEN='secret',
+                      PROFILING_DIR=tempfile.mkdtemp(), PROFILING_INTERVAL=0.0005)
+    app.config.update(config)
+    init_profiling(app)
+
+    @app.route('/slow')
+    def slow_page():
+        deadline = time.perf_counter() + 0.02
+        while time.perf_counter() < deadline:
+            pass
+        return 'done'
+
+    return app
+
+
+def test_token_required():
+    """Requests are profiled only with the right token, via header or query"""
+    app = make_app()
+    with app.test_client() as client:
+        assert 'X-Profile-Report' not in client.get('/slow').headers
+        assert 'X-Profile-Report' not in client.get('/slow?profile=wrong').headers
+        assert 'X-Profile-Report' in client.get('/slow?profile=secret').headers
+        response = client.get('/slow', headers={'X-Profile-Token': 'secret'})
+
+    path = os.path.join(app.config['PROFILING_DIR'], response.headers['X-Profile-Report'])
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert lines
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert any('slow_page (test_profiling.py:' in line for line in lines)
+
+
+def test_non_ascii_tokens_are_rejected():
+    """Tokens that are not ASCII do not match, and do not break the request"""
+    app = make_app()
+    with app.test_client() as client:
+        response = client.get('/slow', query_string={'profile': 'é'})
+        assert response.status_code == 200 and 'X-Profile-Report' not in response.headers
+        response = client.get('/slow', headers={'X-Profile-Token': 'é'})
+        assert response.status_code == 200 and 'X-Profile-Report' not in response.headers
+
+
+def test_disabled_without_flag():
+    app = make_app(PROFILING_ENABLED=False)
+    with app.test_client() as client:
+        assert 'X-Profile-Report' not in client.get('/slow?profile=secret').headers
+
+
+def test_sampling_and_rotation():
+    """Every Nth request is profiled and only the newest reports are kept"""
+    app = make_app(PROFILING_TOKEN='', PROFILING_SAMPLE_EVERY=3, PROFILING_KEEP=2)
+    with app.test_client() as client:
+        reported = ['X-Profile-Report' in client.get('/slow').headers for _ in range(9)]
+    assert reported == [False, False, True] * 3
+    assert len(os.listdir(app.config['PROFILING_DIR'])) == 2
+
+
+if __name__ == '__main__':
+    test_token_required()
+    test_non_ascii_tokens_are_rejected()
+    test_disabled_without_flag()
+    test_sampling_and_rotation()
+    print('All profiling tests passed!')
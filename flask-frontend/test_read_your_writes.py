@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Tests for forwarding the backend's last_write cookie per user"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from flask import Flask
+from api_client import LAST_WRITE_COOKIE, APIClient, async_to_sync, get_api_client, get_async_api_client
+
+received = []
+
+
+class BackendStub(BaseHTTPRequestHandler):
+    """Sets last_write on POSTs, like the backend with a read replica, and records Cookie headers"""
+
+    def _reply(self, cookie=None):
+        received.append((self.command, self.headers.get('Cookie')))
+        body = json.dumps({'ok': True}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if cookie:
+            self.send_header('Set-Cookie', f'{LAST_WRITE_COOKIE}={cookie}; Max-Age=5; Path=/; HttpOnly')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply(cookie='1700000000.000')
+
+    def log_message(self, *args):
+        pass
+
+
+server = ThreadingHTTPServer(('127.0.0.1', 0), BackendStub)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test'
+    app.config['API_BASE_URL'] = f'http://127.0.0.1:{server.server_port}'
+    app.async_to_sync = async_to_sync
+
+    @app.route('/write', methods=['POST'])
+    def write():
+        get_api_client().post('/students', json={})
+        return 'ok'
+
+    @app.route('/sync')
+    def sync_read():
+        get_api_client().get('/students')
+        return 'ok'
+
+    @app.route('/async')
+    async def async_read():
+        async with get_async_api_client() as api:
+            await api.gather(api.get('/students'), api.get('/courses'))
+        return 'ok'
+
+    return app
+
+
+def test_last_write_follows_the_user_through_both_clients():
+    """The writer's reads carry last_write on both clients; other users' reads do not"""
+    app = make_app()
+    writer, other = app.test_client(), app.test_client()
+    received.clear()
+    writer.post('/write')
+    writer.get('/sync')
+    writer.get('/async')
+    other.get('/sync')
+    other.get('/async')
+
+    cookie = f'{LAST_WRITE_COOKIE}=1700000000.000'
+    assert received[1:4] == [('GET', cookie)] * 3
+    assert received[4:] == [('GET', None)] * 3
+
+
+def test_shared_clients_keep_no_cookies():
+    """Cookies from responses never land in the process-wide client"""
+    app = make_app()
+    with app.test_request_context():
+        client = APIClient()
+    client.post('/students', json={})
+    assert len(client.session.cookies) == 0
+
+
+if __name__ == '__main__':
+    test_last_write_follows_the_user_through_both_clients()
+    test_shared_clients_keep_no_cookies()
+    print('All read-your-writes tests passed!')
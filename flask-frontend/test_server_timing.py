@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Tests for the frontend Server-Timing breakdown"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, render_template_string
+from server_timing import init_server_timing, parse_server_timing, record_api_call
+
+PAGE = "<html><body>{{ inner }}</body></html>"
+
+
+def make_app(footer=False):
+    app = Flask(__name__)
+    app.config['SERVER_TIMING_FOOTER'] = footer
+    init_server_timing(app)
+
+    @app.route('/page')
+    def page():
+        record_api_call('GET', '/students/1', 0.012, 'db;dur=3.00, serialize;dur=1.00, total;dur=8.00')
+        record_api_call('GET', '/courses', 0.006, 'db;dur=1.50, total;dur=4.00')
+        inner = render_template_string("<p>{{ 1 + 1 }}</p>")
+        return render_template_string(PAGE, inner=inner)
+
+    return app
+
+
+def test_parse_server_timing():
+    assert parse_server_timing('db;dur=1.5, serialize;desc="x";dur=2, total') == {'db': 1.5, 'serialize': 2.0}
+    assert parse_server_timing(None) == {}
+
+
+def test_page_header_aggregates_backend_calls():
+    """Backend entries are summed and the rest of the call time is network"""
+    with make_app().test_client() as client:
+        response = client.get('/page')
+    timing = parse_server_timing(response.headers['Server-Timing'])
+    assert timing['backend-db'] == 4.5
+    assert timing['backend-serialize'] == 1.0
+    assert timing['backend'] == 12.0
+    assert timing['network'] == 6.0
+    assert 0 < timing['render'] <= timing['total']
+    assert 'desc="2 calls"' in response.headers['Server-Timing']
+    assert b'server-timing' not in response.data
+
+
+def test_debug_footer():
+    """The footer lists the phases and each backend call"""
+    with make_app(footer=True).test_client() as client:
+        body = client.get('/page').get_data(as_text=True)
+    assert body.index('Server timing') < body.index('</body>')
+    assert 'GET /students/1' in body
+
+
+if __name__ == '__main__':
+    test_parse_server_timing()
+    test_page_header_aggregates_backend_calls()
+    test_debug_footer()
+    print('All Server-Timing tests passed!')
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Tests for the server-side session stores"""
+
+import gc
+import sys
+import os
+import tempfile
+import time
+from datetime import timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, session
+from session_store import MemorySessionStore, SQLiteSessionStore, StoreSessionInterface, init_session
+
+
+def make_app(session_type, directory):
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test'
+    app.config['SESSION_TYPE'] = session_type
+    app.config['SESSION_SQLITE_PATH'] = os.path.join(directory, 'sessions.db')
+    app.config['SESSION_USE_SIGNER'] = True
+    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=1)
+    app.config['SESSION_SWEEP_INTERVAL'] = 0
+    init_session(app)
+
+    @app.route('/set/<value>')
+    def set_value(value):
+        session['value'] = value
+        return 'ok'
+
+    @app.route('/get')
+    def get_value():
+        return session.get('value', '')
+
+    return app
+
+
+def test_session_roundtrip():
+    """Both stores keep session data between requests"""
+    for session_type in ('memory', 'sqlite'):
+        with tempfile.TemporaryDirectory() as directory:
+            app = make_app(session_type, directory)
+            with app.test_client() as client:
+                client.get('/set/hello')
+                assert client.get('/get').data == b'hello'
+
+
+def test_unchanged_session_is_not_written():
+    """Read-only requests do not write the session back"""
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app('memory', directory)
+        store = app.session_interface.store
+        writes = []
+        original_set = store.set
+        store.set = lambda *args: writes.append(args) or original_set(*args)
+
+        with app.test_client() as client:
+            client.get('/set/hello')
+            for _ in range(5):
+                client.get('/get')
+        assert len(writes) == 1
+
+
+def test_sweep_removes_expired():
+    """Expired sessions are invisible and removed by sweep()"""
+    with tempfile.TemporaryDirectory() as directory:
+        for store in (MemorySessionStore(), SQLiteSessionStore(os.path.join(directory, 's.db'))):
+            store.set('live', b'x', time.time() + 60)
+            store.set('dead', b'x', time.time() - 1)
+            assert store.get('dead') is None
+            assert store.sweep() == 1
+            assert len(store) == 1
+
+
+def test_one_sweeper_per_store():
+    """Apps sharing a store share its sweeper, which exits with the store"""
+    store = MemorySessionStore()
+    first = StoreSessionInterface(store, timedelta(hours=1), sweep_interval=0.01)
+    second = StoreSessionInterface(store, timedelta(hours=1), sweep_interval=0.01)
+    sweeper = first.sweeper
+    assert sweeper is second.sweeper and sweeper.is_alive()
+
+    del store, first, second
+    gc.collect()
+    sweeper.join(1)
+    assert not sweeper.is_alive()
+
+
+if __name__ == '__main__':
+    test_session_roundtrip()
+    test_unchanged_session_is_not_written()
+    test_sweep_removes_expired()
+    test_one_sweeper_per_store()
+    print("All session store tests passed!")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Tests for trace-context propagation from Flask to the backend"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from flask import Flask
+from api_client import APIClient, async_to_sync, get_async_api_client
+from tracing import init_tracing, parse_traceparent
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+
+received = []
+
+
+class BackendStub(BaseHTTPRequestHandler):
+    """Records the traceparent header of every call"""
+
+    def do_GET(self):
+        received.append(self.headers.get('traceparent'))
+        body = json.dumps({'ok': True}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+server = ThreadingHTTPServer(('127.0.0.1', 0), BackendStub)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+BACKEND_URL = f'http://127.0.0.1:{server.server_port}'
+
+
+def make_app(sample_rate=0.0):
+    app = Flask(__name__)
+    app.config['API_BASE_URL'] = BACKEND_URL
+    app.config['TRACING_SAMPLE_RATE'] = sample_rate
+    app.config['TRACING_EXPORTER'] = 'file'
+    app.config['TRACING_FILE'] = os.path.join(tempfile.mkdtemp(), 'traces.jsonl')
+    app.async_to_sync = async_to_sync
+    init_tracing(app)
+
+    @app.route('/students/<int:student_id>')
+    def view_student(student_id):
+        APIClient().get(f'/students/{student_id}')
+        APIClient().get('/courses')
+        return 'ok'
+
+    @app.route('/async')
+    async def async_page():
+        async with get_async_api_client() as api:
+            await api.gather(api.get('/students/1'), api.get('/courses'))
+        return 'ok'
+
+    @app.route('/client')
+    async def client_page():
+        return f'{get_async_api_client().base_url} {id(get_async_api_client())}'
+
+    return app
+
+
+def read_spans(app):
+    path = app.config['TRACING_FILE']
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_sampled_page_propagates_to_backend():
+    """Each backend call gets its own client span and traceparent"""
+    received.clear()
+    app = make_app()
+    with app.test_client() as client:
+        response = client.get('/students/7', headers={'traceparent': f'00-{TRACE_ID}-{PARENT_ID}-01'})
+    assert response.status_code == 200
+
+    spans = read_spans(app)
+    root = next(span for span in spans if span['kind'] == 'server')
+    calls = [span for span in spans if span['kind'] == 'client']
+    assert root['name'] == 'GET /students/<int:student_id>'
+    assert root['parent_id'] == PARENT_ID
+    assert [call['name'] for call in calls] == ['GET /students/{id}', 'GET /courses']
+    assert all(call['parent_id'] == root['span_id'] for call in calls)
+
+    sent = [parse_traceparent(header) for header in received]
+    assert sent == [(TRACE_ID, call['span_id'], True) for call in calls]
+
+
+def test_async_calls_are_traced():
+    """Concurrent calls from async views are children of the page span"""
+    received.clear()
+    app = make_app(sample_rate=1.0)
+    with app.test_client() as client:
+        client.get('/async')
+    spans = read_spans(app)
+    root = next(span for span in spans if span['kind'] == 'server')
+    calls = [span for span in spans if span['kind'] == 'client']
+    assert len(calls) == 2 and all(call['parent_id'] == root['span_id'] for call in calls)
+    assert sorted(parse_traceparent(header)[1] for header in received) == sorted(call['span_id'] for call in calls)
+
+
+def test_async_clients_follow_their_app():
+    """Async views share one client per app, pointed at that app's backend"""
+    first, second = make_app(), make_app()
+    second.config['API_BASE_URL'] = 'http://127.0.0.1:9'
+    with first.test_client() as client:
+        url, client_id = client.get('/client').text.split()
+        assert url == BACKEND_URL and client.get('/client').text.split()[1] == client_id
+    with second.test_client() as client:
+        assert client.get('/client').text.split()[0] == 'http://127.0.0.1:9'
+
+
+def test_unsampled_requests():
+    """Nothing is recorded when sampling is off; unsampled parents are forwarded"""
+    received.clear()
+    app = make_app()
+    with app.test_client() as client:
+        client.get('/students/7')
+        client.get('/students/7', headers={'traceparent': f'00-{TRACE_ID}-{PARENT_ID}-00'})
+    assert read_spans(app) == []
+    assert received[:2] == [None, None]
+    assert received[2:] == [f'00-{TRACE_ID}-{PARENT_ID}-00'] * 2
+
+
+if __name__ == '__main__':
+    test_sampled_page_propagates_to_backend()
+    test_async_calls_are_traced()
+    test_async_clients_follow_their_app()
+    test_unsampled_requests()
+    print('All tracing tests passed!')
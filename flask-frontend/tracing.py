@@ -0,0 +1,243 @@
+"""
+W3C trace-context propagation for the Flask frontend
+
+Each request continues the trace of an incoming ``traceparent`` header, or
+starts a new one for a ``TRACING_SAMPLE_RATE`` share of requests. A sampled
+request records a server span for the page and a client span per backend
+call; ``APIClient`` sends each call's ``traceparent`` to the backend, which
+adds its own request, SQL and serialization spans to the same trace (see
+``fastapi-backend/app/tracing.py``).
+
+Spans go to ``TRACING_EXPORTER`` when the request ends: ``console``
+(stderr), ``file`` (JSON lines in ``TRACING_FILE``) or ``module:Class`` for
+any object with ``export(spans)`` and ``shutdown()``. Pointing both apps at
+the same file puts a page's spans and its backend spans side by side.
+
+Requests that are not sampled cost one header lookup and one random draw;
+``api_call_headers`` then returns without allocating anything.
+
+``parse_traceparent``, ``format_traceparent``, ``Span`` and the exporters
+have a twin in the backend's app/tracing.py (whose ``Span`` also takes
+explicit timestamps). The frontend and the backend are installed and deployed
+separately and share no package, so a fix to one belongs in both.
+"""
+import abc
+import importlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+from flask import g, has_request_context, request
+
+from metrics import endpoint_label
+
+SERVICE_NAME = 'flask-frontend'
+
+_TRACEPARENT = re.compile(r'^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """``(trace_id, parent_span_id, sampled)`` of a valid header, else None"""
+    if not header:
+        return None
+    match = _TRACEPARENT.match(header.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, parent_id, flags = match.groups()
+    if version == 'ff' or trace_id == '0' * 32 or parent_id == '0' * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def format_traceparent(trace_id: str, span_id: str, sampled: bool) -> str:
+    return f"00-{trace_id}-{span_id}-{'01' if sampled else '00'}"
+
+
+def _new_id(bits: int) -> str:
+    return f'{random.getrandbits(bits) or 1:0{bits // 4}x}'
+
+
+class Span:
+    """One timed operation of a trace"""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'kind', 'start_ns', 'end_ns', 'attributes')
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, kind: str = 'internal'):
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, object] = {}
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'service': SERVICE_NAME,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_time_unix_nano': self.start_ns,
+            'end_time_unix_nano': self.end_ns,
+            'duration_ms': round(((self.end_ns or self.start_ns) - self.start_ns) / 1e6, 3),
+            'attributes': self.attributes,
+        }
+
+
+# Exporters
+
+class SpanExporter(abc.ABC):
+    """Receives the spans of each finished request"""
+
+    @abc.abstractmethod
+    def export(self, spans: Sequence[Span]) -> None:
+        """Write out the spans of one request"""
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """One JSON line per span on a stream (stderr by default)"""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def _open(self):
+        return sys.stderr
+
+    def export(self, spans: Sequence[Span]) -> None:
+        lines = ''.join(json.dumps(span.to_dict(), default=str) + '\n' for span in spans)
+        with self._lock:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(lines)
+            self.stream.flush()
+
+
+class FileSpanExporter(ConsoleSpanExporter):
+    """One JSON line per span, appended to ``path`` (opened on first export)"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def _open(self):
+        return open(self.path, 'a', encoding='utf-8')
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+
+
+def create_exporter(spec: str, path: str = 'traces.jsonl') -> SpanExporter:
+    """``console``, ``file`` (written to ``path``) or ``module:Class``"""
+    if spec == 'console':
+        return ConsoleSpanExporter()
+    if spec == 'file':
+        return FileSpanExporter(path)
+    module_name, _, class_name = spec.partition(':')
+    if not class_name:
+        raise ValueError(f'Unknown span exporter {spec!r}; use console, file or module:Class')
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+# Propagation
+
+@contextmanager
+def api_call_headers(method: str, endpoint: str) -> Iterator[Dict[str, str]]:
+    """Headers that carry the current trace to a backend call
+
+    For sampled requests the call is recorded as a client span, and the
+    backend's spans become its children.
+    """
+    trace = g.get('trace') if has_request_context() else None
+    if trace is None:
+        yield {}
+        return
+
+    trace_id, parent_id, sampled = trace
+    if not sampled:
+        yield {'traceparent': format_traceparent(trace_id, parent_id, False)}
+        return
+
+    span = Span(trace_id, parent_id, f'{method} {endpoint_label(endpoint)}', kind='client')
+    span.attributes['http.method'] = method
+    span.attributes['http.url'] = endpoint
+    g.trace_spans.append(span)
+    try:
+        yield {'traceparent': format_traceparent(trace_id, span.span_id, True)}
+    except Exception as error:
+        span.attributes['error'] = type(error).__name__
+        raise
+    finally:
+        span.end()
+
+
+def init_tracing(app) -> None:
+    """Register the tracing hooks unless ``TRACING_ENABLED`` is off"""
+    if not app.config.get('TRACING_ENABLED', True):
+        return
+
+    sample_rate = app.config.get('TRACING_SAMPLE_RATE', 0.0)
+    exporter = create_exporter(app.config.get('TRACING_EXPORTER', 'file'),
+                               app.config.get('TRACING_FILE', 'traces.jsonl'))
+    app.extensions['span_exporter'] = exporter
+
+    @app.before_request
+    def start_trace():
+        parent = parse_traceparent(request.headers.get('traceparent'))
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        elif sample_rate > 0 and random.random() < sample_rate:
+            trace_id, parent_id, sampled = _new_id(128), None, True
+        else:
+            return
+        if not sampled:
+            g.trace = (trace_id, parent_id, False)
+            return
+
+        root = Span(trace_id, parent_id, f'{request.method} {request.path}', kind='server')
+        root.attributes['http.method'] = request.method
+        root.attributes['http.target'] = request.path
+        g.trace_spans = [root]
+        g.trace = (trace_id, root.span_id, True)
+
+    @app.after_request
+    def record_status(response):
+        spans = g.get('trace_spans')
+        if spans:
+            spans[0].attributes['http.status_code'] = response.status_code
+        return response
+
+    @app.teardown_request
+    def export_trace(error=None):
+        spans = g.pop('trace_spans', None)
+        if not spans:
+            return
+        root = spans[0]
+        if request.url_rule is not None:
+            root.name = f'{request.method} {request.url_rule.rule}'
+            root.attributes['http.route'] = request.url_rule.rule
+        if error is not None:
+            root.attributes['error'] = type(error).__name__
+        root.end()
+        try:
+            exporter.export(spans)
+        except Exception:
+            app.logger.exception('Span export failed')
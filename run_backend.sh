@@ -13,6 +13,15 @@ fi
 echo "Installing/updating dependencies..."
 uv sync
 
+# Create or update the database schema
+uv run python -m app.init_db
+
+# Production mode: one worker per core behind gunicorn (see gunicorn.conf.py)
+if [ "$1" = "--prod" ]; then
+    echo "Starting FastAPI workers on http://localhost:8000 (readiness: /ready)"
+    exec uv run gunicorn -c gunicorn.conf.py main:app
+fi
+
 # Run the FastAPI server
 echo "Starting FastAPI on http://localhost:8000"
 echo "API docs available at http://localhost:8000/docs"